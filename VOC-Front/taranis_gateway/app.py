@@ -1,11 +1,30 @@
+import os
+
 from flask import Flask
 from flask_cors import CORS
 from routes import register_routes
+from utils.circuit_breaker import init_stale_responses
+from utils.conditional import init_conditional_responses
+from utils.fast_json import init_json
+from utils.metrics import init_metrics
+from utils.server_timing import init_server_timing
 
 app = Flask(__name__)
 CORS(app)
 
+# En premier : le chronomètre englobe les autres hooks before/after_request
+init_metrics(app)
+init_server_timing(app)
+init_json(app)
 register_routes(app)
+init_conditional_responses(app)
+init_stale_responses(app)
 
 if __name__ == '__main__':
-    app.run(host="0.0.0.0", port=5001, debug=True)
+    # Serveur de développement uniquement ; en production : gunicorn -c gunicorn.conf.py app:app
+    app.run(
+        host=os.getenv("GATEWAY_HOST", "0.0.0.0"),
+        port=int(os.getenv("GATEWAY_PORT", "5001")),
+        debug=os.getenv("FLASK_DEBUG", "false").lower() in ("1", "true"),
+        threaded=True
+    )
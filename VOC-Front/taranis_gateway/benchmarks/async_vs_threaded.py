@@ -0,0 +1,132 @@
+"""Benchmark : mode threadé (serveur Werkzeug) vs mode async (serve_async.py).
+
+Un faux Taranis lent (benchmarks/slow_upstream.py) est démarré en local, puis la
+gateway est lancée dans chacun des deux modes et bombardée de requêtes
+simultanées sur /api/assess/vulnerabilities. On mesure le débit, les
+latences et la mémoire (RSS) / le nombre de threads du process gateway.
+
+    python benchmarks/async_vs_threaded.py --concurrency 500 --requests 2000 --latency 0.5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+GATEWAY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# === Lancement de la gateway dans un mode donné ===
+def start_gateway(mode, port, upstream_port):
+    env = dict(os.environ, TARANIS_BASE_URL=f"http://127.0.0.1:{upstream_port}", GATEWAY_PORT=str(port))
+    if mode == "async":
+        cmd = [sys.executable, "serve_async.py"]
+    else:
+        cmd = [sys.executable, "-c", f"from app import app; app.run(host='127.0.0.1', port={port}, threaded=True)"]
+    return subprocess.Popen(cmd, cwd=GATEWAY_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_until_up(url, timeout=15):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.1)
+    raise RuntimeError(f"{url} ne répond pas")
+
+
+def process_usage(pid):
+    """RSS (Mo) et nombre de threads du process, lus dans /proc (Linux)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+        return int(fields["VmRSS"].split()[0]) / 1024, int(fields["Threads"])
+    except (OSError, KeyError):
+        return 0.0, 0
+
+
+def run_load(url, total, concurrency, pid):
+    latencies, errors = [], 0
+    peak = {"rss_mb": 0.0, "threads": 0}
+    done = threading.Event()
+
+    def sample():
+        while not done.is_set():
+            rss, threads = process_usage(pid)
+            peak["rss_mb"] = max(peak["rss_mb"], rss)
+            peak["threads"] = max(peak["threads"], threads)
+            time.sleep(0.05)
+
+    def one_call(_):
+        start = time.perf_counter()
+        try:
+            ok = requests.get(url, timeout=120).status_code == 200
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for elapsed, ok in pool.map(one_call, range(total)):
+            latencies.append(elapsed)
+            errors += 0 if ok else 1
+    duration = time.perf_counter() - started
+    done.set()
+
+    latencies.sort()
+    quantile = lambda q: round(latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000, 1)
+    return {
+        "requests": total,
+        "errors": errors,
+        "duration_s": round(duration, 2),
+        "throughput_rps": round(total / duration, 1),
+        "latency_ms": {"mean": round(statistics.mean(latencies) * 1000, 1),
+                       "p50": quantile(0.50), "p95": quantile(0.95), "p99": quantile(0.99)},
+        "peak_rss_mb": round(peak["rss_mb"], 1),
+        "peak_threads": peak["threads"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.5, help="latence du faux Taranis (s)")
+    parser.add_argument("--modes", default="threaded,async")
+    parser.add_argument("--upstream-port", type=int, default=18443)
+    parser.add_argument("--gateway-port", type=int, default=18001)
+    args = parser.parse_args()
+
+    upstream = subprocess.Popen([sys.executable, os.path.join(GATEWAY_DIR, "benchmarks", "slow_upstream.py"),
+                                 "--port", str(args.upstream_port), "--latency", str(args.latency)])
+    results = {}
+    try:
+        wait_until_up(f"http://127.0.0.1:{args.upstream_port}/")
+        for mode in args.modes.split(","):
+            gateway = start_gateway(mode, args.gateway_port, args.upstream_port)
+            try:
+                base = f"http://127.0.0.1:{args.gateway_port}"
+                wait_until_up(f"{base}/api/gateway/stats")
+                results[mode] = run_load(f"{base}/api/assess/vulnerabilities", args.requests, args.concurrency, gateway.pid)
+            finally:
+                gateway.terminate()
+                gateway.wait()
+    finally:
+        upstream.terminate()
+        upstream.wait()
+
+    print(json.dumps({"concurrency": args.concurrency, "upstream_latency_s": args.latency, "results": results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
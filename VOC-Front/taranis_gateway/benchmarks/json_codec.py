@@ -0,0 +1,116 @@
+"""Micro-benchmark : décodage des réponses Taranis et jsonify, stdlib vs utils/fast_json.py.
+
+Les charges ont la forme réelle des routes (générateurs de benchmarks/mock_taranis.py) :
+groupe de vulnérabilités complet (assess_routes), page upstream de 1000
+agrégats, liste des users brute et simplifiée (access_control_routes), sources OSINT.
+
+    python benchmarks/json_codec.py --news-items 50000 --users 2000 --repeat 5 --output json_codec.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+GATEWAY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, GATEWAY_DIR)
+sys.path.insert(0, os.path.join(GATEWAY_DIR, "benchmarks"))
+
+from mock_taranis import SyntheticData  # noqa: E402
+from utils.fast_json import JSON_BACKEND, GatewayJSONProvider, loads  # noqa: E402
+
+
+def simplified_users(data):
+    """Même remise en forme que get_users()."""
+    return {
+        "total_count": data.get("total_count", 0),
+        "items": [
+            {
+                "id": user.get("id"),
+                "username": user.get("username"),
+                "name": user.get("name"),
+                "roles": [role.get("name") for role in user.get("roles", [])],
+                "organizations": [org.get("name") for org in user.get("organizations", [])],
+                "tag": user.get("tag"),
+            }
+            for user in data.get("items", [])
+        ],
+    }
+
+
+def build_payloads(news_items, users):
+    data = SyntheticData(42, news_items, 500)
+    data.CONFIG_SIZES = {**SyntheticData.CONFIG_SIZES, "users": users}
+    users_list = data.config_list("users")
+    return {
+        "assess_group": data.news_page(0, news_items, False),
+        "assess_upstream_page": data.news_page(0, 1000, False),
+        "users_raw": users_list,
+        "users_simplified": simplified_users(users_list),
+        "osint_sources": data.config_list("osint-sources"),
+    }
+
+
+def measure(call, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {"min_ms": round(min(timings), 2), "median_ms": round(statistics.median(timings), 2)}
+
+
+def run(payloads, repeat):
+    app = Flask(__name__)
+    stdlib_provider, fast_provider = DefaultJSONProvider(app), GatewayJSONProvider(app)
+    results = {}
+    with app.app_context():
+        for name, payload in payloads.items():
+            body = json.dumps(payload).encode()
+            # Vérification : même document après un aller-retour par chaque implémentation
+            assert loads(body) == json.loads(body)
+            assert json.loads(fast_provider.response(payload).get_data()) == json.loads(stdlib_provider.response(payload).get_data())
+            decode = {
+                "stdlib": measure(lambda: json.loads(body.decode("utf-8")), repeat),
+                "fast": measure(lambda: loads(body), repeat),
+            }
+            encode = {
+                "stdlib": measure(lambda: stdlib_provider.response(payload), repeat),
+                "fast": measure(lambda: fast_provider.response(payload), repeat),
+            }
+            results[name] = {
+                "bytes": len(body),
+                "decode": {**decode, "speedup": round(decode["stdlib"]["min_ms"] / max(decode["fast"]["min_ms"], 1e-6), 1)},
+                "jsonify": {**encode, "speedup": round(encode["stdlib"]["min_ms"] / max(encode["fast"]["min_ms"], 1e-6), 1)},
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--news-items", type=int, default=50000)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="fichier du rapport JSON")
+    args = parser.parse_args()
+
+    results = run(build_payloads(args.news_items, args.users), args.repeat)
+    report = {"backend": JSON_BACKEND, "repeat": args.repeat, "results": results}
+
+    print(f"{'charge':<22}{'taille':>10}  {'décodage stdlib/fast (ms)':>28}  {'jsonify stdlib/fast (ms)':>27}")
+    for name, result in results.items():
+        decode, encode = result["decode"], result["jsonify"]
+        print(f"{name:<22}{result['bytes'] // 1024:>8}Ki  "
+              f"{decode['stdlib']['min_ms']:>10} / {decode['fast']['min_ms']:<8} x{decode['speedup']:<5}  "
+              f"{encode['stdlib']['min_ms']:>9} / {encode['fast']['min_ms']:<8} x{encode['speedup']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
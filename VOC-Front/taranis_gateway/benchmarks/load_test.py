@@ -0,0 +1,246 @@
+"""Test de charge de la gateway contre le faux Taranis (benchmarks/mock_taranis.py).
+
+Démarre le faux Taranis et la gateway (gunicorn.conf.py ou serveur de dev), appelle
+toutes les routes GET des blueprints (plus quelques variantes de requêtes) et
+écrit un rapport JSON : débit, erreurs et latences p50/p95/p99 par route et au
+total. Avec --baseline, le rapport est comparé à un rapport précédent et le
+script sort en erreur (code 1) si une route régresse.
+
+    python benchmarks/load_test.py --requests-per-route 50 --concurrency 16 --output bench.json
+    python benchmarks/load_test.py --baseline bench.json --max-regression 0.25
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+GATEWAY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, GATEWAY_DIR)
+
+# Routes qui demandent un identifiant créé pendant le test
+SKIPPED_RULES = {"/api/publish/jobs/<job_id>"}
+# Variantes de requêtes importantes, en plus des routes telles quelles
+EXTRA_GETS = [
+    "/api/assess/vulnerabilities/query?view=critical&sort=-risk_score&limit=50",
+    "/api/assess/vulnerabilities/query?q=microsoft&cvss_min=7&limit=50",
+    "/api/assess/vulnerabilities?stream=ndjson",
+    "/api/osint-sources?fields=id,name,collector.type&sort=name&limit=50",
+    "/api/gateway/stats",
+]
+# Écart minimal (ms) pour parler de régression, sous lequel on est dans le bruit
+REGRESSION_MIN_DELTA_MS = 5.0
+
+
+def discover_paths():
+    """Chemins GET de toutes les routes des blueprints, paramètres remplis avec des valeurs d'exemple."""
+    from app import app
+    from utils.vulnerabilities import GROUP_ID_VULNERABILITIES
+
+    paths = []
+    for rule in sorted(app.url_map.iter_rules(), key=lambda rule: rule.rule):
+        if "GET" not in rule.methods or rule.endpoint == "static" or rule.rule in SKIPPED_RULES:
+            continue
+        # Les groupes de news items sont des UUID, tout le reste des ids numériques
+        group_id = GROUP_ID_VULNERABILITIES if "news-item-aggregates" in rule.rule else 1
+        values = {name: group_id if name == "group_id" else 1 for name in rule.arguments}
+        paths.append(rule.rule if not values else app.url_map.bind("").build(rule.endpoint, values))
+    return paths + EXTRA_GETS
+
+
+def start_process(cmd, env=None):
+    return subprocess.Popen(cmd, cwd=GATEWAY_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_until_up(url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} ne répond pas")
+
+
+def start_gateway(server, port, upstream_url, workers):
+    env = dict(os.environ, TARANIS_BASE_URL=upstream_url, GATEWAY_HOST="127.0.0.1", GATEWAY_PORT=str(port),
+               GATEWAY_WORKERS=str(workers), GATEWAY_ACCESS_LOG=os.devnull)
+    if server == "gunicorn":
+        cmd = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"]
+    else:
+        cmd = [sys.executable, "-c", f"from app import app; app.run(host='127.0.0.1', port={port}, threaded=True)"]
+    return start_process(cmd, env)
+
+
+def summarize(samples, duration):
+    latencies = sorted(elapsed for elapsed, _ in samples)
+    statuses = [status for _, status in samples]
+    quantile = lambda q: round(latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000, 1)
+    return {
+        "requests": len(samples),
+        # Erreurs : exception réseau (status 0) ou 5xx ; les 4xx sont comptés à part
+        "errors": sum(1 for status in statuses if status == 0 or status >= 500),
+        "client_errors": sum(1 for status in statuses if 400 <= status < 500),
+        "throughput_rps": round(len(samples) / duration, 1) if duration else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.mean(latencies) * 1000, 1),
+            "p50": quantile(0.50),
+            "p95": quantile(0.95),
+            "p99": quantile(0.99),
+            "max": round(latencies[-1] * 1000, 1),
+        },
+    }
+
+
+def run_load(base_url, paths, requests_per_route, concurrency, timeout, seed):
+    local = threading.local()
+
+    def session():
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        return local.session
+
+    def call(path):
+        started = time.perf_counter()
+        try:
+            response = session().get(base_url + path, timeout=timeout)
+            response.content
+            status = response.status_code
+        except requests.RequestException:
+            status = 0
+        return path, time.perf_counter() - started, status
+
+    # Une requête par route hors mesure : snapshots, index et catalogues construits
+    for path in paths:
+        call(path)
+
+    tasks = [path for path in paths for _ in range(requests_per_route)]
+    random.Random(seed).shuffle(tasks)
+    by_path = {path: [] for path in paths}
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for path, elapsed, status in pool.map(call, tasks):
+            by_path[path].append((elapsed, status))
+    duration = time.perf_counter() - started
+
+    routes = {f"GET {path}": summarize(samples, duration) for path, samples in by_path.items()}
+    totals = summarize([sample for samples in by_path.values() for sample in samples], duration)
+    totals["duration_s"] = round(duration, 2)
+    return routes, totals
+
+
+def compare(report, baseline, max_regression):
+    """Routes dont le p95 ou le nombre d'erreurs s'est dégradé par rapport au rapport de référence."""
+    regressions = []
+    for route, current in report["routes"].items():
+        previous = baseline.get("routes", {}).get(route)
+        if previous is None:
+            continue
+        before, after = previous["latency_ms"]["p95"], current["latency_ms"]["p95"]
+        if after - before > REGRESSION_MIN_DELTA_MS and after > before * (1 + max_regression):
+            regressions.append({"route": route, "metric": "p95_ms", "baseline": before, "current": after})
+        if current["errors"] > previous["errors"]:
+            regressions.append({"route": route, "metric": "errors", "baseline": previous["errors"], "current": current["errors"]})
+    before, after = baseline["totals"]["throughput_rps"], report["totals"]["throughput_rps"]
+    if after < before * (1 - max_regression):
+        regressions.append({"route": "*", "metric": "throughput_rps", "baseline": before, "current": after})
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=GATEWAY_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests-per-route", type=int, default=30)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--server", choices=("gunicorn", "dev"), default="gunicorn")
+    parser.add_argument("--workers", type=int, default=2, help="workers gunicorn")
+    parser.add_argument("--gateway-url", help="gateway déjà démarrée (ni gateway ni faux Taranis lancés)")
+    parser.add_argument("--gateway-port", type=int, default=18001)
+    parser.add_argument("--upstream-port", type=int, default=18443)
+    parser.add_argument("--latency", type=float, default=0.02, help="latence du faux Taranis (s)")
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--news-items", type=int, default=50000)
+    parser.add_argument("--only", help="ne garder que les chemins contenant ce texte")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="fichier du rapport JSON (sinon sortie standard)")
+    parser.add_argument("--baseline", help="rapport JSON de référence")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="dégradation tolérée (0.25 = +25 %% de p95)")
+    args = parser.parse_args()
+
+    paths = discover_paths()
+    if args.only:
+        paths = [path for path in paths if args.only in path]
+
+    processes = []
+    try:
+        base_url = args.gateway_url
+        if base_url is None:
+            upstream_url = f"http://127.0.0.1:{args.upstream_port}"
+            processes.append(start_process([
+                sys.executable, os.path.join("benchmarks", "mock_taranis.py"), "--port", str(args.upstream_port),
+                "--latency", str(args.latency), "--jitter", str(args.jitter), "--news-items", str(args.news_items),
+                "--seed", str(args.seed),
+            ]))
+            wait_until_up(upstream_url)
+            processes.append(start_gateway(args.server, args.gateway_port, upstream_url, args.workers))
+            base_url = f"http://127.0.0.1:{args.gateway_port}"
+        wait_until_up(f"{base_url}/api/gateway/stats")
+        routes, totals = run_load(base_url, paths, args.requests_per_route, args.concurrency, args.timeout, args.seed)
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            process.wait()
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "commit": git_commit(),
+            "server": "external" if args.gateway_url else args.server,
+            "workers": args.workers,
+            "concurrency": args.concurrency,
+            "requests_per_route": args.requests_per_route,
+            "upstream": {"latency_s": args.latency, "jitter_s": args.jitter, "news_items": args.news_items},
+        },
+        "totals": totals,
+        "routes": routes,
+    }
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["regressions"] = compare(report, json.load(f), args.max_regression)
+        exit_code = 1 if report["regressions"] else 0
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    latency = totals["latency_ms"]
+    print(f"{totals['requests']} requêtes, {totals['errors']} erreurs, {totals['throughput_rps']} req/s, "
+          f"p50={latency['p50']}ms p95={latency['p95']}ms p99={latency['p99']}ms", file=sys.stderr)
+    for regression in report.get("regressions", []):
+        print(f"RÉGRESSION {regression['route']} {regression['metric']} : "
+              f"{regression['baseline']} -> {regression['current']}", file=sys.stderr)
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+"""Faux Taranis complet pour les benchmarks et tests de charge de la gateway.
+
+Données synthétiques réalistes et déterministes (--seed) : login JWT, listes de
+configuration, news-item-aggregates d'un groupe (50 000 par défaut, paginées),
+report items et publication. Chaque réponse est retardée de --latency
+secondes ± --jitter. Les GET renvoient un ETag (304 sur If-None-Match).
+
+    python benchmarks/mock_taranis.py --port 18443 --latency 0.02 --jitter 0.01 --news-items 50000
+
+Les générateurs (SyntheticData) sont aussi réutilisés par les micro-benchmarks.
+"""
+import argparse
+import base64
+import hashlib
+import json
+import random
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qs
+
+import gevent
+from gevent.pywsgi import WSGIServer
+
+VENDORS = ["microsoft", "apache", "cisco", "fortinet", "google", "oracle", "linux", "vmware", "ivanti", "atlassian"]
+PRODUCTS = ["windows", "http_server", "ios_xe", "fortios", "chrome", "weblogic", "kernel", "esxi", "connect_secure", "confluence"]
+WORDS = ("remote code execution vulnerability allows attacker authenticated unauthenticated crafted request "
+         "buffer overflow privilege escalation injection bypass memory corruption denial service exploit "
+         "patch advisory affected versions mitigation workaround").split()
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _jwt(ttl):
+    encode = lambda data: base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+    return f"{encode({'alg': 'HS256', 'typ': 'JWT'})}.{encode({'sub': 'admin', 'exp': int(time.time() + ttl)})}.sig"
+
+
+class SyntheticData:
+    """Jeu de données généré à la demande (les gros groupes ne sont jamais gardés en mémoire)."""
+
+    CONFIG_SIZES = {
+        "users": 40, "roles": 8, "organizations": 6, "acls": 12, "attributes": 60,
+        "osint-sources": 300, "osint-source-groups": 25, "bots-nodes": 4, "bots-presets": 20,
+        "collectors-nodes": 4, "presenters-nodes": 3, "publishers-nodes": 3, "publishers-presets": 12,
+        "product-types": 15, "report-item-types": 20, "word-lists": 30, "remote-nodes": 3, "remote-accesses": 3,
+    }
+
+    def __init__(self, seed, news_items, report_items):
+        self.seed = seed
+        self.news_items = news_items
+        self.report_items = report_items
+        self.version = 1
+
+    def _rng(self, *key):
+        return random.Random(f"{self.seed}:{':'.join(map(str, key))}")
+
+    def _text(self, rng, words):
+        return " ".join(rng.choice(WORDS) for _ in range(words))
+
+    def config_item(self, collection, item_id):
+        rng = self._rng(collection, item_id)
+        item = {
+            "id": item_id,
+            "name": f"{collection[:-1]}-{item_id}",
+            "title": f"{collection.replace('-', ' ').title()} {item_id}",
+            "description": self._text(rng, 12),
+            "tag": rng.choice(["mdi-account", "mdi-robot", "mdi-rss", "mdi-file"]),
+        }
+        if collection == "users":
+            item.update(username=f"analyst{item_id}", roles=[{"id": 1 + item_id % 8, "name": f"role-{item_id % 8}"}],
+                        organizations=[{"id": 1 + item_id % 6, "name": f"org-{item_id % 6}"}], permissions=["ASSESS_ACCESS"])
+        elif collection == "osint-sources":
+            item.update(collector={"id": 1 + item_id % 4, "type": rng.choice(["RSS_COLLECTOR", "WEB_COLLECTOR"])},
+                        parameters=[{"parameter": {"key": "FEED_URL"}, "value": f"https://feeds.example.org/{item_id}.xml"}],
+                        word_lists=[], osint_source_groups=[{"id": 1 + item_id % 25}])
+        elif collection in ("bots-nodes", "collectors-nodes", "presenters-nodes", "publishers-nodes"):
+            item.update(api_url=f"https://{collection[:-6]}-{item_id}.local:5000", api_key="x" * 16)
+        elif collection == "report-item-types":
+            item.update(subtitle=self._text(rng, 3), attribute_groups=[
+                {"id": group, "title": f"Group {group}", "attribute_group_items": [
+                    {"id": group * 10 + n, "title": f"Field {n}", "attribute": {"id": n, "type": "STRING"}} for n in range(5)
+                ]} for group in range(3)
+            ])
+        elif collection == "word-lists":
+            item.update(categories=[{"name": "default", "entries": [{"value": rng.choice(WORDS)} for _ in range(50)]}])
+        return item
+
+    def config_list(self, collection):
+        size = self.CONFIG_SIZES.get(collection, 10)
+        return {"total_count": size, "items": [self.config_item(collection, i) for i in range(1, size + 1)]}
+
+    def news_item(self, index):
+        rng = self._rng("news", index)
+        vendor, product = rng.choice(VENDORS), rng.choice(PRODUCTS)
+        created = EPOCH + timedelta(minutes=17 * index)
+        cvss = round(rng.uniform(2, 10), 1)
+        cve = f"CVE-{2024 + index // 30000}-{10000 + index:05d}"
+        content = f"{cve} : {vendor} {product} " + self._text(rng, 60)
+        return {
+            "id": index + 1,
+            "title": f"{cve} {vendor} {product} {self._text(rng, 5)}",
+            "description": self._text(rng, 25),
+            "created": created.isoformat(),
+            "read": rng.random() < 0.3,
+            "important": rng.random() < 0.05,
+            "likes": rng.randint(0, 5),
+            "dislikes": 0,
+            "tags": [{"name": cve}, {"name": vendor}],
+            "news_items": [{
+                "id": index + 1,
+                "news_item_data": {
+                    "title": f"{cve} - {vendor} {product}",
+                    "review": self._text(rng, 20),
+                    "content": content,
+                    "link": f"https://nvd.nist.gov/vuln/detail/{cve}",
+                    "published": created.isoformat(),
+                    "source": "NVD",
+                },
+            }],
+            "cvss_score": cvss,
+            "epss_score": round(rng.random() ** 3, 4),
+            "epss_percentile": round(rng.random(), 4),
+            "is_kev": rng.random() < 0.04,
+            "has_poc": rng.random() < 0.15,
+            "vendor": vendor,
+            "product": product,
+        }
+
+    def news_page(self, offset, limit, descending):
+        indices = range(self.news_items)
+        if descending:
+            indices = indices[::-1]
+        return {"total_count": self.news_items, "items": [self.news_item(i) for i in indices[offset:offset + limit]]}
+
+    def report_item(self, item_id):
+        rng = self._rng("report", item_id)
+        return {
+            "id": item_id,
+            "uuid": f"00000000-0000-4000-8000-{item_id:012d}",
+            "title": f"Report {item_id} {self._text(rng, 4)}",
+            "title_prefix": "VOC",
+            "created": (EPOCH + timedelta(hours=item_id)).isoformat(),
+            "completed": rng.random() < 0.5,
+            "report_item_type_id": 1 + item_id % 20,
+            "attributes": [{"id": n, "value": self._text(rng, 8), "attribute_group_item_id": n} for n in range(8)],
+            "news_item_aggregates": [{"id": 1 + rng.randrange(max(self.news_items, 1))}],
+        }
+
+    def products(self):
+        return {"total_count": 25, "items": [
+            {"id": i, "title": f"Product {i}", "description": f"Weekly bulletin {i}", "product_type_id": 1 + i % 15,
+             "report_items": [{"id": 1 + (i * 7 + n) % max(self.report_items, 1)} for n in range(3)]}
+            for i in range(1, 26)
+        ]}
+
+
+def make_app(data, latency, jitter):
+    routes = []
+
+    def route(method, pattern):
+        def register(handler):
+            routes.append((method, re.compile(f"^/api/v1{pattern}$"), handler))
+            return handler
+        return register
+
+    @route("POST", "/auth/login")
+    def login(query, body):
+        return 200, {"access_token": _jwt(3600)}
+
+    @route("GET", r"/assess/news-item-aggregates-by-group/(?P<group>[^/]+)")
+    def news_aggregates(query, body, group):
+        offset = int(query.get("offset", 0))
+        limit = min(int(query.get("limit", 20)), 1000)
+        return 200, data.news_page(offset, limit, query.get("sort", "DATE_DESC") == "DATE_DESC")
+
+    @route("GET", "/analyze/report-items")
+    def report_items(query, body):
+        offset, limit = int(query.get("offset", 0)), int(query.get("limit", 50))
+        ids = range(1, data.report_items + 1)[offset:offset + limit]
+        return 200, {"total_count": data.report_items, "items": [data.report_item(i) for i in ids]}
+
+    @route("GET", r"/analyze/report-items/(?P<item_id>\d+)")
+    def report_item(query, body, item_id):
+        item_id = int(item_id)
+        return (200, data.report_item(item_id)) if item_id <= data.report_items else (404, {"error": "Not found"})
+
+    @route("GET", "/publish/products")
+    def products(query, body):
+        return 200, data.products()
+
+    @route("POST", r"/publish/products/(?P<product_id>\d+)/publishers/(?P<preset_id>[^/]+)")
+    def publish(query, body, product_id, preset_id):
+        # Publication : appel plus long que la moyenne
+        gevent.sleep(latency * 3)
+        return 200, {"message": f"Product {product_id} published with {preset_id}"}
+
+    @route("GET", r"/config/(?P<collection>[a-z-]+)")
+    def config_list(query, body, collection):
+        return 200, data.config_list(collection)
+
+    @route("GET", r"/config/(?P<collection>[a-z-]+)/(?P<item_id>\d+)")
+    def config_item(query, body, collection, item_id):
+        return 200, data.config_item(collection, int(item_id))
+
+    def write(query, body, **params):
+        data.version += 1
+        if isinstance(body, dict):
+            body.setdefault("id", int(time.time() * 1000) % 1000000)
+        return 200, body if body is not None else {"message": "ok"}
+
+    def fallback(method, query, body):
+        return (200, {"total_count": 0, "items": []}) if method == "GET" else write(query, body)
+
+    def app(environ, start_response):
+        method, path = environ["REQUEST_METHOD"], environ["PATH_INFO"]
+        query = {key: values[-1] for key, values in parse_qs(environ.get("QUERY_STRING", "")).items()}
+        length = int(environ.get("CONTENT_LENGTH") or 0)
+        raw = environ["wsgi.input"].read(length) if length else b""
+        try:
+            body = json.loads(raw) if raw else None
+        except ValueError:
+            body = None
+
+        if latency or jitter:
+            gevent.sleep(max(latency + random.uniform(-jitter, jitter), 0))
+
+        for route_method, pattern, handler in routes:
+            match = pattern.match(path)
+            if match and route_method == method:
+                status, payload = handler(query, body, **match.groupdict())
+                break
+        else:
+            status, payload = fallback(method, query, body)
+
+        encoded = json.dumps(payload).encode()
+        headers = [("Content-Type", "application/json")]
+        if method == "GET" and status == 200:
+            etag = '"' + hashlib.blake2b(encoded, digest_size=8).hexdigest() + '"'
+            headers.append(("ETag", etag))
+            if environ.get("HTTP_IF_NONE_MATCH") == etag:
+                start_response("304 Not Modified", headers)
+                return [b""]
+        headers.append(("Content-Length", str(len(encoded))))
+        start_response(f"{status} {'OK' if status < 400 else 'Error'}", headers)
+        return [encoded]
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18443)
+    parser.add_argument("--latency", type=float, default=0.02, help="latence moyenne par réponse (s)")
+    parser.add_argument("--jitter", type=float, default=0.01, help="variation aléatoire ± (s)")
+    parser.add_argument("--news-items", type=int, default=50000)
+    parser.add_argument("--report-items", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    data = SyntheticData(args.seed, args.news_items, args.report_items)
+    WSGIServer((args.host, args.port), make_app(data, args.latency, args.jitter), log=None).serve_forever()
+
+
+if __name__ == '__main__':
+    from gevent import monkey
+
+    monkey.patch_all()
+    main()
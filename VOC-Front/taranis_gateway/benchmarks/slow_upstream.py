@@ -0,0 +1,44 @@
+"""Faux Taranis minimal à latence fixe, pour les benchmarks de concurrence.
+
+    python benchmarks/slow_upstream.py --port 18443 --latency 0.5
+"""
+from gevent import monkey
+
+monkey.patch_all()
+
+import argparse
+import base64
+import json
+import time
+
+import gevent
+from gevent.pywsgi import WSGIServer
+
+
+def make_app(latency):
+    claims = base64.urlsafe_b64encode(json.dumps({"exp": time.time() + 3600}).encode()).decode().rstrip("=")
+    login_body = json.dumps({"access_token": f"e30.{claims}.sig"}).encode()
+    items_body = json.dumps({"total_count": 20, "items": [{"id": i, "title": f"CVE-2025-{i:04d}"} for i in range(20)]}).encode()
+
+    def app(environ, start_response):
+        if environ["PATH_INFO"].endswith("/auth/login"):
+            body = login_body
+        else:
+            gevent.sleep(latency)
+            body = items_body
+        start_response("200 OK", [("Content-Type", "application/json"), ("Content-Length", str(len(body)))])
+        return [body]
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=18443)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+    WSGIServer(("127.0.0.1", args.port), make_app(args.latency), log=None).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
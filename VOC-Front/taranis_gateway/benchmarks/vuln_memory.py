@@ -0,0 +1,100 @@
+"""Benchmark : mémoire des vulnérabilités en dicts Python vs VulnerabilityTable.
+
+Des agrégats au format Taranis (news_items / news_item_data / attributes) sont
+générés, puis on mesure avec tracemalloc la mémoire de la liste de dicts
+décodée depuis le JSON et celle de la représentation en colonnes.
+
+    python benchmarks/vuln_memory.py --items 10000
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.vuln_columns import VulnerabilityTable  # noqa: E402
+
+VENDORS = ["microsoft", "apache", "cisco", "oracle", "google", "fortinet", "linux", "vmware", "adobe", "ivanti"]
+
+
+def fake_aggregate(i, rng):
+    cve = f"CVE-2024-{10000 + i}"
+    vendor = rng.choice(VENDORS)
+    published = f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00"
+    return {
+        "id": 100000 + i,
+        "title": f"{cve} - {vendor} {rng.choice(['RCE', 'XSS', 'SQLi', 'LPE', 'DoS'])} vulnerability",
+        "description": "Lorem ipsum dolor sit amet, " * rng.randint(2, 6),
+        "created": published,
+        "read": rng.random() < 0.5,
+        "important": rng.random() < 0.1,
+        "likes": rng.randint(0, 5),
+        "dislikes": 0,
+        "news_items": [{
+            "id": 200000 + i,
+            "news_item_data": {
+                "title": cve,
+                "review": "",
+                "link": f"https://nvd.nist.gov/vuln/detail/{cve}",
+                "published": published,
+                "source": "nvd",
+                "attributes": [
+                    {"key": "cvss_score", "value": str(round(rng.uniform(0, 10), 1))},
+                    {"key": "epss_score", "value": str(round(rng.random(), 5))},
+                    {"key": "epss_percentile", "value": str(round(rng.random(), 5))},
+                    {"key": "is_kev", "value": str(rng.random() < 0.05).lower()},
+                    {"key": "has_poc", "value": str(rng.random() < 0.2).lower()},
+                    {"key": "vendor", "value": vendor},
+                    {"key": "product", "value": f"{vendor}-product-{rng.randint(1, 40)}"},
+                ],
+            },
+        }],
+    }
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    value = build()
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, current, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    raw = json.dumps({"items": [fake_aggregate(i, rng) for i in range(args.items)]})
+
+    items, dict_bytes, _, dict_seconds = measure(lambda: json.loads(raw)["items"])
+    table, table_bytes, table_peak, table_seconds = measure(lambda: VulnerabilityTable(iter(items)))
+    assert table.record(0) == items[0]
+
+    per_10k = 10000 / args.items
+    print(json.dumps({
+        "items": args.items,
+        "dicts": {"bytes": dict_bytes, "mib_per_10k": round(dict_bytes * per_10k / 2 ** 20, 2), "build_s": round(dict_seconds, 3)},
+        "table": {
+            "bytes": table_bytes,
+            "mib_per_10k": round(table_bytes * per_10k / 2 ** 20, 2),
+            "build_peak_bytes": table_peak,
+            "build_s": round(table_seconds, 3),
+        },
+        "ratio": round(dict_bytes / table_bytes, 1) if table_bytes else None,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Configuration gunicorn de la gateway en production.
+
+Tous les réglages viennent de l'environnement (cf. docker-compose.yml) :
+
+    gunicorn -c gunicorn.conf.py app:app
+"""
+import multiprocessing
+import os
+
+
+def _cpu_count():
+    # Nombre de cœurs réellement disponibles pour le conteneur
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return multiprocessing.cpu_count()
+
+
+bind = f"{os.getenv('GATEWAY_HOST', '0.0.0.0')}:{os.getenv('GATEWAY_PORT', '5001')}"
+
+# === Workers ===
+# gthread : N process x M threads ; gevent : N process x des milliers de greenlets
+worker_class = os.getenv("GATEWAY_WORKER_CLASS", "gthread")
+workers = int(os.getenv("GATEWAY_WORKERS", str(_cpu_count() * 2 + 1)))
+threads = int(os.getenv("GATEWAY_THREADS", "8"))
+worker_connections = int(os.getenv("GATEWAY_WORKER_CONNECTIONS", "1000"))
+
+# Charger l'app une fois dans le master, puis forker (démarrage rapide, mémoire partagée)
+preload_app = os.getenv("GATEWAY_PRELOAD", "true").lower() == "true"
+
+# === Recyclage des workers ===
+# Chaque worker est redémarré proprement après N requêtes (jitter pour ne pas tous les recycler ensemble).
+# Les jobs de publication (utils/jobs.py) tournent dans le worker : un recyclage interrompt ceux en
+# cours. Les tâches en attente sont reprises par un autre worker, celles en cours passent en échec.
+# GATEWAY_MAX_REQUESTS=0 désactive le recyclage.
+max_requests = int(os.getenv("GATEWAY_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.getenv("GATEWAY_MAX_REQUESTS_JITTER", "200"))
+# Les appels /api/assess peuvent durer jusqu'à 60 s côté Taranis
+timeout = int(os.getenv("GATEWAY_WORKER_TIMEOUT", "90"))
+graceful_timeout = int(os.getenv("GATEWAY_GRACEFUL_TIMEOUT", "30"))
+
+# === Keep-alive côté clients (navigateur / nginx) ===
+keepalive = int(os.getenv("GATEWAY_KEEPALIVE", "5"))
+
+# === Métriques Prometheus ===
+# Un seul port pour tous les workers : chacun recopie ses métriques dans ce répertoire et le
+# scrape les agrège (utils/metrics.py). Défini avant le preload, vidé au démarrage du master.
+os.environ.setdefault("METRICS_MULTIPROC_DIR", "/tmp/gateway-metrics")
+
+
+def on_starting(server):
+    directory = os.environ["METRICS_MULTIPROC_DIR"]
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        if name.startswith("worker-"):
+            os.remove(os.path.join(directory, name))
+
+
+accesslog = os.getenv("GATEWAY_ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.getenv("GATEWAY_LOG_LEVEL", "info")
+
+if worker_class == "gevent":
+    # Le patch doit précéder le chargement de l'app (preload) pour que les
+    # sockets et verrous créés à l'import soient coopératifs
+    from gevent import monkey
+
+    monkey.patch_all()
+    os.environ.setdefault("UPSTREAM_POOL_MAXSIZE", "256")
+else:
+    # Un worker gthread ouvre au plus `threads` connexions simultanées vers Taranis
+    os.environ.setdefault("UPSTREAM_POOL_MAXSIZE", str(max(threads, 10)))
@@ -9,6 +9,10 @@ from .bots_routes import automation_bp
 from routes.access_control_routes import access_control_bp
 from routes.assess_routes import assess_bp
 from routes.publisher_routes import publish_bp  
+from routes.gateway_routes import gateway_bp
+from utils.catalog import catalog_refresher
+from utils.jobs import job_queue
+from utils.news_sync import news_sync
 def register_routes(app):
     app.register_blueprint(auth_bp, url_prefix='/api')
     app.register_blueprint(analyze_bp, url_prefix='/api')
@@ -21,3 +25,10 @@ def register_routes(app):
     app.register_blueprint(access_control_bp, url_prefix='/api')
     app.register_blueprint(assess_bp)
     app.register_blueprint(publish_bp, url_prefix="/api")
+    app.register_blueprint(gateway_bp, url_prefix="/api")
+    # Rafraîchissement du catalogue en tâche de fond (si CATALOG_REFRESH_INTERVAL > 0)
+    app.before_request(catalog_refresher.ensure_started)
+    # Synchronisation incrémentale des groupes de news items (NEWS_SYNC_GROUPS)
+    app.before_request(news_sync.ensure_started)
+    # Pool de jobs démarré avec le worker : reprise des jobs laissés par un worker arrêté
+    app.before_request(job_queue.ensure_started)
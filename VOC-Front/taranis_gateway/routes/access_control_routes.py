@@ -1,5 +1,8 @@
 from flask import Blueprint, jsonify, request
-import requests
+from utils.taranis_auth import taranis_request
+from utils.catalog import users_catalog, response_version
+from utils.bulk import InvalidBulk, bulk_status, parse_bulk, run_bulk
+from utils.list_query import LIST_FILTERS, InvalidListQuery, parse_list_query, proxy_list
 import os
 import urllib3
 
@@ -11,67 +14,36 @@ access_control_bp = Blueprint('access_control', __name__)
 
 # Env config
 TARANIS_URL = os.getenv("TARANIS_BASE_URL", "https://192.168.100.44:4443")
-TARANIS_USERNAME = "admin"
-TARANIS_PASSWORD = "admin"
 
-def get_api_token():
-    login_url = f"{TARANIS_URL}/api/v1/auth/login"
-    payload = {"username": TARANIS_USERNAME, "password": TARANIS_PASSWORD}
-    try:
-        response = requests.post(login_url, json=payload, verify=False)
-        response.raise_for_status()
-        return response.json().get("access_token")
-    except Exception as e:
-        print(f"❌ Erreur login : {e}")
-        return None
 
-def get_auth_headers():
-    token = get_api_token()
-    return {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
+### USERS
 
+# Vue simplifiée par défaut de la liste (?fields=* pour les users complets)
+USERS_LIST_FIELDS = "id,username,name,roles:roles[].name,organizations:organizations[].name,tag"
+USERS_LIST_FILTERS = LIST_FILTERS + ("username", "roles.name", "organizations.name")
 
-### USERS
 
 @access_control_bp.route('/access-control/users', methods=['GET'])
 def get_users():
-    headers = get_auth_headers()
     try:
-        res = requests.get(f"{TARANIS_URL}/api/v1/config/users", headers=headers, verify=False)
+        query = parse_list_query(request.args, default_fields=USERS_LIST_FIELDS, filters=USERS_LIST_FILTERS)
+    except InvalidListQuery as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        res = taranis_request("GET", f"{TARANIS_URL}/api/v1/config/users")
         data = res.json()
-
-        simplified_items = [
-            {
-                "id": user.get("id"),
-                "username": user.get("username"),
-                "name": user.get("name"),
-                "roles": [role.get("name") for role in user.get("roles", [])],
-                "organizations": [org.get("name") for org in user.get("organizations", [])],
-                "tag": user.get("tag")
-            }
-            for user in data.get("items", [])
-        ]
-
-        return jsonify({
-            "total_count": data.get("total_count", 0),
-            "items": simplified_items
-        }), res.status_code
+        if res.status_code == 200:
+            users_catalog.load(data, response_version(res))
+            data = query.apply(data)
+        return jsonify(data), res.status_code
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @access_control_bp.route('/access-control/users/<int:user_id>', methods=['GET'])
 def get_user_by_id(user_id):
-    headers = get_auth_headers()
     try:
-        # Récupérer tous les users
-        res = requests.get(f"{TARANIS_URL}/api/v1/config/users", headers=headers, verify=False)
-        data = res.json()
-        users = data.get("items", [])
-
-        # Chercher le user avec l'id correspondant
-        user = next((u for u in users if u.get("id") == user_id), None)
+        # Lookup par id dans le catalogue local des users
+        user = users_catalog.get(user_id)
 
         if not user:
             return jsonify({"error": "User not found"}), 404
@@ -85,42 +57,53 @@ def get_user_by_id(user_id):
 
 @access_control_bp.route('/access-control/users', methods=['POST'])
 def create_user():
-    headers = get_auth_headers()
     try:
         payload = request.json
-        res = requests.post(f"{TARANIS_URL}/api/v1/config/users", headers=headers, json=payload, verify=False)
+        res = taranis_request("POST", f"{TARANIS_URL}/api/v1/config/users", json=payload)
+        users_catalog.record_created(res)
         return jsonify(res.json()), res.status_code
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @access_control_bp.route('/access-control/users/<int:user_id>', methods=['PUT'])
 def update_user(user_id):
-    headers = get_auth_headers()
     try:
         payload = request.json
-        res = requests.put(f"{TARANIS_URL}/api/v1/config/users/{user_id}", headers=headers, json=payload, verify=False)
+        res = taranis_request("PUT", f"{TARANIS_URL}/api/v1/config/users/{user_id}", json=payload)
+        users_catalog.record_updated(res)
         return jsonify(res.json()), res.status_code
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @access_control_bp.route('/access-control/users/<int:user_id>', methods=['DELETE'])
 def delete_user(user_id):
-    headers = get_auth_headers()
     try:
-        res = requests.delete(f"{TARANIS_URL}/api/v1/config/users/{user_id}", headers=headers, verify=False)
+        res = taranis_request("DELETE", f"{TARANIS_URL}/api/v1/config/users/{user_id}")
+        users_catalog.record_deleted(user_id, res)
         return jsonify(res.json()), res.status_code
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@access_control_bp.route('/access-control/users/bulk', methods=['POST'])
+def bulk_users():
+    try:
+        operations = parse_bulk(request.get_json(silent=True))
+    except InvalidBulk as e:
+        return jsonify({"error": str(e)}), 400
+    summary = run_bulk(users_catalog, operations)
+    return jsonify(summary), bulk_status(summary)
+
 
 ### ORGANIZATIONS
 
 @access_control_bp.route('/access-control/organizations', methods=['GET'])
 def get_organizations():
-    headers = get_auth_headers()
     try:
-        res = requests.get(f"{TARANIS_URL}/api/v1/config/organizations", headers=headers, verify=False)
-        return jsonify(res.json()), res.status_code
+        query = parse_list_query(request.args)
+    except InvalidListQuery as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        return proxy_list(f"{TARANIS_URL}/api/v1/config/organizations", query)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -128,10 +111,12 @@ def get_organizations():
 
 @access_control_bp.route('/access-control/roles', methods=['GET'])
 def get_roles():
-    headers = get_auth_headers()
     try:
-        res = requests.get(f"{TARANIS_URL}/api/v1/config/roles", headers=headers, verify=False)
-        return jsonify(res.json()), res.status_code
+        query = parse_list_query(request.args)
+    except InvalidListQuery as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        return proxy_list(f"{TARANIS_URL}/api/v1/config/roles", query)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -139,9 +124,11 @@ def get_roles():
 
 @access_control_bp.route('/access-control/acls', methods=['GET'])
 def get_acls():
-    headers = get_auth_headers()
     try:
-        res = requests.get(f"{TARANIS_URL}/api/v1/config/acls", headers=headers, verify=False)
-        return jsonify(res.json()), res.status_code
+        query = parse_list_query(request.args)
+    except InvalidListQuery as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        return proxy_list(f"{TARANIS_URL}/api/v1/config/acls", query)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -1,5 +1,10 @@
 from flask import Blueprint, request, jsonify
-import requests
+from utils.taranis_auth import taranis_request
+from utils.passthrough import proxy_get
+from utils.news_sync import news_sync
+from utils.search_index import search_indexes
+from utils.streaming import iter_upstream_items, requested_stream_format, stream_items
+from utils.list_query import LIST_FILTERS, InvalidListQuery, parse_list_query, proxy_list
 import os
 import urllib3
 
@@ -10,73 +15,55 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 # === Configuration ===
 TARANIS_URL = os.getenv("TARANIS_BASE_URL", "https://192.168.100.44:4443")
 TARANIS_API = f"{TARANIS_URL}/api/v1"
-TARANIS_USERNAME = "admin"
-TARANIS_PASSWORD = "admin"
 
-# === Auth automatique ===
-def get_api_token():
-    login_url = f"{TARANIS_API}/auth/login"
-    payload = {"username": TARANIS_USERNAME, "password": TARANIS_PASSWORD}
-    try:
-        response = requests.post(login_url, json=payload, verify=False)
-        response.raise_for_status()
-        return response.json().get("access_token")
-    except Exception as e:
-        print(f"❌ Erreur login : {e}")
-        return None
-
-def get_auth_headers():
-    token = get_api_token()
-    return {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
 
 # === ROUTES ===
 
 # 1. Liste des report items
 @analyze_bp.route('/analyze/report-items', methods=['GET'])
 def get_report_items():
-    r = requests.get(f"{TARANIS_API}/analyze/report-items", headers=get_auth_headers(), verify=False)
-    return jsonify(r.json()), r.status_code
+    try:
+        query = parse_list_query(request.args, filters=LIST_FILTERS + ("completed", "report_item_type_id"))
+    except InvalidListQuery as e:
+        return jsonify({"error": str(e)}), 400
+    return proxy_list(f"{TARANIS_API}/analyze/report-items", query)
 
 # 2. Détail d’un report item
 @analyze_bp.route('/analyze/report-items/<int:item_id>', methods=['GET'])
 def get_report_item_detail(item_id):
-    r = requests.get(f"{TARANIS_API}/analyze/report-items/{item_id}", headers=get_auth_headers(), verify=False)
-    return jsonify(r.json()), r.status_code
+    return proxy_get(f"{TARANIS_API}/analyze/report-items/{item_id}")
 
 # 3. Liste des types de report items
 @analyze_bp.route('/analyze/report-item-types', methods=['GET'])
 def get_report_item_types():
-    r = requests.get(f"{TARANIS_API}/analyze/report-item-types", headers=get_auth_headers(), verify=False)
-    return jsonify(r.json()), r.status_code
+    try:
+        query = parse_list_query(request.args)
+    except InvalidListQuery as e:
+        return jsonify({"error": str(e)}), 400
+    return proxy_list(f"{TARANIS_API}/analyze/report-item-types", query)
 
 # 4. Création d’un nouveau report item
 @analyze_bp.route('/analyze/report-items', methods=['POST'])
 def create_report_item():
     payload = request.get_json()
-    r = requests.post(f"{TARANIS_API}/analyze/report-items", headers=get_auth_headers(), json=payload, verify=False)
+    r = taranis_request("POST", f"{TARANIS_API}/analyze/report-items", json=payload)
     return jsonify(r.json()), r.status_code
 
 # 4.bis. Mise à jour d’un report item existant
 @analyze_bp.route('/analyze/report-items/<int:item_id>', methods=['PUT'])
 def update_report_item(item_id):
     payload = request.get_json()
-    headers = get_auth_headers()
-    r = requests.put(
+    r = taranis_request(
+        "PUT",
         f"{TARANIS_API}/analyze/report-items/{item_id}",
-        headers=headers,  # ✅ utilise la variable déjà définie
-        json=payload,
-        verify=False
+        json=payload
     )
     return jsonify(r.json()), r.status_code
 @analyze_bp.route('/analyze/report-items/<int:item_id>/field-locks/<field>/unlock', methods=['PUT'])
 def unlock_field(item_id, field):
-    r = requests.put(
-        f"{TARANIS_API}/analyze/report-items/{item_id}/field-locks/{field}/unlock",
-        headers=get_auth_headers(),
-        verify=False
+    r = taranis_request(
+        "PUT",
+        f"{TARANIS_API}/analyze/report-items/{item_id}/field-locks/{field}/unlock"
     )
     return jsonify({"message": f"Field '{field}' unlocked."}), r.status_code
 
@@ -84,14 +71,30 @@ def unlock_field(item_id, field):
 # 6. Suppression d’un report item par ID
 @analyze_bp.route('/analyze/report-items/<int:item_id>', methods=['DELETE'])
 def delete_report_item(item_id):
-    r = requests.delete(
-        f"{TARANIS_API}/analyze/report-items/{item_id}",
-        headers=get_auth_headers(),
-        verify=False
+    r = taranis_request(
+        "DELETE",
+        f"{TARANIS_API}/analyze/report-items/{item_id}"
     )
     return jsonify({"message": "Report item deleted successfully"}), r.status_code
 
 
+# Filtres que l'index local ne sait pas appliquer : leur valeur par défaut uniquement
+LOCAL_SEARCH_DEFAULTS = {"read": "false", "important": "false", "relevant": "false", "in_analyze": "false", "range": "ALL"}
+
+
+def _search_locally(group_id, params):
+    """Index de recherche du groupe s'il peut répondre à la place de Taranis, sinon None.
+
+    Seuls les groupes synchronisés (NEWS_SYNC_ENABLED=true) ont un index.
+    """
+    index = search_indexes.get(group_id)
+    if not params["search"].strip() or index is None or not index.ready:
+        return None
+    if any(str(params[name]).lower() != value.lower() for name, value in LOCAL_SEARCH_DEFAULTS.items()):
+        return None
+    return index
+
+
 # 5. News items d’un groupe
 @analyze_bp.route('/assess/news-item-aggregates-by-group/<group_id>', methods=['GET'])
 def get_news_item_aggregates(group_id):
@@ -106,10 +109,43 @@ def get_news_item_aggregates(group_id):
         "offset": request.args.get("offset", 0),
         "limit": request.args.get("limit", 20)
     }
-    r = requests.get(
+    # 🔎 Recherche servie par l'index inversé de la gateway (classée par pertinence)
+    index = _search_locally(group_id, params)
+    if index is not None:
+        try:
+            offset, limit = int(params["offset"]), int(params["limit"])
+        except ValueError:
+            return jsonify({"error": "offset et limit doivent être des entiers"}), 400
+        total, items = index.page(params["search"], max(offset, 0), max(limit, 1))
+        response = jsonify({"total_count": total, "items": items})
+        response.headers["X-Search-Source"] = "gateway"
+        return response, 200
+
+    # ?stream=ndjson|json : items relayés un par un au lieu de charger toute la réponse
+    stream_format = requested_stream_format()
+    r = taranis_request(
+        "GET",
         f"{TARANIS_API}/assess/news-item-aggregates-by-group/{group_id}",
-        headers=get_auth_headers(),
         params=params,
-        verify=False
+        stream=bool(stream_format)
     )
+    if stream_format and r.status_code == 200:
+        meta = {}
+        return stream_items(iter_upstream_items(r, meta=meta), stream_format, meta)
     return jsonify(r.json()), r.status_code
+
+
+# 7. Flux de changements d'un groupe synchronisé en local (?since=<version>&epoch=<epoch>, tous deux
+# repris de la réponse précédente ; sans epoch ou avec celui d'une autre copie : liste complète)
+@analyze_bp.route('/assess/news-item-aggregates-by-group/<group_id>/changes', methods=['GET'])
+def get_news_item_aggregate_changes(group_id):
+    mirror = news_sync.mirror(group_id)
+    if mirror is None:
+        return jsonify({"error": f"Group {group_id} is not synchronized by the gateway"}), 404
+    if not mirror.ready:
+        return jsonify({"error": "Initial synchronization in progress"}), 503
+    try:
+        since = int(request.args.get("since", 0))
+    except ValueError:
+        return jsonify({"error": "since must be an integer version"}), 400
+    return jsonify(mirror.changes_since(since, epoch=request.args.get("epoch", ""))), 200
@@ -1,10 +1,16 @@
 # routes/assess_routes.py
 
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 import requests
 import os
+import time
 import logging
-from routes.access_control_routes import get_auth_headers
+from utils.taranis_auth import get_taranis_token, taranis_request
+from utils.pagination import InvalidCursor, decode_cursor, encode_cursor, parse_limit
+from utils.streaming import iter_upstream_items, requested_stream_format, stream_items
+from utils.vulnerabilities import GROUP_ID_VULNERABILITIES, vulnerability_snapshots
+from utils.vuln_stats import snapshot_dashboard
+from utils.vuln_query import InvalidQuery, parse_query, query_signature, snapshot_index
 
 # Init blueprint
 assess_bp = Blueprint("assess", __name__)
@@ -14,24 +20,206 @@ requests.packages.urllib3.disable_warnings()
 
 # Env
 TARANIS_URL = os.getenv("TARANIS_BASE_URL", "https://192.168.100.44:4443")
-GROUP_ID_VULNERABILITIES = "8f63a699-23e1-4568-ad4b-4f495ba24d85"
+
+# Pagination
+ASSESS_PAGE_SIZE = int(os.getenv("ASSESS_PAGE_SIZE", "500"))
+ASSESS_MAX_PAGE_SIZE = int(os.getenv("ASSESS_MAX_PAGE_SIZE", "5000"))
+ASSESS_TOTAL_TTL = float(os.getenv("ASSESS_TOTAL_TTL", "60"))
+# DATE_ASC par défaut : les nouveaux items arrivent en fin de liste, les offsets
+# des pages déjà lues ne bougent pas pendant un parcours
+ASSESS_SORTS = ("DATE_ASC", "DATE_DESC")
+ASSESS_DEFAULT_SORT = "DATE_ASC"
+# Taille des pages Taranis enchaînées en mode streaming (?stream=ndjson|json)
+ASSESS_STREAM_PAGE_SIZE = int(os.getenv("ASSESS_STREAM_PAGE_SIZE", "1000"))
+
+# Total du groupe, mis à jour gratuitement par chaque page (total_count de Taranis)
+_total_cache = {"value": None, "at": 0.0}
+
+
+def _cached_total():
+    if _total_cache["value"] is not None and time.time() - _total_cache["at"] < ASSESS_TOTAL_TTL:
+        return _total_cache["value"]
+    return None
+
+
+def _open_vulnerability_page(offset, sort, limit):
+    url = f"{TARANIS_URL}/api/v1/assess/news-item-aggregates-by-group/{GROUP_ID_VULNERABILITIES}"
+    params = {"range": "ALL", "sort": sort, "offset": offset, "limit": limit}
+    resp = taranis_request("GET", url, params=params, stream=True)
+    if resp.status_code != 200:
+        resp.close()
+    resp.raise_for_status()
+    return resp
+
+
+def _stream_vulnerabilities(first_page, offset, sort, limit, meta):
+    """Items à partir de `offset`, page Taranis après page Taranis (limit=None : jusqu'à la fin).
+
+    Une seule page est ouverte à la fois et un seul item est décodé à la fois.
+    """
+    resp, remaining = first_page, limit
+    while True:
+        page_size = ASSESS_STREAM_PAGE_SIZE if remaining is None else min(remaining, ASSESS_STREAM_PAGE_SIZE)
+        upstream_meta, count = {}, 0
+        for item in iter_upstream_items(resp, meta=upstream_meta):
+            count += 1
+            yield item
+        if upstream_meta.get("total_count") is not None:
+            _total_cache.update(value=upstream_meta["total_count"], at=time.time())
+            meta["total"] = upstream_meta["total_count"]
+        offset += count
+        if remaining is not None:
+            remaining -= count
+        if count < page_size or remaining == 0:
+            return
+        try:
+            next_size = ASSESS_STREAM_PAGE_SIZE if remaining is None else min(remaining, ASSESS_STREAM_PAGE_SIZE)
+            resp = _open_vulnerability_page(offset, sort, next_size)
+        except Exception as e:
+            # Les en-têtes sont déjà partis : le flux est coupé, le client voit une réponse incomplète
+            logging.error(f"❌ Streaming vulnérabilités interrompu à l'offset {offset} : {e}")
+            raise
+
 
 @assess_bp.route("/api/assess/vulnerabilities", methods=["GET"])
 def get_vulnerability_assess_items():
-    headers = get_auth_headers()
-    if not headers:
+    """Page de vulnérabilités : ?limit=&cursor= (ou ?offset=&sort= pour la première page)."""
+    try:
+        if request.args.get("cursor"):
+            state = decode_cursor(request.args["cursor"])
+            offset, sort = int(state["offset"]), state["sort"]
+        else:
+            offset, sort = int(request.args.get("offset", 0)), request.args.get("sort", ASSESS_DEFAULT_SORT)
+    except (InvalidCursor, KeyError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    if sort not in ASSESS_SORTS or offset < 0:
+        return jsonify({"error": f"sort doit valoir {' ou '.join(ASSESS_SORTS)}, offset >= 0"}), 400
+
+    if not get_taranis_token():
         return jsonify({"error": "Échec d'authentification sur Taranis"}), 401
 
+    stream_format = requested_stream_format()
+    if stream_format:
+        return _stream_vulnerability_response(stream_format, offset, sort)
+
+    limit = parse_limit(request.args.get("limit"), ASSESS_PAGE_SIZE, ASSESS_MAX_PAGE_SIZE)
+
     try:
         url = f"{TARANIS_URL}/api/v1/assess/news-item-aggregates-by-group/{GROUP_ID_VULNERABILITIES}"
         params = {
-            "limit": 50000,     # Très large limite
-            "range": "ALL"
+            "range": "ALL",
+            "sort": sort,
+            "offset": offset,
+            "limit": limit
         }
-        resp = requests.get(url, headers=headers, params=params, verify=False, timeout=60)
+        resp = taranis_request("GET", url, params=params)
         resp.raise_for_status()
-        items = resp.json().get("items", [])
-        return jsonify({"total": len(items), "items": items}), 200
+        data = resp.json()
+        items = data.get("items", [])
     except Exception as e:
-        logging.error(f"❌ Erreur récupération massive : {e}")
+        logging.error(f"❌ Erreur récupération page vulnérabilités : {e}")
         return jsonify({"error": "Erreur lors de la récupération des items"}), 500
+
+    if data.get("total_count") is not None:
+        _total_cache.update(value=data["total_count"], at=time.time())
+    total = _cached_total()
+
+    # Page pleine : il reste (peut-être) des items après
+    has_more = len(items) == limit and (total is None or offset + limit < total)
+    return jsonify({
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "sort": sort,
+        "items": items,
+        "next_cursor": encode_cursor(offset=offset + len(items), sort=sort) if has_more else None
+    }), 200
+
+
+def _stream_vulnerability_response(stream_format, offset, sort):
+    """Mode streaming : tout le groupe (ou ?limit= items) sans plafond de taille de page."""
+    try:
+        limit = int(request.args["limit"]) if request.args.get("limit") else None
+    except ValueError:
+        return jsonify({"error": "limit doit être un entier"}), 400
+    if limit is not None and limit <= 0:
+        return jsonify({"error": "limit doit être > 0"}), 400
+
+    first_size = ASSESS_STREAM_PAGE_SIZE if limit is None else min(limit, ASSESS_STREAM_PAGE_SIZE)
+    try:
+        # La première page est ouverte avant d'envoyer les en-têtes, pour pouvoir encore répondre une erreur
+        first_page = _open_vulnerability_page(offset, sort, first_size)
+    except Exception as e:
+        logging.error(f"❌ Erreur ouverture du flux vulnérabilités : {e}")
+        return jsonify({"error": "Erreur lors de la récupération des items"}), 500
+
+    meta = {"total": _cached_total(), "offset": offset, "sort": sort}
+    return stream_items(_stream_vulnerabilities(first_page, offset, sort, limit, meta), stream_format, meta)
+
+
+@assess_bp.route("/api/assess/vulnerabilities/dashboard", methods=["GET"])
+def get_vulnerability_dashboard():
+    """Agrégats du dashboard VI (distribution CVSS, critiques, exploits, EPSS) déjà calculés."""
+    try:
+        snapshot = vulnerability_snapshots.current()
+        dashboard = snapshot_dashboard(snapshot)
+    except Exception as e:
+        logging.error(f"❌ Erreur calcul dashboard vulnérabilités : {e}")
+        return jsonify({"error": "Erreur lors du calcul des agrégats"}), 500
+
+    return jsonify({
+        "snapshot_version": snapshot.version,
+        "snapshot_at": snapshot.loaded_at,
+        **dashboard
+    }), 200
+
+
+@assess_bp.route("/api/assess/vulnerabilities/query", methods=["GET"])
+def query_vulnerabilities():
+    """Une page de vulnérabilités filtrée et triée par la gateway.
+
+    Filtres : cvss_min/max, epss_min/max, is_kev, has_poc, date_from/date_to
+    (sur date_field), vendor, product, severity (listes séparées par des
+    virgules), q (CVE ou titre), view (critical, high-risk, with-exploit, recent).
+    Tri : ?sort=cvss_score, -published, ... ; pagination ?limit=&cursor=.
+    Le curseur porte la clé (valeur de tri, id) de la dernière ligne servie : la
+    page suivante ne saute ni ne répète de ligne si le snapshot est rechargé ou
+    si elle est servie par un autre worker.
+    """
+    started = time.perf_counter()
+    try:
+        query = parse_query(request.args)
+        signature = query_signature(query)
+        after = None
+        if request.args.get("cursor"):
+            state = decode_cursor(request.args["cursor"])
+            if state.get("q") != signature:
+                raise InvalidCursor("Curseur issu d'une autre requête")
+            after = state["after"]
+            if not isinstance(after, list) or len(after) != 2:
+                raise InvalidCursor("Curseur invalide")
+    except (InvalidQuery, InvalidCursor, KeyError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    limit = parse_limit(request.args.get("limit"), ASSESS_PAGE_SIZE, ASSESS_MAX_PAGE_SIZE)
+    full = request.args.get("full", "false").lower() == "true"
+
+    try:
+        snapshot = vulnerability_snapshots.current()
+        index = snapshot_index(snapshot)
+        total, rows, has_more = index.search(query, limit, after)
+        table = snapshot.table
+        # Par défaut les champs VOC uniquement ; ?full=true reconstruit les agrégats Taranis
+        items = list(table.records(rows)) if full else [table.row(i) for i in rows]
+    except Exception as e:
+        logging.error(f"❌ Erreur requête vulnérabilités : {e}")
+        return jsonify({"error": "Erreur lors de la recherche des vulnérabilités"}), 500
+
+    return jsonify({
+        "snapshot_version": snapshot.version,
+        "total": total,
+        "limit": limit,
+        "sort": query["sort"],
+        "items": items,
+        "next_cursor": encode_cursor(after=index.cursor_key(query["sort"], rows[-1]), q=signature) if has_more else None,
+        "took_ms": round((time.perf_counter() - started) * 1000, 2)
+    }), 200
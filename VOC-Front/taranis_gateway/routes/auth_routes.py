@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
-import requests, os
+import os
+from utils.upstream import upstream
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -8,5 +9,5 @@ API_KEY = os.getenv("TARANIS_API_KEY")
 
 @auth_bp.route('/auth/login', methods=['POST'])
 def login():
-    response = requests.post(f"{TARANIS_API}/auth/login", json=request.json, verify=False)
+    response = upstream.post(f"{TARANIS_API}/auth/login", json=request.json)
     return jsonify(response.json()), response.status_code
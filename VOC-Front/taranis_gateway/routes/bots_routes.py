@@ -1,5 +1,8 @@
 from flask import Blueprint, jsonify, request
-import requests
+from utils.taranis_auth import taranis_request
+from utils.catalog import bots_presets_catalog, response_version
+from utils.bulk import InvalidBulk, bulk_status, parse_bulk, run_bulk
+from utils.list_query import InvalidListQuery, parse_list_query, proxy_list
 import os
 import urllib3
 import uuid
@@ -7,50 +10,21 @@ automation_bp = Blueprint('automation', __name__)
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 TARANIS_URL = os.getenv("TARANIS_BASE_URL", "https://192.168.100.44:4443")
-TARANIS_USERNAME = "admin"
-TARANIS_PASSWORD = "admin"
 
-def get_api_token():
-    login_url = f"{TARANIS_URL}/api/v1/auth/login"
-    payload = {"username": TARANIS_USERNAME, "password": TARANIS_PASSWORD}
-    try:
-        response = requests.post(login_url, json=payload, verify=False)
-        response.raise_for_status()
-        return response.json().get("access_token")
-    except Exception as e:
-        print(f"❌ Erreur login : {e}")
-        return None
-
-def get_auth_headers():
-    token = get_api_token()
-    return {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
 
 # 🔍 GET Bots Nodes (filtré pour la liste principale)
 @automation_bp.route('/bots-nodes', methods=['GET'])
 def get_bots_nodes():
-    headers = get_auth_headers()
     try:
-        res = requests.get(f"{TARANIS_URL}/api/v1/config/bots-nodes", headers=headers, verify=False)
-        full_data = res.json()
-
-        simplified_items = [
-            {
-                "id": item.get("id"),
-                "title": item.get("title"),
-                "description": item.get("description"),
-                "url": item.get("api_url"),
-                "tag": item.get("tag")
-            }
-            for item in full_data.get("items", [])
-        ]
-
-        return jsonify({
-            "total_count": full_data.get("total_count", 0),
-            "items": simplified_items
-        }), res.status_code
+        query = parse_list_query(request.args, default_fields="id,title,description,url:api_url,tag")
+    except InvalidListQuery as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        res = taranis_request("GET", f"{TARANIS_URL}/api/v1/config/bots-nodes")
+        data = res.json()
+        if res.status_code == 200:
+            data = query.apply(data)
+        return jsonify(data), res.status_code
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -58,34 +32,37 @@ def get_bots_nodes():
 # 🔍 GET Bots Nodes Details (full pour le formulaire d'ajout bot preset)
 @automation_bp.route('/bots-nodes-full', methods=['GET'])
 def get_bots_nodes_full():
-    headers = get_auth_headers()
     try:
-        res = requests.get(f"{TARANIS_URL}/api/v1/config/bots-nodes", headers=headers, verify=False)
-        return jsonify(res.json()), res.status_code
+        query = parse_list_query(request.args)
+    except InvalidListQuery as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        return proxy_list(f"{TARANIS_URL}/api/v1/config/bots-nodes", query)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 # 🔍 GET Bots Presets (liste simple)
 @automation_bp.route('/bots-presets', methods=['GET'])
 def get_bots_presets():
-    headers = get_auth_headers()
     try:
-        res = requests.get(f"{TARANIS_URL}/api/v1/config/bots-presets", headers=headers, verify=False)
-        return jsonify(res.json()), res.status_code
+        query = parse_list_query(request.args)
+    except InvalidListQuery as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        res = taranis_request("GET", f"{TARANIS_URL}/api/v1/config/bots-presets")
+        data = res.json()
+        if res.status_code == 200:
+            bots_presets_catalog.load(data, response_version(res))
+            data = query.apply(data)
+        return jsonify(data), res.status_code
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 # 🔍 GET Bots Preset by ID
 @automation_bp.route('/bots-presets/<preset_id>', methods=['GET'])
 def get_bot_preset_by_id(preset_id):
-    headers = get_auth_headers()
     try:
-        res = requests.get(f"{TARANIS_URL}/api/v1/config/bots-presets", headers=headers, verify=False)
-        if res.status_code != 200:
-            return jsonify({"error": f"Taranis response: {res.status_code}"}), res.status_code
-        
-        all_items = res.json().get("items", [])
-        preset = next((item for item in all_items if item["id"] == preset_id), None)
+        preset = bots_presets_catalog.get(preset_id)
         if preset:
             return jsonify(preset), 200
         else:
@@ -96,12 +73,12 @@ def get_bot_preset_by_id(preset_id):
 # ➕ POST Bots Preset
 @automation_bp.route('/bots-presets', methods=['POST'])
 def create_bot_preset():
-    headers = get_auth_headers()
     data = request.json
     data["id"] = str(uuid.uuid4())  # Ajout UUID manuellement
 
     try:
-        res = requests.post(f"{TARANIS_URL}/api/v1/config/bots-presets", json=data, headers=headers, verify=False)
+        res = taranis_request("POST", f"{TARANIS_URL}/api/v1/config/bots-presets", json=data)
+        bots_presets_catalog.record_created(res)
         return jsonify(res.json()), res.status_code
     except Exception as e:
         return jsonify({"error": f"Erreur POST bots preset: {str(e)}"}), 500
@@ -109,22 +86,39 @@ def create_bot_preset():
 # ✏️ PUT Bots Preset
 @automation_bp.route('/bots-presets/<preset_id>', methods=['PUT'])
 def update_bot_preset(preset_id):
-    headers = get_auth_headers()
     data = request.json
     data["id"] = preset_id  # Assure-toi que l’ID est bien conservé
 
     try:
-        res = requests.put(f"{TARANIS_URL}/api/v1/config/bots-presets/{preset_id}", json=data, headers=headers, verify=False)
+        res = taranis_request("PUT", f"{TARANIS_URL}/api/v1/config/bots-presets/{preset_id}", json=data)
+        bots_presets_catalog.record_updated(res)
         return jsonify(res.json()), res.status_code
     except Exception as e:
         return jsonify({"error": f"Erreur PUT bots preset: {str(e)}"}), 500
 
+def _prepare_bot_preset(op, data):
+    # Taranis attend l'id dans le corps : UUID généré à la création, conservé à la mise à jour
+    if op == "create":
+        data["id"] = str(uuid.uuid4())
+    return data
+
+
+# 📦 Bulk Bots Presets : {"create": [...], "update": [{"id", ...}], "delete": [ids]}
+@automation_bp.route('/bots-presets/bulk', methods=['POST'])
+def bulk_bot_presets():
+    try:
+        operations = parse_bulk(request.get_json(silent=True))
+    except InvalidBulk as e:
+        return jsonify({"error": str(e)}), 400
+    summary = run_bulk(bots_presets_catalog, operations, prepare=_prepare_bot_preset)
+    return jsonify(summary), bulk_status(summary)
+
 # ❌ DELETE Bots Preset
 @automation_bp.route('/bots-presets/<preset_id>', methods=['DELETE'])
 def delete_bot_preset(preset_id):
-    headers = get_auth_headers()
     try:
-        res = requests.delete(f"{TARANIS_URL}/api/v1/config/bots-presets/{preset_id}", headers=headers, verify=False)
+        res = taranis_request("DELETE", f"{TARANIS_URL}/api/v1/config/bots-presets/{preset_id}")
+        bots_presets_catalog.record_deleted(preset_id, res)
         return jsonify({"deleted": preset_id}), res.status_code
     except Exception as e:
         return jsonify({"error": f"Erreur DELETE bots preset: {str(e)}"}), 500
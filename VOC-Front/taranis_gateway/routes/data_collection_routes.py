@@ -1,5 +1,9 @@
 from flask import Blueprint, jsonify, request
-import requests
+from utils.taranis_auth import taranis_request
+from utils.catalog import osint_sources_catalog, osint_source_groups_catalog, word_lists_catalog, response_version
+from utils.fanout import fan_out
+from utils.bulk import InvalidBulk, bulk_status, parse_bulk, run_bulk
+from utils.list_query import LIST_FILTERS, InvalidListQuery, parse_list_query
 import os
 import urllib3
 
@@ -7,37 +11,12 @@ data_collection = Blueprint('data_collection', __name__)
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 TARANIS_URL = os.getenv("TARANIS_BASE_URL", "https://192.168.100.44:4443")
-TARANIS_USERNAME = "admin"
-TARANIS_PASSWORD = "admin"
-
-# 🔐 Authentification et récupération du token
-def get_api_token():
-    login_url = f"{TARANIS_URL}/api/v1/auth/login"
-    payload = {
-        "username": TARANIS_USERNAME,
-        "password": TARANIS_PASSWORD
-    }
-    try:
-        response = requests.post(login_url, json=payload, verify=False)
-        response.raise_for_status()
-        return response.json().get("access_token")
-    except Exception as e:
-        print(f"❌ Erreur login: {e}")
-        return None
 
-# Utilitaire pour construire les headers à chaque appel
-def get_auth_headers():
-    token = get_api_token()
-    return {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
 
 @data_collection.route('/collectors', methods=['GET'])
 def get_collector_nodes():
-    headers = get_auth_headers()
     try:
-        res = requests.get(f"{TARANIS_URL}/api/v1/config/collectors-nodes", headers=headers, verify=False)
+        res = taranis_request("GET", f"{TARANIS_URL}/api/v1/config/collectors-nodes")
 
         print("🔎 [DEBUG] Status code:", res.status_code)
         print("🔎 [DEBUG] Raw response text:", res.text)
@@ -58,50 +37,54 @@ def get_collector_nodes():
 # 2. POST Collector
 @data_collection.route('/collectors', methods=['POST'])
 def add_collector():
-    headers = get_auth_headers()
     data = request.json
-    res = requests.post(f"{TARANIS_URL}/api/v1/collectors", headers=headers, json=data, verify=False)
+    res = taranis_request("POST", f"{TARANIS_URL}/api/v1/collectors", json=data)
     return jsonify(res.json()), res.status_code
 
 # 3. PUT Collector
 @data_collection.route('/collectors/<collector_id>', methods=['PUT'])
 def update_collector(collector_id):
-    headers = get_auth_headers()
     data = request.json
-    res = requests.put(f"{TARANIS_URL}/api/v1/collectors/{collector_id}", headers=headers, json=data, verify=False)
+    res = taranis_request("PUT", f"{TARANIS_URL}/api/v1/collectors/{collector_id}", json=data)
     return jsonify(res.json()), res.status_code
 
 # 4. GET all OSINT Sources
 @data_collection.route('/osint-sources', methods=['GET'])
 def get_osint_sources():
-    headers = get_auth_headers()
-    res = requests.get(f"{TARANIS_URL}/api/v1/config/osint-sources", headers=headers, verify=False)
-    return jsonify(res.json()), res.status_code
-
-
-# 5. GET OSINT Source by ID (filtrage manuel car pas supporté par l'API Taranis)
+    try:
+        query = parse_list_query(request.args, filters=LIST_FILTERS + ("collector.type", "osint_source_groups.id"))
+    except InvalidListQuery as e:
+        return jsonify({"error": str(e)}), 400
+    res = taranis_request("GET", f"{TARANIS_URL}/api/v1/config/osint-sources")
+    data = res.json()
+    if res.status_code == 200:
+        osint_sources_catalog.load(data, response_version(res))
+        data = query.apply(data)
+    return jsonify(data), res.status_code
+
+
+# 5. GET OSINT Source by ID (Taranis ne filtre pas par id : lookup dans le catalogue local)
 @data_collection.route('/osint-sources/<source_id>', methods=['GET'])
 def get_osint_source_by_id(source_id):
-    headers = get_auth_headers()
-
-    # Récupérer toutes les sources
-    res = requests.get(f"{TARANIS_URL}/api/v1/config/osint-sources", headers=headers, verify=False)
-    if res.status_code != 200:
-        return jsonify({"error": "Failed to fetch OSINT sources"}), res.status_code
-
-    all_sources = res.json()
-    source = next((src for src in all_sources if src["id"] == source_id), None)
-
+    # La source, les groupes et les wordlists sont indépendants : chargés en parallèle
+    results = fan_out({
+        "source": lambda: osint_sources_catalog.get(source_id),
+        "available_groups": osint_source_groups_catalog.payload,
+        "available_wordlists": word_lists_catalog.payload,
+    })
+    if not results.ok("source"):
+        return jsonify({"error": "Failed to fetch OSINT sources"}), 502
+
+    source = results.get("source")
     if not source:
         return jsonify({"error": "OSINT source not found"}), 404
 
-    # Récupérer les groupes disponibles
-    groups = requests.get(f"{TARANIS_URL}/api/v1/config/osint-source-groups", headers=headers, verify=False).json()
-    source['available_groups'] = groups
-
-    # Récupérer les wordlists disponibles
-    wordlists = requests.get(f"{TARANIS_URL}/api/v1/config/wordlists", headers=headers, verify=False).json()
-    source['available_wordlists'] = wordlists
+    # Copie : l'item du catalogue est partagé entre les requêtes
+    source = dict(source)
+    source['available_groups'] = results.get("available_groups")
+    source['available_wordlists'] = results.get("available_wordlists")
+    if results.errors:
+        source['partial_errors'] = results.errors
 
     return jsonify(source), 200
 
@@ -109,35 +92,35 @@ def get_osint_source_by_id(source_id):
 # 6. PUT OSINT Source
 @data_collection.route('/osint-sources/<source_id>', methods=['PUT'])
 def update_osint_source(source_id):
-    headers = get_auth_headers()
     data = request.json
 
     # Assure que l'ID est inclus (même s'il sera écrasé côté Taranis)
     data['id'] = source_id
 
-    res = requests.put(f"{TARANIS_URL}/api/v1/config/osint-sources/{source_id}", headers=headers, json=data, verify=False)
+    res = taranis_request("PUT", f"{TARANIS_URL}/api/v1/config/osint-sources/{source_id}", json=data)
+    osint_sources_catalog.record_updated(res)
     return jsonify(res.json()), res.status_code
 
 
 # 7. POST OSINT Source
 @data_collection.route('/osint-sources', methods=['POST'])
 def create_osint_source():
-    headers = get_auth_headers()
     data = request.json
 
     # Injecte un faux ID si manquant pour satisfaire le constructor Python
     if 'id' not in data:
         data['id'] = "00000000-0000-0000-0000-000000000000"
 
-    res = requests.post(f"{TARANIS_URL}/api/v1/config/osint-sources", headers=headers, json=data, verify=False)
+    res = taranis_request("POST", f"{TARANIS_URL}/api/v1/config/osint-sources", json=data)
+    osint_sources_catalog.record_created(res)
     return jsonify(res.json()), res.status_code
 
 
 # 8. DELETE OSINT Source
 @data_collection.route('/osint-sources/<source_id>', methods=['DELETE'])
 def delete_osint_source(source_id):
-    headers = get_auth_headers()
-    res = requests.delete(f"{TARANIS_URL}/api/v1/config/osint-sources/{source_id}", headers=headers, verify=False)
+    res = taranis_request("DELETE", f"{TARANIS_URL}/api/v1/config/osint-sources/{source_id}")
+    osint_sources_catalog.record_deleted(source_id, res)
     if res.status_code == 204:
         return jsonify({"message": "OSINT source deleted"}), 200
     return jsonify({"error": "Failed to delete OSINT source"}), res.status_code
@@ -145,30 +128,37 @@ def delete_osint_source(source_id):
 # 8. GET all OSINT Source Groups
 @data_collection.route('/osint-source-groups', methods=['GET'])
 def get_osint_source_groups():
-    headers = get_auth_headers()
-    res = requests.get(f"{TARANIS_URL}/api/v1/config/osint-source-groups", headers=headers, verify=False)
-    return jsonify(res.json()), res.status_code
-
-
-# 9. GET OSINT Source Group by ID (filtrage manuel)
+    try:
+        query = parse_list_query(request.args)
+    except InvalidListQuery as e:
+        return jsonify({"error": str(e)}), 400
+    res = taranis_request("GET", f"{TARANIS_URL}/api/v1/config/osint-source-groups")
+    data = res.json()
+    if res.status_code == 200:
+        osint_source_groups_catalog.load(data, response_version(res))
+        data = query.apply(data)
+    return jsonify(data), res.status_code
+
+
+# 9. GET OSINT Source Group by ID (lookup dans le catalogue local)
 @data_collection.route('/osint-source-groups/<group_id>', methods=['GET'])
 def get_osint_source_group_by_id(group_id):
-    headers = get_auth_headers()
-
-    # Correction ici 👇
-    res = requests.get(f"{TARANIS_URL}/api/v1/config/osint-source-groups", headers=headers, verify=False)
-    if res.status_code != 200:
-        return jsonify({"error": "Failed to fetch OSINT source groups"}), res.status_code
-
-    all_groups = res.json().get("items", [])  # ✅ correction ici
-    group = next((g for g in all_groups if isinstance(g, dict) and g.get("id") == group_id), None)
-
+    # Le groupe et toutes les OSINT Sources (affichées en checkbox) sont chargés en parallèle
+    results = fan_out({
+        "group": lambda: osint_source_groups_catalog.get(group_id),
+        "available_sources": osint_sources_catalog.payload,
+    })
+    if not results.ok("group"):
+        return jsonify({"error": "Failed to fetch OSINT source groups"}), 502
+
+    group = results.get("group")
     if not group:
         return jsonify({"error": "OSINT source group not found"}), 404
 
-    # Charger toutes les OSINT Sources disponibles (pour afficher en checkbox)
-    all_sources = requests.get(f"{TARANIS_URL}/api/v1/config/osint-sources", headers=headers, verify=False).json()
-    group["available_sources"] = all_sources
+    group = dict(group)
+    group["available_sources"] = results.get("available_sources")
+    if results.errors:
+        group["partial_errors"] = results.errors
 
     return jsonify(group), 200
 
@@ -176,31 +166,66 @@ def get_osint_source_group_by_id(group_id):
 # 10. POST OSINT Source Group
 @data_collection.route('/osint-source-groups', methods=['POST'])
 def create_osint_source_group():
-    headers = get_auth_headers()
     data = request.json
 
     if 'id' not in data:
         data['id'] = "00000000-0000-0000-0000-000000000001"  # valeur par défaut
 
-    res = requests.post(f"{TARANIS_URL}/api/v1/config/osint-source-groups", headers=headers, json=data, verify=False)
+    res = taranis_request("POST", f"{TARANIS_URL}/api/v1/config/osint-source-groups", json=data)
+    osint_source_groups_catalog.record_created(res)
     return jsonify(res.json()), res.status_code
 
 
 # 11. PUT OSINT Source Group
 @data_collection.route('/osint-source-groups/<group_id>', methods=['PUT'])
 def update_osint_source_group(group_id):
-    headers = get_auth_headers()
     data = request.json
     data["id"] = group_id  # S'assurer que l'id est dans le payload
-    res = requests.put(f"{TARANIS_URL}/api/v1/config/osint-source-groups/{group_id}", headers=headers, json=data, verify=False)
+    res = taranis_request("PUT", f"{TARANIS_URL}/api/v1/config/osint-source-groups/{group_id}", json=data)
+    osint_source_groups_catalog.record_updated(res)
     return jsonify(res.json()), res.status_code
 
 
 # 12. DELETE OSINT Source Group
 @data_collection.route('/osint-source-groups/<group_id>', methods=['DELETE'])
 def delete_osint_source_group(group_id):
-    headers = get_auth_headers()
-    res = requests.delete(f"{TARANIS_URL}/api/v1/config/osint-source-groups/{group_id}", headers=headers, verify=False)
+    res = taranis_request("DELETE", f"{TARANIS_URL}/api/v1/config/osint-source-groups/{group_id}")
+    osint_source_groups_catalog.record_deleted(group_id, res)
     if res.status_code == 204:
         return jsonify({"message": "OSINT source group deleted"}), 200
     return jsonify({"error": "Failed to delete OSINT source group"}), res.status_code
+
+
+def _prepare_osint_source(op, data):
+    # Mêmes compléments que les routes unitaires (faux id à la création)
+    if op == "create" and 'id' not in data:
+        data['id'] = "00000000-0000-0000-0000-000000000000"
+    return data
+
+
+def _prepare_osint_source_group(op, data):
+    if op == "create" and 'id' not in data:
+        data['id'] = "00000000-0000-0000-0000-000000000001"
+    return data
+
+
+# 13. Bulk OSINT Sources : {"create": [...], "update": [...], "delete": [ids]}
+@data_collection.route('/osint-sources/bulk', methods=['POST'])
+def bulk_osint_sources():
+    try:
+        operations = parse_bulk(request.get_json(silent=True))
+    except InvalidBulk as e:
+        return jsonify({"error": str(e)}), 400
+    summary = run_bulk(osint_sources_catalog, operations, prepare=_prepare_osint_source)
+    return jsonify(summary), bulk_status(summary)
+
+
+# 14. Bulk OSINT Source Groups
+@data_collection.route('/osint-source-groups/bulk', methods=['POST'])
+def bulk_osint_source_groups():
+    try:
+        operations = parse_bulk(request.get_json(silent=True))
+    except InvalidBulk as e:
+        return jsonify({"error": str(e)}), 400
+    summary = run_bulk(osint_source_groups_catalog, operations, prepare=_prepare_osint_source_group)
+    return jsonify(summary), bulk_status(summary)
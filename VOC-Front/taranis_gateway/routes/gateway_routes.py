@@ -0,0 +1,33 @@
+from flask import Blueprint, current_app, jsonify, request
+from utils.taranis_auth import token_manager
+from utils.upstream import upstream
+from utils.catalog import catalog_stats
+from utils.news_sync import news_sync
+from utils.search_index import search_stats
+from utils.jobs import job_queue
+from utils.batch import InvalidBatch, parse_batch, run_batch
+
+gateway_bp = Blueprint('gateway', __name__)
+
+# 📊 Statistiques internes de la gateway (token partagé, pool de connexions, catalogue, ...)
+@gateway_bp.route('/gateway/stats', methods=['GET'])
+def get_gateway_stats():
+    return jsonify({
+        "auth": token_manager.stats(),
+        "upstream": upstream.stats(),
+        "catalog": catalog_stats(),
+        "news_sync": news_sync.stats(),
+        "search": search_stats(),
+        "jobs": job_queue.stats()
+    }), 200
+
+
+# 📦 Plusieurs appels gateway en un seul aller-retour, exécutés en parallèle
+@gateway_bp.route('/batch', methods=['POST'])
+def post_batch():
+    try:
+        batch = parse_batch(request.get_json(silent=True))
+    except InvalidBatch as e:
+        return jsonify({"error": str(e)}), 400
+    responses = run_batch(current_app._get_current_object(), batch, request.headers)
+    return jsonify({"responses": responses}), 200
@@ -1,5 +1,8 @@
 from flask import Blueprint, jsonify, request
-import requests
+from utils.taranis_auth import taranis_request
+from utils.catalog import product_types_catalog, response_version
+from utils.fanout import fan_out
+from utils.list_query import InvalidListQuery, parse_list_query, proxy_list
 import os
 import urllib3
 
@@ -7,103 +10,89 @@ presenters_bp = Blueprint('presenters', __name__)
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 TARANIS_URL = os.getenv("TARANIS_BASE_URL", "https://192.168.100.44:4443")
-TARANIS_USERNAME = "admin"
-TARANIS_PASSWORD = "admin"
 
-# Authentification : récupérer le token
-def get_api_token():
-    login_url = f"{TARANIS_URL}/api/v1/auth/login"
-    payload = {
-        "username": TARANIS_USERNAME,
-        "password": TARANIS_PASSWORD
-    }
-    try:
-        response = requests.post(login_url, json=payload, verify=False)
-        response.raise_for_status()
-        return response.json().get("access_token")
-    except Exception as e:
-        print(f"❌ Erreur login: {e}")
-        return None
-
-# Headers pour les appels API Taranis
-def get_auth_headers():
-    token = get_api_token()
-    return {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
 
 # 🔍 GET /presenters-nodes
 @presenters_bp.route('/presenters-nodes', methods=['GET'])
 def get_presenters_nodes():
-    headers = get_auth_headers()
     try:
-        res = requests.get(f"{TARANIS_URL}/api/v1/config/presenters-nodes", headers=headers, verify=False)
-        return jsonify(res.json()), res.status_code
+        query = parse_list_query(request.args)
+    except InvalidListQuery as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        return proxy_list(f"{TARANIS_URL}/api/v1/config/presenters-nodes", query)
     except Exception as e:
         return jsonify({"error": f"Erreur get presenters-nodes : {str(e)}"}), 500
 
 # 🔹 1. GET all Product Types
 @presenters_bp.route('/product-types', methods=['GET'])
 def get_product_types():
-    headers = get_auth_headers()
-    res = requests.get(f"{TARANIS_URL}/api/v1/config/product-types", headers=headers, verify=False)
-    return jsonify(res.json()), res.status_code
-
-# 🔹 2. GET Product Type by ID (filtrage manuel)
+    try:
+        query = parse_list_query(request.args)
+    except InvalidListQuery as e:
+        return jsonify({"error": str(e)}), 400
+    res = taranis_request("GET", f"{TARANIS_URL}/api/v1/config/product-types")
+    data = res.json()
+    if res.status_code == 200:
+        product_types_catalog.load(data, response_version(res))
+        data = query.apply(data)
+    return jsonify(data), res.status_code
+
+# 🔹 2. GET Product Type by ID (lookup dans le catalogue local)
 @presenters_bp.route('/product-types/<type_id>', methods=['GET'])
 def get_product_type_by_id(type_id):
-    headers = get_auth_headers()
-    res = requests.get(f"{TARANIS_URL}/api/v1/config/product-types", headers=headers, verify=False)
-    if res.status_code != 200:
-        return jsonify({"error": "Failed to fetch product types"}), res.status_code
-
-    all_types = res.json().get("items", [])
-    item = next((pt for pt in all_types if str(pt["id"]) == str(type_id)), None)
-
+    # Le product type et les presenters disponibles sont chargés en parallèle
+    results = fan_out({
+        "product_type": lambda: product_types_catalog.get(type_id),
+        "available_presenters": lambda: taranis_request("GET", f"{TARANIS_URL}/api/v1/config/presenters-nodes").json(),
+    })
+    if not results.ok("product_type"):
+        return jsonify({"error": "Failed to fetch product types"}), 502
+
+    item = results.get("product_type")
     if not item:
         return jsonify({"error": "Product type not found"}), 404
 
-    # Optionnel : enrichir avec presenters disponibles
-    presenters = requests.get(f"{TARANIS_URL}/api/v1/config/presenters-nodes", headers=headers, verify=False).json()
-    item["available_presenters"] = presenters
+    item = dict(item)
+    item["available_presenters"] = results.get("available_presenters")
+    if results.errors:
+        item["partial_errors"] = results.errors
 
     return jsonify(item), 200
 
 # 🔹 3. POST Product Type
 @presenters_bp.route('/product-types', methods=['POST'])
 def create_product_type():
-    headers = get_auth_headers()
     data = request.json
 
-    # Vérification d'unicité du titre (title)
-    existing = requests.get(f"{TARANIS_URL}/api/v1/config/product-types", headers=headers, verify=False)
-    if existing.status_code == 200:
-        for pt in existing.json().get("items", []):
-            # Vérifie que chaque item est un dict et qu'il contient 'title'
-            if isinstance(pt, dict) and "title" in pt:
-                if pt["title"].strip().lower() == data["title"].strip().lower():
-                    return jsonify({"error": f"Title '{data['title']}' already exists."}), 409
+    # Vérification d'unicité du titre (title) via l'index des titres normalisés
+    try:
+        existing = product_types_catalog.find_by_title(data["title"])
+    except Exception:
+        existing = None
+    if existing is not None:
+        return jsonify({"error": f"Title '{data['title']}' already exists."}), 409
 
     # Requête POST vers Taranis pour créer le product type
-    res = requests.post(f"{TARANIS_URL}/api/v1/config/product-types", headers=headers, json=data, verify=False)
+    res = taranis_request("POST", f"{TARANIS_URL}/api/v1/config/product-types", json=data)
+    product_types_catalog.record_created(res)
     return jsonify(res.json()), res.status_code
 
 # 🔹 4. PUT Product Type
 @presenters_bp.route('/product-types/<type_id>', methods=['PUT'])
 def update_product_type(type_id):
-    headers = get_auth_headers()
     data = request.json
     data['id'] = int(type_id)  # assure que l'id est bien présent
 
-    res = requests.put(f"{TARANIS_URL}/api/v1/config/product-types/{type_id}", headers=headers, json=data, verify=False)
+    res = taranis_request("PUT", f"{TARANIS_URL}/api/v1/config/product-types/{type_id}", json=data)
+    product_types_catalog.record_updated(res)
     return jsonify(res.json()), res.status_code
 
 # 🔹 5. DELETE Product Type
 @presenters_bp.route('/product-types/<type_id>', methods=['DELETE'])
 def delete_product_type(type_id):
-    headers = get_auth_headers()
-    res = requests.delete(f"{TARANIS_URL}/api/v1/config/product-types/{type_id}", headers=headers, verify=False)
+    res = taranis_request("DELETE", f"{TARANIS_URL}/api/v1/config/product-types/{type_id}")
+    product_types_catalog.record_deleted(type_id, res)
     if res.status_code == 204:
         return jsonify({"message": "Product type deleted"}), 200
     return jsonify({"error": "Failed to delete product type"}), res.status_code
@@ -1,5 +1,9 @@
 from flask import Blueprint, jsonify, request
-import requests
+from utils.taranis_auth import taranis_request
+from utils.fast_json import loads
+from utils.passthrough import raw_response
+from utils.catalog import publishers_presets_catalog, response_version
+from utils.list_query import InvalidListQuery, parse_list_query, proxy_list
 import os
 import urllib3
 
@@ -7,63 +11,45 @@ publishers_bp = Blueprint('publishers', __name__)
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 TARANIS_URL = os.getenv("TARANIS_BASE_URL", "https://192.168.100.44:4443")
-TARANIS_USERNAME = "admin"
-TARANIS_PASSWORD = "admin"
 
-# 🔐 Récupérer le token JWT depuis TaranisNG
-def get_api_token():
-    login_url = f"{TARANIS_URL}/api/v1/auth/login"
-    payload = {
-        "username": TARANIS_USERNAME,
-        "password": TARANIS_PASSWORD
-    }
-    try:
-        response = requests.post(login_url, json=payload, verify=False)
-        response.raise_for_status()
-        return response.json().get("access_token")
-    except Exception as e:
-        print(f"❌ Erreur login: {e}")
-        return None
-
-# 📎 Ajouter l'Authorization Header
-def get_auth_headers():
-    token = get_api_token()
-    return {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
 
 # 🔍 GET /publishers-nodes
 @publishers_bp.route('/publishers-nodes', methods=['GET'])
 def get_publishers_nodes():
-    headers = get_auth_headers()
     try:
-        res = requests.get(f"{TARANIS_URL}/api/v1/config/publishers-nodes", headers=headers, verify=False)
-        return jsonify(res.json()), res.status_code
+        query = parse_list_query(request.args)
+    except InvalidListQuery as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        return proxy_list(f"{TARANIS_URL}/api/v1/config/publishers-nodes", query)
     except Exception as e:
         return jsonify({"error": f"Erreur get publishers-nodes : {str(e)}"}), 500
 
 # 🔍 GET all Publisher Presets
 @publishers_bp.route('/publishers-presets', methods=['GET'])
 def get_publishers_presets():
-    headers = get_auth_headers()
     try:
-        res = requests.get(f"{TARANIS_URL}/api/v1/config/publishers-presets", headers=headers, verify=False)
-        return jsonify(res.json()), res.status_code
+        query = parse_list_query(request.args)
+    except InvalidListQuery as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        res = taranis_request("GET", f"{TARANIS_URL}/api/v1/config/publishers-presets")
+        if res.status_code != 200:
+            return raw_response(res)
+        data = loads(res.content)
+        publishers_presets_catalog.load(data, response_version(res))
+        # Sans paramètre de liste, le client reçoit les octets de Taranis tels quels
+        if query.is_empty:
+            return raw_response(res)
+        return jsonify(query.apply(data)), res.status_code
     except Exception as e:
         return jsonify({"error": f"Erreur get publishers-presets : {str(e)}"}), 500
 
-# 🔍 GET Publisher Preset by ID (filtrage côté backend)
+# 🔍 GET Publisher Preset by ID (lookup dans le catalogue local)
 @publishers_bp.route('/publishers-presets/<preset_id>', methods=['GET'])
 def get_publisher_preset_by_id(preset_id):
-    headers = get_auth_headers()
     try:
-        res = requests.get(f"{TARANIS_URL}/api/v1/config/publishers-presets", headers=headers, verify=False)
-        if res.status_code != 200:
-            return jsonify({"error": "Impossible de récupérer les presets"}), res.status_code
-
-        presets = res.json()
-        preset = next((p for p in presets if p.get("id") == preset_id), None)
+        preset = publishers_presets_catalog.get(preset_id)
         if preset is None:
             return jsonify({"error": "Preset introuvable"}), 404
         return jsonify(preset), 200
@@ -73,10 +59,10 @@ def get_publisher_preset_by_id(preset_id):
 # ➕ POST Publisher Preset
 @publishers_bp.route('/publishers-presets', methods=['POST'])
 def create_publisher_preset():
-    headers = get_auth_headers()
     data = request.json
     try:
-        res = requests.post(f"{TARANIS_URL}/api/v1/config/publishers-presets", headers=headers, json=data, verify=False)
+        res = taranis_request("POST", f"{TARANIS_URL}/api/v1/config/publishers-presets", json=data)
+        publishers_presets_catalog.record_created(res)
         return jsonify(res.json()), res.status_code
     except Exception as e:
         return jsonify({"error": f"Erreur création preset : {str(e)}"}), 500
@@ -84,10 +70,10 @@ def create_publisher_preset():
 # ✏️ PUT Publisher Preset
 @publishers_bp.route('/publishers-presets/<preset_id>', methods=['PUT'])
 def update_publisher_preset(preset_id):
-    headers = get_auth_headers()
     data = request.json
     try:
-        res = requests.put(f"{TARANIS_URL}/api/v1/config/publishers-presets/{preset_id}", headers=headers, json=data, verify=False)
+        res = taranis_request("PUT", f"{TARANIS_URL}/api/v1/config/publishers-presets/{preset_id}", json=data)
+        publishers_presets_catalog.record_updated(res)
         return jsonify(res.json()), res.status_code
     except Exception as e:
         return jsonify({"error": f"Erreur modification preset : {str(e)}"}), 500
@@ -95,9 +81,9 @@ def update_publisher_preset(preset_id):
 # ❌ DELETE Publisher Preset
 @publishers_bp.route('/publishers-presets/<preset_id>', methods=['DELETE'])
 def delete_publisher_preset(preset_id):
-    headers = get_auth_headers()
     try:
-        res = requests.delete(f"{TARANIS_URL}/api/v1/config/publishers-presets/{preset_id}", headers=headers, verify=False)
+        res = taranis_request("DELETE", f"{TARANIS_URL}/api/v1/config/publishers-presets/{preset_id}")
+        publishers_presets_catalog.record_deleted(preset_id, res)
         return jsonify({"message": "Preset supprimé"}), res.status_code
     except Exception as e:
         return jsonify({"error": f"Erreur suppression preset : {str(e)}"}), 500
@@ -1,6 +1,9 @@
-from flask import Blueprint, request, jsonify, Response
-import requests
+from flask import Blueprint, request, jsonify, Response, url_for
+from utils.taranis_auth import taranis_request
+from utils.jobs import QueueFull, RetryableError, job_queue
+from utils.list_query import LIST_FILTERS, InvalidListQuery, parse_list_query, proxy_list
 import os
+import requests
 import urllib3
 
 publish_bp = Blueprint('publish', __name__)
@@ -8,35 +11,18 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 TARANIS_URL = os.getenv("TARANIS_BASE_URL", "https://192.168.100.44:4443")
 TARANIS_API = f"{TARANIS_URL}/api/v1"
-TARANIS_USERNAME = "admin"
-TARANIS_PASSWORD = "admin"
 
-# Auth automatique
-def get_api_token():
-    login_url = f"{TARANIS_API}/auth/login"
-    payload = {"username": TARANIS_USERNAME, "password": TARANIS_PASSWORD}
-    try:
-        response = requests.post(login_url, json=payload, verify=False)
-        response.raise_for_status()
-        return response.json().get("access_token")
-    except Exception as e:
-        print(f"❌ Erreur login : {e}")
-        return None
-
-def get_auth_headers():
-    token = get_api_token()
-    return {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
 
 # === ROUTES PRODUITS ===
 
 # 1. GET all products
 @publish_bp.route('/publish/products', methods=['GET'])
 def get_products():
-    r = requests.get(f"{TARANIS_API}/publish/products?search=&range=ALL&sort=DATE_DESC&offset=0&limit=20", headers=get_auth_headers(), verify=False)
-    return jsonify(r.json()), r.status_code
+    try:
+        query = parse_list_query(request.args, filters=LIST_FILTERS + ("product_type_id",))
+    except InvalidListQuery as e:
+        return jsonify({"error": str(e)}), 400
+    return proxy_list(f"{TARANIS_API}/publish/products?search=&range=ALL&sort=DATE_DESC&offset=0&limit=20", query)
 
 # 2. POST create new product
 # 6. POST général vers /publish/products
@@ -45,11 +31,10 @@ def post_general_product():
     payload = request.get_json()
 
     try:
-        r = requests.post(
+        r = taranis_request(
+            "POST",
             f"{TARANIS_API}/publish/products",
-            headers=get_auth_headers(),
-            json=payload,
-            verify=False
+            json=payload
         )
         print(f"[DEBUG] Payload reçu: {payload}")
         print(f"[DEBUG] Code retour Taranis: {r.status_code}")
@@ -71,7 +56,7 @@ def update_product(product_id):
     payload = request.get_json()
     print(f"[DEBUG] Payload reçu: {payload}")
     
-    r = requests.put(f"{TARANIS_API}/publish/products/{product_id}", headers=get_auth_headers(), json=payload, verify=False)
+    r = taranis_request("PUT", f"{TARANIS_API}/publish/products/{product_id}", json=payload)
     print(f"[DEBUG] Code retour Taranis: {r.status_code}")
     print(f"[DEBUG] Contenu réponse: {r.text}")
     
@@ -91,11 +76,58 @@ def update_product(product_id):
             "raw_response": r.text[:200] if r.text else "Empty response"
         }), 500
 
+def _publish_to_preset(product_id, preset_id):
+    """Une tâche de job : publication du produit avec un preset (5xx, 429 et erreurs réseau retentés)."""
+    url = f"{TARANIS_API}/publish/products/{product_id}/publishers/{preset_id}"
+    try:
+        r = taranis_request("POST", url)
+    except (requests.ConnectionError, requests.Timeout) as e:
+        raise RetryableError(str(e))
+
+    try:
+        body = r.json() if r.text.strip() else None
+    except ValueError:
+        body = r.text[:200]
+    if r.status_code >= 500 or r.status_code == 429:
+        raise RetryableError(f"Taranis a répondu {r.status_code}")
+    if not r.ok:
+        raise Exception(f"Taranis a répondu {r.status_code} : {body}")
+    return {"status_code": r.status_code, "body": body}
+
+
+# Aussi utilisé pour reprendre un job d'un worker arrêté (meta enregistrée avec le job)
+job_queue.register("publish", lambda meta: lambda preset_id: _publish_to_preset(meta["product_id"], preset_id))
+
+
+def _submit_publish_job(product_id, preset_ids):
+    try:
+        job = job_queue.submit("publish", preset_ids, meta={"product_id": product_id})
+    except QueueFull as e:
+        response = jsonify({"error": str(e)})
+        response.status_code = 503
+        response.headers["Retry-After"] = "30"
+        return response
+
+    status_url = url_for("publish.get_publish_job", job_id=job.id)
+    response = jsonify({"job_id": job.id, "status": job.status, "status_url": status_url})
+    response.status_code = 202
+    response.headers["Location"] = status_url
+    return response
+
+
+def _wants_async():
+    return request.args.get("async", "").lower() in ("1", "true") or "respond-async" in request.headers.get("Prefer", "")
+
+
 # 5. POST publish product using publisher preset
+# ?async=true (ou Prefer: respond-async) : 202 + job à suivre sur /publish/jobs/<job_id>
 @publish_bp.route('/publish/products/<int:product_id>/publish/<preset_id>', methods=['POST'])
 def publish_product_with_preset(product_id, preset_id):
+    if _wants_async():
+        return _submit_publish_job(product_id, [preset_id])
+
     url = f"{TARANIS_API}/publish/products/{product_id}/publishers/{preset_id}"
-    r = requests.post(url, headers=get_auth_headers(), verify=False)
+    r = taranis_request("POST", url)
     
     print(f"[DEBUG] Publish URL: {url}")
     print(f"[DEBUG] Code retour Taranis: {r.status_code}")
@@ -116,9 +148,28 @@ def publish_product_with_preset(product_id, preset_id):
             "status_code": r.status_code,
             "raw_response": r.text[:200] if r.text else "Empty response"
         }), 500
+
+# 🚀 Publication avec plusieurs presets en arrière-plan (un appel Taranis par preset, en parallèle)
+@publish_bp.route('/publish/products/<int:product_id>/publish-jobs', methods=['POST'])
+def create_publish_job(product_id):
+    payload = request.get_json(silent=True) or {}
+    preset_ids = payload.get("preset_ids")
+    if not isinstance(preset_ids, list) or not preset_ids:
+        return jsonify({"error": "'preset_ids' doit être une liste non vide"}), 400
+    return _submit_publish_job(product_id, list(dict.fromkeys(str(preset_id) for preset_id in preset_ids)))
+
+
+# 🔎 Statut et progression d'un job de publication
+@publish_bp.route('/publish/jobs/<job_id>', methods=['GET'])
+def get_publish_job(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job introuvable"}), 404
+    return jsonify(job), 200
+
 # 4. DELETE product
 @publish_bp.route('/publish/products/<int:product_id>', methods=['DELETE'])
 def delete_product(product_id):
-    r = requests.delete(f"{TARANIS_API}/publish/products/{product_id}", headers=get_auth_headers(), verify=False)
+    r = taranis_request("DELETE", f"{TARANIS_API}/publish/products/{product_id}")
     return jsonify({"message": "Product deleted"}), r.status_code
 
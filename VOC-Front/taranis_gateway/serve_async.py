@@ -0,0 +1,40 @@
+"""Mode de service asynchrone de la gateway.
+
+Les mêmes blueprints Flask tournent sur une boucle d'événements gevent : les
+sockets (dont les appels vers Taranis via requests/urllib3) sont rendus
+non bloquants par monkey-patching, et chaque requête en vol coûte une
+coroutine (greenlet) au lieu d'un thread.
+
+    python serve_async.py
+"""
+from gevent import monkey
+
+monkey.patch_all()
+
+import logging
+import os
+
+# Beaucoup plus de requêtes simultanées vers Taranis qu'en mode threadé :
+# on agrandit le pool keep-alive avant que le client upstream ne soit créé
+os.environ.setdefault("UPSTREAM_POOL_MAXSIZE", "256")
+
+from gevent.pool import Pool
+from gevent.pywsgi import WSGIServer
+
+from app import app
+
+HOST = os.getenv("GATEWAY_HOST", "0.0.0.0")
+PORT = int(os.getenv("GATEWAY_PORT", "5001"))
+# Nombre maximum de requêtes traitées en parallèle (au-delà, les connexions attendent)
+MAX_CONCURRENCY = int(os.getenv("GATEWAY_ASYNC_CONCURRENCY", "5000"))
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    server = WSGIServer((HOST, PORT), app, spawn=Pool(MAX_CONCURRENCY), log=None)
+    logging.info(f"[Gateway] Mode async (gevent) sur {HOST}:{PORT}, concurrence max {MAX_CONCURRENCY}")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
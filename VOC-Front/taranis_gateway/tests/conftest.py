@@ -0,0 +1,66 @@
+"""Fixtures communes : la gateway est testée contre le faux Taranis de benchmarks/mock_taranis.py."""
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import pytest
+import requests
+
+GATEWAY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, GATEWAY_DIR)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+MOCK_URL = f"http://127.0.0.1:{_free_port()}"
+MOCK_NEWS_ITEMS = 300
+MOCK_REPORT_ITEMS = 20
+
+# La configuration est lue à l'import des modules : elle doit être fixée avant d'importer app
+os.environ["TARANIS_BASE_URL"] = MOCK_URL
+os.environ["NEWS_SYNC_INTERVAL"] = "0"
+os.environ["CATALOG_REFRESH_INTERVAL"] = "0"
+os.environ["JOBS_DB"] = os.path.join(tempfile.mkdtemp(prefix="gateway-tests-"), "jobs.sqlite3")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def mock_taranis():
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(GATEWAY_DIR, "benchmarks", "mock_taranis.py"),
+         "--port", MOCK_URL.rsplit(":", 1)[1], "--latency", "0", "--jitter", "0",
+         "--news-items", str(MOCK_NEWS_ITEMS), "--report-items", str(MOCK_REPORT_ITEMS)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 15
+    while True:
+        try:
+            requests.get(f"{MOCK_URL}/api/v1/config/roles", timeout=1)
+            break
+        except requests.RequestException:
+            if time.time() > deadline or process.poll() is not None:
+                process.kill()
+                raise RuntimeError("Le faux Taranis ne démarre pas")
+            time.sleep(0.1)
+    yield MOCK_URL
+    process.terminate()
+    process.wait()
+
+
+@pytest.fixture(scope="session")
+def app(mock_taranis):
+    from app import app as gateway_app
+
+    gateway_app.config["TESTING"] = True
+    return gateway_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,33 @@
+from tests.conftest import MOCK_REPORT_ITEMS
+
+
+def _batch(client, *paths, **extra):
+    response = client.post("/api/batch", json={"requests": [{"id": path, "path": path, **extra} for path in paths]})
+    assert response.status_code == 200
+    return {sub["id"]: sub for sub in response.get_json()["responses"]}
+
+
+def test_batch_of_proxied_gets(client):
+    # Routes relayées octet pour octet (utils/passthrough.py) : écueil du mode direct_passthrough
+    results = _batch(client, "/api/access-control/roles", "/api/remote-nodes", "/api/analyze/report-items", "/api/access-control/users")
+
+    assert {path: sub["status"] for path, sub in results.items()} == dict.fromkeys(results, 200)
+    assert results["/api/access-control/roles"]["body"]["total_count"] == 8
+    assert results["/api/remote-nodes"]["body"]["items"][0]["name"] == "remote-node-1"
+    assert results["/api/analyze/report-items"]["body"]["total_count"] == MOCK_REPORT_ITEMS
+    assert results["/api/access-control/roles"]["headers"]["ETag"]
+
+
+def test_batch_sub_requests_are_never_compressed(client):
+    results = _batch(client, "/api/access-control/roles", headers={"Accept-Encoding": "gzip"})
+    assert results["/api/access-control/roles"]["body"]["total_count"] == 8
+
+
+def test_batch_matches_direct_calls(client):
+    direct = client.get("/api/access-control/acls").get_json()
+    assert _batch(client, "/api/access-control/acls")["/api/access-control/acls"]["body"] == direct
+
+
+def test_invalid_batch(client):
+    assert client.post("/api/batch", json={"requests": []}).status_code == 400
+    assert client.post("/api/batch", json={"requests": [{"path": "/api/batch"}]}).status_code == 400
@@ -0,0 +1,152 @@
+import copy
+import threading
+
+from tests.conftest import MOCK_URL
+from utils.catalog import CatalogCollection
+
+
+class _Response:
+    def __init__(self, body, status_code=200):
+        self.body = body
+        self.status_code = status_code
+        self.ok = status_code < 400
+
+    def json(self):
+        return self.body
+
+
+def _payload():
+    return {"total_count": 2, "items": [{"id": 1, "name": "alpha"}, {"id": 2, "name": "beta"}]}
+
+
+def test_load_does_not_keep_the_shared_object():
+    shared = _payload()
+    catalog = CatalogCollection("test", "/api/v1/config/test")
+    catalog.load(shared)
+
+    catalog.record_created(_Response({"id": 3, "name": "gamma"}))
+    catalog.record_updated(_Response({"id": 1, "name": "alpha-2"}))
+    catalog.record_deleted(2, _Response({}))
+
+    # Le JSON décodé peut être partagé entre requêtes fusionnées : jamais modifié
+    assert shared == _payload()
+    assert [item["name"] for item in catalog.payload()["items"]] == ["alpha-2", "gamma"]
+    assert catalog.payload()["total_count"] == 2
+
+
+def test_writes_swap_the_payload_instead_of_mutating_it():
+    catalog = CatalogCollection("test", "/api/v1/config/test")
+    catalog.load(_payload())
+    before = catalog.payload()
+    snapshot = copy.deepcopy(before)
+
+    catalog.record_created(_Response({"id": 3, "name": "gamma"}))
+    catalog.record_deleted(1, _Response({}))
+
+    # Une réponse en cours de sérialisation garde l'ancienne version intacte
+    assert before == snapshot
+    assert catalog.payload() is not before
+    assert catalog.find_by_title("GAMMA")["id"] == 3
+    assert catalog.get(1) is None
+
+
+def test_partial_write_response_invalidates_instead_of_caching_the_request():
+    catalog = CatalogCollection("test", "/api/v1/config/test")
+    catalog.load(_payload())
+
+    catalog.record_updated(_Response({"message": "updated"}))
+    assert not catalog.is_fresh()
+
+
+def test_secrets_are_never_cached(client):
+    from utils.catalog import users_catalog
+
+    assert client.get("/api/access-control/users").status_code == 200
+    created = client.post("/api/access-control/users", json={"username": "jdoe", "password": "s3cret"})
+    user_id = created.get_json()["id"]
+    client.put(f"/api/access-control/users/{user_id}", json={"id": user_id, "username": "jdoe", "password": "n3w"})
+
+    assert "password" not in users_catalog.get(user_id)
+    body = client.get(f"/api/access-control/users/{user_id}").get_data(as_text=True)
+    assert "s3cret" not in body and "n3w" not in body
+
+
+def test_unchanged_list_is_not_copied_again():
+    catalog = CatalogCollection("test", "/api/v1/config/test")
+    catalog.load(_payload(), version='"v1"')
+    loaded = catalog.payload()
+
+    catalog.load(_payload(), version='"v1"')
+    assert catalog.payload() is loaded
+    assert catalog.stats()["unchanged_loads"] == 1
+
+    # Après un write-through, la même liste est réindexée
+    catalog.record_deleted(1, _Response({}))
+    catalog.load(_payload(), version='"v1"')
+    assert catalog.get(1) is not None
+
+
+def test_load_waits_for_a_write_in_progress():
+    catalog = CatalogCollection("test", "/api/v1/config/test")
+    catalog.load(_payload(), version='"v1"')
+
+    with catalog._lock:
+        loader = threading.Thread(target=catalog.load, args=({"items": [{"id": 9, "name": "nine"}]}, '"v2"'))
+        loader.start()
+        loader.join(0.05)
+        assert loader.is_alive()
+        assert catalog.get(9) is None
+    loader.join()
+    assert catalog.get(9)["name"] == "nine"
+
+
+def test_catalog_url_targets_taranis():
+    assert CatalogCollection("test", "/api/v1/config/test").url == f"{MOCK_URL}/api/v1/config/test"
+
+
+def _stale_product_types(miss_refresh_interval):
+    """Catalogue d'un worker qui n'a pas vu les créations faites par les autres."""
+    catalog = CatalogCollection("product_types", "/api/v1/config/product-types", title_key="title",
+                                miss_refresh_interval=miss_refresh_interval)
+    catalog.load({"total_count": 1, "items": [{"id": 1, "title": "Product Types 1"}]})
+    catalog._loaded_at -= 60
+    return catalog
+
+
+def test_unknown_id_triggers_a_refresh():
+    catalog = _stale_product_types(miss_refresh_interval=5)
+    assert catalog.get(15)["title"] == "Product Types 15"
+    assert catalog.stats()["miss_refreshes"] == 1
+
+
+def test_unknown_title_triggers_a_refresh():
+    # Unicité des titres : un titre créé par un autre worker doit être vu
+    catalog = _stale_product_types(miss_refresh_interval=5)
+    assert catalog.find_by_title("product types 12")["id"] == 12
+
+
+def test_miss_refreshes_are_rate_limited():
+    catalog = _stale_product_types(miss_refresh_interval=5)
+    assert catalog.get(999) is None
+    assert catalog.get(998) is None
+    assert catalog.find_by_title("nope") is None
+    assert catalog.stats()["miss_refreshes"] == 1
+
+
+def test_write_through_and_lookup_on_the_same_worker(client):
+    from utils.catalog import product_types_catalog
+
+    created = client.post("/api/product-types", json={"title": "Weekly digest", "description": "x"})
+    assert created.status_code == 200
+    found = product_types_catalog.find_by_title("weekly DIGEST")
+    assert found is not None and found["id"] == created.get_json()["id"]
+
+
+def test_duplicate_title_created_on_another_worker_is_rejected(client):
+    from utils.catalog import product_types_catalog
+
+    product_types_catalog.load({"total_count": 0, "items": []})
+    product_types_catalog._loaded_at -= 60
+
+    response = client.post("/api/product-types", json={"title": "Product Types 3"})
+    assert response.status_code == 409
@@ -0,0 +1,89 @@
+import time
+
+import pytest
+import requests
+
+from utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from utils.upstream import UpstreamClient, route_family
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("config/roles", failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        breaker.record_failure()
+        assert breaker.state == CLOSED and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_success_resets_failure_count():
+    breaker = CircuitBreaker("config/roles", failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker("config/roles", failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    # Un seul appel de test à la fois
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.allow()
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker("config/roles", failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.stats()["opened"] == 2
+    assert not breaker.allow()
+
+
+class _FailingWrites:
+    """Session qui répond 500 aux écritures et 200 aux GET."""
+
+    def request(self, method, url, **kwargs):
+        response = requests.Response()
+        response.status_code = 200 if method == "GET" else 500
+        response._content = b"{}"
+        response.url = url
+        return response
+
+
+def test_write_errors_do_not_open_the_circuit():
+    client = UpstreamClient(coalesce_gets=False, conditional_cache_size=0)
+    client._local.session = _FailingWrites()
+    url = "http://taranis/api/v1/config/roles"
+    breaker = client.breakers.get(route_family(url))
+
+    for _ in range(breaker.failure_threshold + 1):
+        assert client.post(url, json={}).status_code == 500
+    assert breaker.state == CLOSED
+    assert client.get(url).status_code == 200
+
+
+def test_write_connection_errors_open_the_circuit():
+    client = UpstreamClient(coalesce_gets=False, conditional_cache_size=0)
+    client._local.session = requests.Session()
+    url = "http://127.0.0.1:9/api/v1/config/roles"
+    breaker = client.breakers.get(route_family(url))
+
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            client.post(url, json={})
+    assert breaker.state == OPEN
@@ -0,0 +1,21 @@
+def test_etag_and_304(client):
+    first = client.get("/api/access-control/users")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    second = client.get("/api/access-control/users", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.get_data() == b""
+
+
+def test_changed_etag_returns_full_body(client):
+    response = client.get("/api/access-control/users", headers={"If-None-Match": '"stale"'})
+    assert response.status_code == 200
+    assert response.get_json()["items"]
+
+
+def test_errors_are_not_etagged(client):
+    response = client.get("/api/assess/vulnerabilities?cursor=xyz")
+    assert response.status_code == 400
+    assert "ETag" not in response.headers
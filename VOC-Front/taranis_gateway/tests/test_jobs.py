@@ -0,0 +1,159 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+
+import pytest
+
+from utils import jobs
+from utils.jobs import FAILED, SUCCEEDED, JobQueue, JobStore, RetryableError, job_queue
+
+
+def _wait(get, job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = get(job_id)
+        if job is not None and job["status"] in jobs.FINISHED:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} non terminé")
+
+
+def test_publish_job_lifecycle(client):
+    response = client.post("/api/publish/products/7/publish-jobs", json={"preset_ids": ["a", "b", "a"]})
+    assert response.status_code == 202
+    created = response.get_json()
+    assert response.headers["Location"] == created["status_url"]
+
+    def poll(job_id):
+        r = client.get(f"/api/publish/jobs/{job_id}")
+        assert r.status_code == 200
+        return r.get_json()
+
+    job = _wait(poll, created["job_id"])
+    assert job["status"] == SUCCEEDED and job["product_id"] == 7
+    assert [task["target"] for task in job["tasks"]] == ["a", "b"]
+    assert job["progress"] == {"done": 2, "total": 2, "percent": 100}
+
+
+def test_job_visible_from_another_worker(client):
+    job_id = client.post("/api/publish/products/3/publish-jobs", json={"preset_ids": ["x"]}).get_json()["job_id"]
+    _wait(job_queue.get, job_id)
+
+    # Un autre worker gunicorn ne connaît le job que par le fichier partagé
+    other_worker = JobQueue(workers=1, store=JobStore(job_queue.store.path))
+    job = other_worker.get(job_id)
+    assert job["status"] == SUCCEEDED and job["tasks"][0]["target"] == "x"
+
+
+def test_unknown_job_is_404(client):
+    assert client.get("/api/publish/jobs/inconnu").status_code == 404
+
+
+def test_retryable_task_fails_after_max_attempts(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "JOBS_BACKOFF_BASE", 0.01)
+    queue = JobQueue(workers=2, store=JobStore(str(tmp_path / "jobs.sqlite3")))
+
+    def run(target):
+        if target == "ko":
+            raise RetryableError("Taranis a répondu 503")
+        return target
+
+    job = queue.submit("publish", ["ok", "ko"], run)
+    job = _wait(queue.get, job.id)
+    assert job["status"] == jobs.PARTIAL
+    ok, ko = job["tasks"]
+    assert ok["status"] == SUCCEEDED and ok["attempts"] == 1
+    assert ko["status"] == FAILED and ko["attempts"] == jobs.JOBS_MAX_ATTEMPTS
+    assert queue.stats()["retries"] == jobs.JOBS_MAX_ATTEMPTS - 1
+
+
+def test_job_of_a_dead_worker_is_reported_failed(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    job = jobs.Job("publish", ["a"], lambda target: target)
+    store.save(job)
+    assert store.load(job.id)["status"] == jobs.QUEUED
+
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    store._connection().execute("UPDATE jobs SET pid = ? WHERE id = ?", (dead.pid, job.id))
+
+    assert store.load(job.id)["status"] == FAILED
+
+
+def _orphan(store, statuses, meta=None):
+    """Job enregistré par un worker arrêté, avec une tâche par statut."""
+    job = jobs.Job("publish", [f"t{i}" for i in range(len(statuses))], None, meta)
+    for task, status in zip(job.tasks, statuses):
+        task["status"] = status
+    store.save(job)
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    store._connection().execute("UPDATE jobs SET pid = ? WHERE id = ?", (dead.pid, job.id))
+    return job.id
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/stat"), reason="date de démarrage lue dans /proc")
+def test_reused_pid_is_not_taken_for_the_worker(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    job = jobs.Job("publish", ["a"], lambda target: target)
+    store.save(job)
+    # Même PID (process vivant) mais pas le même démarrage : le worker d'origine n'existe plus
+    store._connection().execute("UPDATE jobs SET pid = ?, started = started + 1 WHERE id = ?", (os.getpid(), job.id))
+    assert store.load(job.id)["status"] == FAILED
+
+
+def test_orphaned_job_is_resumed_on_startup(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    job_id = _orphan(store, [jobs.QUEUED, jobs.RETRYING, jobs.RUNNING, SUCCEEDED], meta={"product_id": 7})
+
+    queue = JobQueue(workers=1, store=store)
+    queue.register("publish", lambda meta: lambda target: f"{meta['product_id']}/{target}")
+    queue.ensure_started()
+
+    job = _wait(queue.get, job_id)
+    assert job["product_id"] == 7 and job["status"] == jobs.PARTIAL
+    assert [task["status"] for task in job["tasks"]] == [SUCCEEDED, SUCCEEDED, FAILED, SUCCEEDED]
+    assert [task["result"] for task in job["tasks"][:2]] == ["7/t0", "7/t1"]
+    # La tâche en cours au moment de l'arrêt n'est pas rejouée
+    assert job["tasks"][2]["attempts"] == 0
+    assert queue.stats()["recovered"] == 1
+    assert store.orphans() == []
+
+
+def test_orphaned_job_is_resumed_once(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    job_id = _orphan(store, [jobs.QUEUED])
+    (data, pid, started), = store.orphans(job_id)
+    assert store.claim(job_id, pid, started)
+    assert not store.claim(job_id, pid, started)
+
+
+def test_polling_resumes_an_orphaned_job(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    queue = JobQueue(workers=1, store=store)
+    queue.register("publish", lambda meta: lambda target: target)
+    queue.ensure_started()
+
+    job_id = _orphan(store, [jobs.QUEUED])
+    assert _wait(queue.get, job_id)["status"] == SUCCEEDED
+
+
+def test_orphan_without_runner_is_reported_failed(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    queue = JobQueue(workers=1, store=store)
+    job_id = _orphan(store, [jobs.QUEUED])
+    assert queue.get(job_id)["status"] == FAILED
+
+
+def test_jobs_file_of_a_previous_version_is_migrated(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    sqlite3.connect(path).execute(
+        "CREATE TABLE jobs (id TEXT PRIMARY KEY, pid INTEGER NOT NULL, finished INTEGER NOT NULL, "
+        "updated_at REAL NOT NULL, data BLOB NOT NULL)"
+    )
+    store = JobStore(path)
+    job = jobs.Job("publish", ["a"], lambda target: target)
+    store.save(job)
+    assert store.load(job.id)["status"] == jobs.QUEUED
@@ -0,0 +1,146 @@
+import pytest
+import requests
+from werkzeug.datastructures import MultiDict
+
+from tests.conftest import MOCK_URL
+from utils.list_query import LIST_MAX_LIMIT, InvalidListQuery, compile_projector, parse_list_query
+
+USERS = {
+    "total_count": 3,
+    "extra": "upstream only",
+    "items": [
+        {"id": 1, "name": "Zoé", "tag": "a", "roles": [{"id": 1, "name": "admin"}], "collector": {"type": "RSS", "id": 4}},
+        {"id": 2, "name": "alice", "tag": "b", "roles": [{"id": 2, "name": "user"}, {"id": 1, "name": "admin"}]},
+        {"id": 3, "name": None, "tag": "a"},
+    ],
+}
+
+
+def _query(default_fields=None, filters=("id", "name", "tag", "roles.name"), **params):
+    return parse_list_query(MultiDict(params), default_fields=default_fields, filters=filters)
+
+
+def test_projection_keeps_nested_paths():
+    project = compile_projector(("id", "collector.type", "roles.name"))
+    assert project(USERS["items"][0]) == {"id": 1, "collector": {"type": "RSS"}, "roles": [{"name": "admin"}]}
+
+
+def test_alias_flattens_a_path():
+    project = compile_projector(("id", "roles:roles[].name"))
+    assert project(USERS["items"][1]) == {"id": 2, "roles": ["user", "admin"]}
+
+
+def test_missing_list_path_defaults_to_empty_list():
+    # Même résultat que l'ancienne vue user.get("roles", [])
+    assert compile_projector(("roles:roles[].name",))(USERS["items"][2]) == {"roles": []}
+    assert compile_projector(("roles[].name",))(USERS["items"][2]) == {"roles": []}
+    assert compile_projector(("roles:roles.name",))(USERS["items"][2]) == {"roles": None}
+
+
+def test_empty_query_returns_the_payload_untouched():
+    query = _query()
+    assert query.is_empty
+    assert query.apply(USERS) is USERS
+
+
+def test_result_only_carries_the_list_envelope():
+    result = _query(fields="id").apply(USERS)
+    assert result == {"total_count": 3, "items": [{"id": 1}, {"id": 2}, {"id": 3}]}
+
+
+def test_filters_sort_and_pagination():
+    result = _query(fields="id", sort="-name", offset="0", limit="2", tag="a").apply(USERS)
+    # Filtre tag=a (2 items), tri décroissant insensible à la casse, valeur absente en dernier
+    assert result == {"total_count": 2, "items": [{"id": 1}, {"id": 3}], "offset": 0, "limit": 2}
+
+
+def test_repeated_filter_is_an_or_and_matches_inside_lists():
+    assert [i["id"] for i in _query(**{"roles.name": "admin"}).apply(USERS)["items"]] == [1, 2]
+    query = parse_list_query(MultiDict([("id", "1"), ("id", "3")]), filters=("id",))
+    assert [i["id"] for i in query.apply(USERS)["items"]] == [1, 3]
+
+
+def test_multi_key_sort():
+    result = _query(fields="id", sort="tag,-id").apply(USERS)
+    assert [item["id"] for item in result["items"]] == [3, 1, 2]
+
+
+@pytest.mark.parametrize("params", [
+    {"fields": ""}, {"fields": "a..b"}, {"sort": "na me"}, {"offset": "-1"}, {"offset": "x"},
+    {"nmae": "alice"}, {"collector.type": "RSS"}, {"limit": "abc"}, {"limit": "0"}, {"limit": "-5"}, {"limit": "1.5"},
+])
+def test_invalid_queries(params):
+    with pytest.raises(InvalidListQuery):
+        _query(**params)
+
+
+def test_limit_is_capped():
+    assert _query(limit="999999").limit == LIST_MAX_LIMIT
+
+
+def test_search_and_cache_buster_are_ignored():
+    assert _query(search="x", _="123").is_empty
+
+
+def test_users_default_view_matches_the_former_hand_written_one(client):
+    raw = requests.get(f"{MOCK_URL}/api/v1/config/users").json()
+    expected = {
+        "total_count": raw.get("total_count", 0),
+        "items": [
+            {
+                "id": user.get("id"),
+                "username": user.get("username"),
+                "name": user.get("name"),
+                "roles": [role.get("name") for role in user.get("roles", [])],
+                "organizations": [org.get("name") for org in user.get("organizations", [])],
+                "tag": user.get("tag"),
+            }
+            for user in raw.get("items", [])
+        ],
+    }
+    assert client.get("/api/access-control/users").get_json() == expected
+
+
+def test_bots_nodes_default_view(client):
+    item = client.get("/api/bots-nodes").get_json()["items"][0]
+    assert item == {"id": 1, "title": "Bots Nodes 1", "description": item["description"],
+                    "url": "https://bots-1.local:5000", "tag": item["tag"]}
+
+
+def test_unknown_filter_is_rejected_before_calling_taranis(client):
+    response = client.get("/api/osint-sources?colector.type=RSS_COLLECTOR")
+    assert response.status_code == 400
+    assert "colector.type" in response.get_json()["error"]
+
+
+def test_route_filters_and_projection(client):
+    body = client.get("/api/osint-sources?collector.type=RSS_COLLECTOR&fields=id,collector.type&limit=5").get_json()
+    assert len(body["items"]) == 5
+    assert all(item["collector"] == {"type": "RSS_COLLECTOR"} and set(item) == {"id", "collector"} for item in body["items"])
+
+
+def test_proxied_list_without_parameters_is_relayed_as_is(client):
+    response = client.get("/api/access-control/roles")
+    assert response.get_data() == requests.get(f"{MOCK_URL}/api/v1/config/roles").content
+
+
+def test_upstream_errors_are_not_reshaped(client, monkeypatch):
+    import routes.access_control_routes as access_control_routes
+
+    class _Error:
+        status_code = 503
+
+        def json(self):
+            return {"error": "Taranis en maintenance"}
+
+    monkeypatch.setattr(access_control_routes, "taranis_request", lambda *args, **kwargs: _Error())
+    response = client.get("/api/access-control/users")
+    assert response.status_code == 503
+    assert response.get_json() == {"error": "Taranis en maintenance"}
+
+
+@pytest.mark.parametrize("limit", ["abc", "0"])
+def test_invalid_limit_is_rejected_before_calling_taranis(client, limit):
+    response = client.get(f"/api/osint-sources?limit={limit}")
+    assert response.status_code == 400
+    assert "limit" in response.get_json()["error"]
@@ -0,0 +1,59 @@
+import json
+
+from utils.metrics import MetricsRegistry
+
+
+class _Worker(MetricsRegistry):
+    def __init__(self, worker, directory):
+        super().__init__(multiproc_dir=str(directory), flush_interval=60)
+        self.worker = worker
+        self.requests = self.counter("gateway_test_requests_total", "Requêtes", ("route",))
+        self.in_flight = self.gauge("gateway_test_in_flight", "En cours")
+        self.duration = self.histogram("gateway_test_duration_seconds", "Durée", buckets=(0.1, 1.0))
+
+    def worker_id(self):
+        return self.worker
+
+
+def test_single_process_render(client):
+    body = client.get("/metrics").get_data(as_text=True)
+    assert "# TYPE gateway_http_request_duration_seconds histogram" in body
+    assert 'worker="' not in body
+
+
+def test_scrape_aggregates_every_worker(tmp_path):
+    a, b = _Worker("101", tmp_path), _Worker("102", tmp_path)
+    a.requests.inc("/x", amount=3)
+    b.requests.inc("/x", amount=4)
+    a.in_flight.set(2)
+    b.in_flight.set(5)
+    a.duration.observe(0.05)
+    b.duration.observe(0.5)
+    a.flush()
+
+    # Le scrape arrive sur b : le total reste celui des deux workers
+    body = b.render()
+    assert 'gateway_test_requests_total{route="/x"} 7' in body
+    assert 'gateway_test_in_flight{worker="101"} 2' in body
+    assert 'gateway_test_in_flight{worker="102"} 5' in body
+    assert 'gateway_test_duration_seconds_bucket{le="0.1"} 1' in body
+    assert 'gateway_test_duration_seconds_bucket{le="1.0"} 2' in body
+    assert "gateway_test_duration_seconds_count 2" in body
+    # ... et il ne baisse pas quand le scrape suivant tombe sur a
+    assert 'gateway_test_requests_total{route="/x"} 7' in a.render()
+
+
+def test_stopped_worker_keeps_its_counters_but_not_its_gauges(tmp_path):
+    a, b = _Worker("101", tmp_path), _Worker("102", tmp_path)
+    a.requests.inc("/x", amount=3)
+    a.in_flight.set(2)
+    a.flush()
+    # Worker recyclé : son fichier n'est plus mis à jour
+    snapshot = tmp_path / "worker-101.json"
+    data = json.loads(snapshot.read_text())
+    data["written_at"] -= 1000
+    snapshot.write_text(json.dumps(data))
+
+    body = b.render()
+    assert 'gateway_test_requests_total{route="/x"} 3' in body
+    assert 'worker="101"' not in body
@@ -0,0 +1,73 @@
+from tests.conftest import MOCK_NEWS_ITEMS
+from utils.news_sync import GroupMirror, news_sync
+from utils.upstream import upstream
+from utils.vulnerabilities import news_item_aggregates_url
+
+
+def _mirror(page_size=50):
+    return GroupMirror("sync-tests", page_size=page_size)
+
+
+def test_sync_is_opt_in(client):
+    assert news_sync.mirrors == {}
+    assert client.get("/api/assess/news-item-aggregates-by-group/1/changes").status_code == 404
+
+
+def test_full_sync_loads_the_group_without_filling_response_caches():
+    mirror = _mirror()
+    assert mirror.sync() == MOCK_NEWS_ITEMS
+    assert mirror.ready and len(list(mirror.items())) == MOCK_NEWS_ITEMS
+    assert mirror.item(MOCK_NEWS_ITEMS)["id"] == MOCK_NEWS_ITEMS
+
+    url = news_item_aggregates_url("sync-tests")
+    cached = list(upstream._validated) + list(upstream._last_good)
+    assert not [key for key in cached if key.startswith(url)]
+
+
+def _listing(without=()):
+    items = GroupMirror("sync-tests", page_size=MOCK_NEWS_ITEMS)._fetch_page(0)
+    return [item for item in items if item["id"] not in without]
+
+
+def test_item_missed_by_one_pass_is_not_deleted(monkeypatch):
+    mirror = _mirror()
+    mirror.sync()
+    # Premier parcours : l'item 150 a glissé d'une page à l'autre et n'a pas été lu
+    listings = [_listing(without={150}), _listing()]
+    passes = []
+
+    def fetch_page(offset):
+        if offset == 0:
+            passes.append(listings[len(passes)])
+        return passes[-1][offset:offset + mirror.page_size]
+
+    monkeypatch.setattr(mirror, "_fetch_page", fetch_page)
+    assert mirror.sync(full=True) == 0
+    assert len(passes) == 2
+    assert mirror.item(150) is not None
+    assert mirror.changes_since(mirror.version)["deleted"] == []
+
+
+def test_item_missing_twice_is_deleted(monkeypatch):
+    mirror = _mirror()
+    mirror.sync()
+    version = mirror.version
+    listing = _listing(without={150})
+    monkeypatch.setattr(mirror, "_fetch_page", lambda offset: listing[offset:offset + mirror.page_size])
+
+    assert mirror.sync(full=True) == 1
+    assert mirror.item(150) is None
+    assert mirror.changes_since(version)["deleted"] == ["150"]
+
+
+def test_version_from_another_copy_gives_a_full_reload():
+    mirror, other = _mirror(), _mirror()
+    mirror.sync()
+    version = mirror.version
+
+    assert mirror.changes_since(version, epoch=mirror.epoch)["full"] is False
+    # Même numéro de version, mais numéroté par un autre worker (ou avant un redémarrage)
+    changes = mirror.changes_since(version, epoch=other.epoch)
+    assert changes["full"] is True and len(changes["changed"]) == MOCK_NEWS_ITEMS
+    assert changes["epoch"] == mirror.epoch
+    assert mirror.changes_since(version, epoch="")["full"] is True
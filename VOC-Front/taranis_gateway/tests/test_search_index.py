@@ -0,0 +1,40 @@
+from tests.conftest import MOCK_NEWS_ITEMS
+from utils import search_index
+from utils.news_sync import GroupMirror
+from utils.search_index import InvertedIndex, MirrorSearchIndex
+
+
+def test_prefix_expansion_follows_adds_and_removes():
+    index = InvertedIndex()
+    index.add("1", {"title": "Microsoft Exchange"})
+    index.add("2", {"title": "Microcode update"})
+    assert {doc for doc, _ in index.search("micro")} == {"1", "2"}
+
+    index.remove("2")
+    assert [doc for doc, _ in index.search("micro")] == ["1"]
+    index.add("3", {"title": "Microtik router"})
+    assert {doc for doc, _ in index.search("micro")} == {"1", "3"}
+    assert index.search("microcode ") == []
+
+
+def test_catch_up_indexes_the_mirror_in_batches(monkeypatch):
+    monkeypatch.setattr(search_index, "SEARCH_INDEX_BATCH", 64)
+    batches = []
+    add_many = InvertedIndex.add_many
+
+    def counted(self, documents):
+        documents = list(documents)
+        batches.append(len(documents))
+        add_many(self, documents)
+
+    monkeypatch.setattr(InvertedIndex, "add_many", counted)
+
+    mirror = GroupMirror("search-tests", page_size=100)
+    index = MirrorSearchIndex(mirror)
+    mirror.sync()
+
+    assert index.ready and len(index.index) == MOCK_NEWS_ITEMS
+    assert max(batches) == 64 and sum(batches) == MOCK_NEWS_ITEMS
+    title = mirror.item(42)["title"]
+    total, items = index.page(title.split()[0], 0, 10)
+    assert total >= 1 and any(item["id"] == 42 for item in items)
@@ -0,0 +1,90 @@
+import base64
+import json
+import threading
+import time
+
+import pytest
+
+from utils import taranis_auth
+from utils.taranis_auth import TaranisTokenManager, decode_jwt_expiry
+
+
+def _jwt(exp):
+    encode = lambda data: base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+    return f"{encode({'alg': 'HS256'})}.{encode({'exp': exp})}.sig"
+
+
+@pytest.fixture
+def manager(mock_taranis):
+    manager = TaranisTokenManager(mock_taranis, "admin", "admin", refresh_margin=60)
+    yield manager
+    if manager._timer is not None:
+        manager._timer.cancel()
+
+
+def test_decode_jwt_expiry():
+    assert decode_jwt_expiry(_jwt(1234)) == 1234
+    assert decode_jwt_expiry("not-a-jwt") is None
+
+
+def test_token_is_cached(manager):
+    token = manager.get_token()
+    assert manager.get_token() == token
+    assert manager.stats()["logins"] == 1
+    assert manager.stats()["cache_hits"] == 1
+
+
+def test_refresh_is_scheduled_before_expiry(manager, monkeypatch):
+    monkeypatch.setattr(manager, "_login", lambda: _jwt(time.time() + 3600))
+    manager.get_token()
+    assert 3530 < manager._timer.interval <= 3540
+
+
+@pytest.mark.parametrize("ttl", [60, 30, 1, -5])
+def test_short_lived_token_does_not_refresh_every_second(manager, monkeypatch, ttl):
+    # TTL inférieur ou égal à la marge : renouvellement à mi-vie, jamais en boucle
+    monkeypatch.setattr(manager, "_login", lambda: _jwt(time.time() + ttl))
+    manager.get_token()
+    assert manager._timer.interval >= max(ttl * 0.5, taranis_auth.TOKEN_MIN_REFRESH_DELAY) - 0.1
+
+
+def test_failed_background_refresh_backs_off(manager, monkeypatch):
+    manager.get_token()
+
+    def fail():
+        raise ConnectionError("Taranis injoignable")
+
+    monkeypatch.setattr(manager, "_login", fail)
+    delays = []
+    for _ in range(10):
+        manager._background_refresh()
+        delays.append(manager._timer.interval)
+
+    assert delays[:4] == [2, 4, 8, 16]
+    assert max(delays) == taranis_auth.TOKEN_RETRY_MAX
+
+    monkeypatch.setattr(manager, "_login", lambda: _jwt(time.time() + 3600))
+    manager._background_refresh()
+    assert manager._refresh_failures == 0
+    assert manager._timer.interval > 3000
+
+
+@pytest.mark.parametrize("ttl", [10, 5])
+def test_short_lived_token_is_served_from_cache(manager, monkeypatch, ttl):
+    # Marge de fraîcheur proportionnelle à la durée de vie : pas un login par appel
+    monkeypatch.setattr(manager, "_login", lambda: _jwt(time.time() + ttl))
+    token = manager.get_token()
+    for _ in range(5):
+        assert manager.get_token() == token
+    assert manager.stats()["logins"] == 1
+    assert manager.stats()["cache_hits"] == 5
+
+
+def test_cache_hit_counter_is_exact_across_threads(manager):
+    manager.get_token()
+    threads = [threading.Thread(target=lambda: [manager.get_token() for _ in range(500)]) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert manager.stats()["cache_hits"] == 4000
@@ -0,0 +1,54 @@
+from utils.upstream import UpstreamClient, route_family
+
+
+def test_connections_are_reused(mock_taranis):
+    client = UpstreamClient(coalesce_gets=False)
+    for _ in range(5):
+        assert client.get(f"{mock_taranis}/api/v1/config/roles").status_code == 200
+
+    stats = client.stats()
+    assert stats["requests"] == 5
+    assert stats["connections_opened"] == 1
+    assert stats["connections_reused"] == 4
+
+
+def test_conditional_get_reuses_cached_body_on_304(mock_taranis):
+    client = UpstreamClient(coalesce_gets=False)
+    first = client.get(f"{mock_taranis}/api/v1/config/organizations")
+    second = client.get(f"{mock_taranis}/api/v1/config/organizations")
+
+    assert second.json() == first.json()
+    assert client.stats()["conditional_requests"] == 1
+    assert client.stats()["not_modified"] == 1
+
+
+def test_route_family():
+    assert route_family("https://taranis/api/v1/config/osint-sources/3") == "config/osint-sources"
+    assert route_family("https://taranis/api/v1/auth/login") == "auth/login"
+
+
+def test_coalesced_callers_share_one_decode(mock_taranis, monkeypatch):
+    import threading
+    import time
+
+    import utils.upstream as upstream_module
+
+    client = UpstreamClient()
+    send_get = client._send_get
+    # Appel Taranis lent : les requêtes identiques arrivent pendant qu'il tourne
+    monkeypatch.setattr(client, "_send_get", lambda url, **kwargs: (time.sleep(0.2), send_get(url, **kwargs))[1])
+    decodes = []
+    decode_response = upstream_module.decode_response
+    monkeypatch.setattr(upstream_module, "decode_response", lambda response: decodes.append(1) or decode_response(response))
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(client.get(f"{mock_taranis}/api/v1/config/users").json()))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert client.stats()["coalescing"]["config/users"]["upstream_calls"] == 1
+    assert len(decodes) == 1
+    assert all(result is results[0] for result in results)
@@ -0,0 +1,106 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.test import EnvironBuilder
+
+from utils.fanout import FANOUT_DEADLINE, fan_out
+from utils.fast_json import loads
+
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "20"))
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", "16"))
+BATCH_METHODS = ("GET", "POST", "PUT", "DELETE")
+# En-têtes du client recopiés sur chaque sous-requête
+FORWARDED_HEADERS = ("Authorization", "Accept-Language")
+
+# Pool distinct de celui du fan-out : une sous-requête peut elle-même faire un fan-out
+_executor = ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS, thread_name_prefix="batch")
+
+
+class InvalidBatch(ValueError):
+    pass
+
+
+def parse_batch(payload):
+    """Sous-requêtes validées : [{"id", "method", "path", "query", "body", "headers"}]."""
+    entries = payload.get("requests") if isinstance(payload, dict) else None
+    if not isinstance(entries, list) or not entries:
+        raise InvalidBatch("Le corps doit contenir une liste non vide 'requests'")
+    if len(entries) > BATCH_MAX_REQUESTS:
+        raise InvalidBatch(f"{BATCH_MAX_REQUESTS} sous-requêtes maximum par batch")
+
+    batch = []
+    for position, entry in enumerate(entries):
+        if not isinstance(entry, dict) or not isinstance(entry.get("path"), str):
+            raise InvalidBatch(f"Sous-requête {position} : 'path' manquant")
+        method = str(entry.get("method", "GET")).upper()
+        path = entry["path"]
+        if method not in BATCH_METHODS:
+            raise InvalidBatch(f"Sous-requête {position} : méthode {method} non supportée")
+        if not path.startswith("/api/") or path.rstrip("/") == "/api/batch":
+            raise InvalidBatch(f"Sous-requête {position} : chemin {path} non autorisé")
+        batch.append({
+            "id": str(entry.get("id", position)),
+            "method": method,
+            "path": path,
+            "query": entry.get("query") or {},
+            "body": entry.get("body"),
+            "headers": entry.get("headers") or {},
+        })
+    if len({sub["id"] for sub in batch}) != len(batch):
+        raise InvalidBatch("Les 'id' des sous-requêtes doivent être uniques")
+    return batch
+
+
+def _dispatch(app, sub, headers):
+    """Exécute une sous-requête sur les routes de la gateway, sans passer par le réseau."""
+    # Les corps sont réinsérés dans le JSON du batch : jamais de sous-réponse compressée
+    sub_headers = {name: value for name, value in sub["headers"].items() if name.lower() != "accept-encoding"}
+    builder = EnvironBuilder(
+        path=sub["path"],
+        method=sub["method"],
+        query_string=sub["query"],
+        headers={**headers, **sub_headers},
+        json=sub["body"] if sub["body"] is not None else None,
+    )
+    try:
+        with app.request_context(builder.get_environ()):
+            response = app.full_dispatch_request()
+    finally:
+        builder.close()
+
+    try:
+        # Octets relayés tels quels (utils/passthrough.py) : get_data() refuse le mode direct_passthrough
+        raw = b"".join(response.response) if response.direct_passthrough else response.get_data()
+    finally:
+        response.close()
+    body = raw.decode("utf-8", "replace")
+    if response.mimetype == "application/json" and body:
+        try:
+            body = loads(body)
+        except ValueError:
+            pass
+    kept = {name: response.headers[name] for name in ("ETag", "X-Gateway-Stale", "Retry-After") if name in response.headers}
+    return {"id": sub["id"], "status": response.status_code, "headers": kept, "body": body}
+
+
+def run_batch(app, batch, client_headers, deadline=FANOUT_DEADLINE):
+    """Toutes les sous-requêtes en parallèle ; un résultat par sous-requête, dans l'ordre reçu."""
+    headers = {name: client_headers[name] for name in FORWARDED_HEADERS if name in client_headers}
+    result = fan_out(
+        {sub["id"]: (lambda sub=sub: _dispatch(app, sub, headers)) for sub in batch},
+        deadline=deadline,
+        executor=_executor
+    )
+    responses = []
+    for sub in batch:
+        if result.ok(sub["id"]):
+            responses.append(result.get(sub["id"]))
+        else:
+            timed_out = result.errors[sub["id"]].startswith("timeout")
+            responses.append({
+                "id": sub["id"],
+                "status": 504 if timed_out else 500,
+                "headers": {},
+                "body": {"error": result.errors[sub["id"]]},
+            })
+    return responses
@@ -0,0 +1,95 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.taranis_auth import taranis_request
+
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "1000"))
+# Appels Taranis simultanés pour l'ensemble des requêtes bulk du worker
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "8"))
+
+BULK_OPERATIONS = {"create": "POST", "update": "PUT", "delete": "DELETE"}
+
+_executor = ThreadPoolExecutor(max_workers=BULK_CONCURRENCY, thread_name_prefix="bulk")
+
+
+class InvalidBulk(ValueError):
+    pass
+
+
+def parse_bulk(payload):
+    """Opérations d'un corps {"create": [...], "update": [{"id", ...}], "delete": [id, ...]}."""
+    if not isinstance(payload, dict) or not any(payload.get(op) for op in BULK_OPERATIONS):
+        raise InvalidBulk("Le corps doit contenir au moins une liste 'create', 'update' ou 'delete'")
+
+    operations = []
+    for op in BULK_OPERATIONS:
+        entries = payload.get(op) or []
+        if not isinstance(entries, list):
+            raise InvalidBulk(f"'{op}' doit être une liste")
+        for index, entry in enumerate(entries):
+            if op == "delete":
+                item_id = entry.get("id") if isinstance(entry, dict) else entry
+                data = None
+            elif isinstance(entry, dict):
+                item_id, data = entry.get("id"), entry
+            else:
+                raise InvalidBulk(f"{op}[{index}] doit être un objet")
+            if op != "create" and item_id in (None, ""):
+                raise InvalidBulk(f"{op}[{index}] : 'id' manquant")
+            operations.append({"op": op, "index": index, "id": item_id, "data": data})
+
+    if len(operations) > BULK_MAX_ITEMS:
+        raise InvalidBulk(f"{BULK_MAX_ITEMS} opérations maximum par requête")
+    return operations
+
+
+def _execute(catalog, operation, prepare):
+    op, item_id, data = operation["op"], operation["id"], operation["data"]
+    if prepare is not None and data is not None:
+        data = prepare(op, dict(data))
+    url = catalog.url if op == "create" else f"{catalog.url}/{item_id}"
+    result = {"op": op, "index": operation["index"], "id": item_id}
+    try:
+        res = taranis_request(BULK_OPERATIONS[op], url, json=data)
+    except Exception as e:
+        return {**result, "ok": False, "status": 502, "error": str(e)}
+
+    try:
+        body = res.json() if res.content else None
+    except ValueError:
+        body = res.text
+    if op == "create" and isinstance(body, dict) and body.get("id") is not None:
+        result["id"] = body["id"]
+    if res.ok:
+        return {**result, "ok": True, "status": res.status_code, "body": body}
+    return {**result, "ok": False, "status": res.status_code, "error": body}
+
+
+def run_bulk(catalog, operations, prepare=None):
+    """Exécute les opérations en parallèle (BULK_CONCURRENCY) puis recharge le catalogue une seule fois.
+
+    `prepare(op, data)` complète le corps envoyé à Taranis (ids générés, ...).
+    """
+    results = list(_executor.map(lambda operation: _execute(catalog, operation, prepare), operations))
+
+    succeeded = sum(1 for result in results if result["ok"])
+    if succeeded:
+        # Un seul rechargement de la liste à la fin, au lieu d'un write-through par item
+        catalog.invalidate()
+        try:
+            catalog.refresh()
+        except Exception as e:
+            logging.warning(f"[Gateway] Rechargement catalogue {catalog.name} après bulk échoué : {e}")
+
+    return {
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results,
+    }
+
+
+def bulk_status(summary):
+    """200 si tout est passé, 207 (Multi-Status) si une partie a échoué."""
+    return 200 if summary["failed"] == 0 else 207
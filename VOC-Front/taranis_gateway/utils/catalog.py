@@ -0,0 +1,337 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from utils.fast_json import dumps, loads
+from utils.metrics import metrics
+from utils.taranis_auth import TARANIS_BASE_URL, taranis_request
+
+# Durée de validité d'une collection avant rechargement depuis Taranis
+CATALOG_TTL = float(os.getenv("CATALOG_TTL", "300"))
+# Rafraîchissement périodique en tâche de fond (0 = uniquement à l'expiration du TTL)
+CATALOG_REFRESH_INTERVAL = float(os.getenv("CATALOG_REFRESH_INTERVAL", "0"))
+# Id ou titre inconnu (créé par un autre worker ?) : rechargement au plus une fois par intervalle
+CATALOG_MISS_REFRESH_INTERVAL = float(os.getenv("CATALOG_MISS_REFRESH_INTERVAL", "5"))
+# Clés jamais gardées en mémoire (comparaison insensible à la casse, sur une partie du nom)
+SECRET_KEYS = ("password", "secret", "token", "api_key")
+
+
+def normalize_title(title):
+    return title.strip().lower() if isinstance(title, str) else None
+
+
+def extract_items(payload):
+    """Taranis renvoie selon les endpoints une liste brute ou {"items": [...], "total_count": n}."""
+    if isinstance(payload, dict):
+        return payload.get("items", [])
+    return payload if isinstance(payload, list) else []
+
+
+def response_version(res):
+    """Version d'une réponse Taranis : son ETag, sinon une empreinte du corps brut."""
+    etag = res.headers.get("ETag")
+    if etag:
+        return etag
+    return hashlib.blake2b(res.content, digest_size=16).hexdigest()
+
+
+def without_secrets(value):
+    """Copie d'un item Taranis sans les champs sensibles (mots de passe, clés d'API...)."""
+    if isinstance(value, dict):
+        return {
+            key: without_secrets(child) for key, child in value.items()
+            if not any(secret in str(key).lower() for secret in SECRET_KEYS)
+        }
+    if isinstance(value, list):
+        return [without_secrets(child) for child in value]
+    return value
+
+
+def with_items(payload, items):
+    """Nouvelle réponse Taranis avec une autre liste d'items (le payload reçu n'est pas modifié)."""
+    if not isinstance(payload, dict):
+        return items
+    payload = {**payload, "items": items}
+    if "total_count" in payload:
+        payload["total_count"] = len(items)
+    return payload
+
+
+class CatalogCollection:
+    """Copie locale d'une collection de configuration Taranis, indexée par id et par titre.
+
+    La collection est rechargée à l'expiration du TTL (un seul rechargement à
+    la fois) et mise à jour en write-through par les routes POST/PUT/DELETE,
+    ce qui évite de télécharger toute la collection pour une recherche par id.
+    """
+
+    def __init__(self, name, path, title_key="name", ttl=CATALOG_TTL, miss_refresh_interval=CATALOG_MISS_REFRESH_INTERVAL):
+        self.name = name
+        self.path = path
+        self.title_key = title_key
+        self.ttl = ttl
+        self.miss_refresh_interval = miss_refresh_interval
+
+        self._payload = None
+        self._version = None
+        self._by_id = {}
+        self._by_title = {}
+        self._loaded_at = 0.0
+        self._miss_checked_at = 0.0
+        # Réentrant : le rechargement (sous le verrou) appelle load(), qui le reprend
+        self._lock = threading.RLock()
+        self._counters = {"hits": 0, "misses": 0, "refreshes": 0, "refresh_failures": 0, "writes": 0,
+                          "miss_refreshes": 0, "unchanged_loads": 0}
+
+    @property
+    def url(self):
+        return f"{TARANIS_BASE_URL}{self.path}"
+
+    def is_fresh(self):
+        return self._payload is not None and time.time() - self._loaded_at < self.ttl
+
+    def load(self, payload, version=None):
+        """Remplace le contenu local par une réponse complète de Taranis.
+
+        version (cf. response_version) : une liste identique à celle déjà chargée
+        ne fait que prolonger le TTL, sans copie ni réindexation.
+        """
+        # Sous le verrou des écritures : un write-through n'est jamais appliqué à un index remplacé
+        with self._lock:
+            if version is not None and version == self._version and self._payload is not None:
+                self._counters["unchanged_loads"] += 1
+                self._loaded_at = time.time()
+                return
+            # Copie profonde : le JSON décodé peut être partagé entre requêtes fusionnées (utils/upstream.py)
+            payload = loads(dumps(payload))
+            by_id, by_title = {}, {}
+            for item in extract_items(payload):
+                if isinstance(item, dict) and item.get("id") is not None:
+                    by_id[str(item["id"])] = item
+                    title = normalize_title(item.get(self.title_key))
+                    if title is not None:
+                        by_title[title] = str(item["id"])
+            # Échange des index d'un coup : les lecteurs ne voient jamais un état partiel
+            self._by_id, self._by_title, self._payload = by_id, by_title, payload
+            self._version = version
+            self._loaded_at = time.time()
+
+    def refresh(self):
+        res = taranis_request("GET", self.url)
+        if res.status_code != 200:
+            self._counters["refresh_failures"] += 1
+            raise RuntimeError(f"Taranis response: {res.status_code}")
+        self._counters["refreshes"] += 1
+        self.load(res.json(), response_version(res))
+
+    def ensure_fresh(self):
+        if self.is_fresh():
+            self._counters["hits"] += 1
+            return
+        with self._lock:
+            if self.is_fresh():
+                self._counters["hits"] += 1
+                return
+            self._counters["misses"] += 1
+            self.refresh()
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = 0.0
+            self._version = None
+
+    def _refresh_after_miss(self):
+        """Recharge la collection après un id/titre inconnu ; True si le contenu est à jour.
+
+        Chaque worker gunicorn a son propre catalogue et le write-through ne met à
+        jour que celui qui a traité l'écriture : un élément inconnu ici peut avoir
+        été créé ailleurs. Le rechargement est limité à un par miss_refresh_interval.
+        """
+        if time.time() - max(self._loaded_at, self._miss_checked_at) < self.miss_refresh_interval:
+            return False
+        with self._lock:
+            if time.time() - max(self._loaded_at, self._miss_checked_at) < self.miss_refresh_interval:
+                return True
+            self._miss_checked_at = time.time()
+            self._counters["miss_refreshes"] += 1
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.warning(f"[Gateway] Rechargement catalogue {self.name} après un miss échoué : {e}")
+                return False
+        return True
+
+    # === Lectures ===
+
+    def payload(self):
+        """Réponse complète telle que renvoyée par Taranis (pour les listes)."""
+        self.ensure_fresh()
+        return self._payload
+
+    def get(self, item_id):
+        self.ensure_fresh()
+        item = self._by_id.get(str(item_id))
+        if item is None and self._refresh_after_miss():
+            item = self._by_id.get(str(item_id))
+        return item
+
+    def find_by_title(self, title):
+        self.ensure_fresh()
+        item = self._find_by_title(title)
+        if item is None and self._refresh_after_miss():
+            item = self._find_by_title(title)
+        return item
+
+    def _find_by_title(self, title):
+        item_id = self._by_title.get(normalize_title(title))
+        return self._by_id.get(item_id) if item_id is not None else None
+
+    # === Écritures (write-through après succès côté Taranis) ===
+
+    def _upsert(self, item):
+        item_id = str(item["id"])
+        with self._lock:
+            previous = self._by_id.get(item_id)
+            if previous is not None:
+                old_title = normalize_title(previous.get(self.title_key))
+                if self._by_title.get(old_title) == item_id:
+                    del self._by_title[old_title]
+            self._by_id[item_id] = item
+            title = normalize_title(item.get(self.title_key))
+            if title is not None:
+                self._by_title[title] = item_id
+            self._replace_in_payload(item_id, item)
+            # Contenu local différent de la version chargée : la prochaine liste sera réindexée
+            self._version = None
+            self._counters["writes"] += 1
+
+    def _replace_in_payload(self, item_id, item):
+        # Nouvelle liste échangée d'un coup : une réponse en cours de sérialisation n'est jamais modifiée
+        items = list(extract_items(self._payload))
+        for index, existing in enumerate(items):
+            if isinstance(existing, dict) and str(existing.get("id")) == item_id:
+                items[index] = item
+                break
+        else:
+            items.append(item)
+        self._payload = with_items(self._payload, items)
+
+    def _record_written(self, res):
+        """Write-through à partir de la réponse de Taranis uniquement.
+
+        Le corps de la requête n'est jamais mis en cache (mot de passe d'un
+        utilisateur...). Une réponse qui n'est pas l'item complet (id et titre)
+        invalide la collection, rechargée à la prochaine lecture.
+        """
+        if not res.ok or self._payload is None:
+            return
+        try:
+            body = res.json()
+        except ValueError:
+            body = None
+        if not isinstance(body, dict) or body.get("id") is None or self.title_key not in body:
+            self.invalidate()
+            return
+        self._upsert(without_secrets(body))
+
+    def record_created(self, res):
+        self._record_written(res)
+
+    def record_updated(self, res):
+        self._record_written(res)
+
+    def record_deleted(self, item_id, res):
+        if not res.ok or self._payload is None:
+            return
+        item_id = str(item_id)
+        with self._lock:
+            item = self._by_id.pop(item_id, None)
+            if item is None:
+                return
+            title = normalize_title(item.get(self.title_key))
+            if self._by_title.get(title) == item_id:
+                del self._by_title[title]
+            items = [i for i in extract_items(self._payload) if not (isinstance(i, dict) and str(i.get("id")) == item_id)]
+            self._payload = with_items(self._payload, items)
+            self._version = None
+            self._counters["writes"] += 1
+
+    def stats(self):
+        return {
+            **self._counters,
+            "size": len(self._by_id),
+            "age": round(time.time() - self._loaded_at, 1) if self._payload is not None else None,
+        }
+
+
+users_catalog = CatalogCollection("users", "/api/v1/config/users", title_key="username")
+osint_sources_catalog = CatalogCollection("osint_sources", "/api/v1/config/osint-sources")
+osint_source_groups_catalog = CatalogCollection("osint_source_groups", "/api/v1/config/osint-source-groups")
+bots_presets_catalog = CatalogCollection("bots_presets", "/api/v1/config/bots-presets")
+publishers_presets_catalog = CatalogCollection("publishers_presets", "/api/v1/config/publishers-presets")
+product_types_catalog = CatalogCollection("product_types", "/api/v1/config/product-types", title_key="title")
+word_lists_catalog = CatalogCollection("word_lists", "/api/v1/config/word-lists")
+
+CATALOGS = [
+    users_catalog,
+    osint_sources_catalog,
+    osint_source_groups_catalog,
+    bots_presets_catalog,
+    publishers_presets_catalog,
+    product_types_catalog,
+    word_lists_catalog,
+]
+
+
+class CatalogRefresher:
+    """Recharge périodiquement toutes les collections (thread démarré à la demande,
+    donc après le fork des workers gunicorn)."""
+
+    def __init__(self, interval=CATALOG_REFRESH_INTERVAL):
+        self.interval = interval
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        if self.interval <= 0 or (self._thread is not None and self._pid == os.getpid()):
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="catalog-refresher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            for catalog in CATALOGS:
+                try:
+                    catalog.refresh()
+                except Exception as e:
+                    logging.warning(f"[Gateway] Rafraîchissement catalogue {catalog.name} échoué : {e}")
+            time.sleep(self.interval)
+
+
+catalog_refresher = CatalogRefresher()
+
+
+def catalog_stats():
+    return {catalog.name: catalog.stats() for catalog in CATALOGS}
+
+
+@metrics.collector
+def collect_catalog_metrics():
+    stats = catalog_stats()
+    yield ("gateway_catalog_hits_total", "counter", "Lectures servies par le catalogue en mémoire",
+           [({"catalog": name}, values["hits"]) for name, values in stats.items()])
+    yield ("gateway_catalog_misses_total", "counter", "Lectures ayant nécessité un rechargement depuis Taranis",
+           [({"catalog": name}, values["misses"]) for name, values in stats.items()])
+    yield ("gateway_catalog_refresh_failures_total", "counter", "Rechargements du catalogue échoués",
+           [({"catalog": name}, values["refresh_failures"]) for name, values in stats.items()])
+    yield ("gateway_catalog_items", "gauge", "Éléments en mémoire par collection",
+           [({"catalog": name}, values["size"]) for name, values in stats.items()])
+    yield ("gateway_catalog_age_seconds", "gauge", "Âge du dernier chargement par collection",
+           [({"catalog": name}, values["age"]) for name, values in stats.items()])
@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+
+from flask import g, has_request_context, jsonify
+from requests.exceptions import ConnectionError as RequestsConnectionError
+
+# Échecs consécutifs avant d'ouvrir le circuit d'une famille de routes : timeout, erreur réseau
+# ou 5xx d'un GET ; pour les écritures, seules les erreurs de connexion comptent
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+# Durée d'ouverture avant de laisser passer un appel de test (semi-ouvert)
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(RequestsConnectionError):
+    """Taranis n'est pas appelé : le circuit de cette famille de routes est ouvert."""
+
+    def __init__(self, family, retry_after):
+        super().__init__(f"Circuit ouvert pour {family} (Taranis dégradé), nouvel essai dans {retry_after:.0f}s")
+        self.family = family
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Disjoncteur d'une famille de routes Taranis (closed -> open -> half_open -> closed)."""
+
+    def __init__(self, family, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, reset_timeout=CIRCUIT_RESET_TIMEOUT):
+        self.family = family
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self._counters = {"opened": 0, "rejected": 0, "failures": 0}
+
+    def retry_after(self):
+        return max(self.opened_at + self.reset_timeout - time.time(), 0.0)
+
+    def allow(self):
+        """True si l'appel peut partir vers Taranis."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and self.retry_after() == 0.0:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                # Un seul appel de test à la fois pendant la phase semi-ouverte
+                self._probe_in_flight = True
+                return True
+            self._counters["rejected"] += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def release(self):
+        """Appel terminé sans verdict sur l'état de Taranis (ex. écriture refusée en 5xx)."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._counters["failures"] += 1
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self._counters["opened"] += 1
+                self.state = OPEN
+                self.opened_at = time.time()
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "retry_after": round(self.retry_after(), 1) if self.state != CLOSED else 0.0,
+            **self._counters,
+        }
+
+
+class CircuitBreakers:
+    """Un disjoncteur par famille de routes, créé au premier appel."""
+
+    def __init__(self):
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, family):
+        breaker = self._breakers.get(family)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(family, CircuitBreaker(family))
+        return breaker
+
+    def stats(self):
+        return {family: breaker.stats() for family, breaker in list(self._breakers.items())}
+
+
+def mark_stale(age):
+    """Signale à la réponse Flask en cours qu'au moins une donnée Taranis est périmée."""
+    if has_request_context():
+        g.upstream_stale_age = max(getattr(g, "upstream_stale_age", 0), age)
+
+
+def add_stale_headers(response):
+    age = getattr(g, "upstream_stale_age", None)
+    if age is not None:
+        response.headers["X-Gateway-Stale"] = str(int(age))
+        response.headers["Warning"] = '110 - "Response is Stale"'
+        response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+def circuit_open_response(error):
+    response = jsonify({"error": str(error), "circuit": error.family})
+    response.status_code = 503
+    response.headers["Retry-After"] = str(int(error.retry_after) + 1)
+    return response
+
+
+def init_stale_responses(app):
+    app.after_request(add_stale_headers)
+    app.register_error_handler(CircuitOpenError, circuit_open_response)
@@ -0,0 +1,29 @@
+from flask import request
+
+# Types de réponses pour lesquels un ETag est calculé
+CONDITIONAL_MIMETYPES = ("application/json",)
+
+
+def add_conditional_headers(response):
+    """Ajoute un ETag fort aux réponses GET et répond 304 si If-None-Match correspond.
+
+    Le validateur est calculé sur le corps final (donc aussi sur les réponses
+    transformées par la gateway, ex. get_users ou get_bots_nodes) : une liste
+    inchangée ne coûte plus que des en-têtes au client qui la re-interroge.
+    """
+    if request.method != "GET" or response.status_code != 200:
+        return response
+    if response.is_streamed or response.direct_passthrough:
+        return response
+    if response.mimetype not in CONDITIONAL_MIMETYPES:
+        return response
+
+    if "ETag" not in response.headers:
+        response.add_etag()
+    # Le navigateur peut garder la réponse, mais doit la revalider à chaque fois
+    response.headers.setdefault("Cache-Control", "no-cache")
+    return response.make_conditional(request)
+
+
+def init_conditional_responses(app):
+    app.after_request(add_conditional_headers)
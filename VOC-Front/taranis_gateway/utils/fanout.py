@@ -0,0 +1,50 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from utils.server_timing import propagate
+
+# Délai global partagé par tous les appels d'un même fan-out (secondes)
+FANOUT_DEADLINE = float(os.getenv("FANOUT_DEADLINE", "15"))
+FANOUT_MAX_WORKERS = int(os.getenv("FANOUT_MAX_WORKERS", "16"))
+
+_executor = ThreadPoolExecutor(max_workers=FANOUT_MAX_WORKERS, thread_name_prefix="fanout")
+
+
+class FanoutResult:
+    """Résultats d'un fan-out : valeurs des appels réussis et erreurs des autres."""
+
+    def __init__(self):
+        self.values = {}
+        self.errors = {}
+
+    def get(self, name, default=None):
+        return self.values.get(name, default)
+
+    def ok(self, name):
+        return name in self.values
+
+
+def fan_out(calls, deadline=FANOUT_DEADLINE, executor=None):
+    """Exécute en parallèle des appels upstream indépendants sous un délai commun.
+
+    `calls` associe un nom à une fonction sans argument. Un appel qui échoue ou
+    dépasse le délai n'interrompt pas les autres : il est reporté dans `errors`.
+    """
+    executor = executor or _executor
+    # Les appels restent comptés dans le Server-Timing de la requête d'origine
+    futures = {name: executor.submit(propagate(call)) for name, call in calls.items()}
+    wait(futures.values(), timeout=deadline)
+
+    result = FanoutResult()
+    for name, future in futures.items():
+        if not future.done():
+            future.cancel()
+            result.errors[name] = f"timeout after {deadline}s"
+            continue
+        try:
+            result.values[name] = future.result()
+        except Exception as e:
+            logging.warning(f"[Gateway] Fan-out {name} échoué : {e}")
+            result.errors[name] = str(e)
+    return result
@@ -0,0 +1,86 @@
+import json
+import os
+
+from flask.json.provider import DefaultJSONProvider
+
+from utils.server_timing import phase
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson absent : bibliothèque standard
+    orjson = None
+
+# "orjson" (défaut si installé) ou "stdlib" pour forcer le module json standard
+JSON_BACKEND = os.getenv("GATEWAY_JSON_BACKEND", "orjson" if orjson is not None else "stdlib")
+USE_ORJSON = orjson is not None and JSON_BACKEND == "orjson"
+
+if USE_ORJSON:
+    _BASE_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def loads(data):
+    """Décode du JSON (str ou bytes)."""
+    if USE_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj, sort_keys=False, default=None):
+    """Encode en JSON compact UTF-8 (bytes)."""
+    if USE_ORJSON:
+        option = _BASE_OPTIONS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(obj, default=default, option=option)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), sort_keys=sort_keys, default=default).encode()
+
+
+def decode_response(response):
+    """Équivalent de response.json() pour une réponse Taranis (corps UTF-8)."""
+    if USE_ORJSON:
+        return orjson.loads(response.content)
+    return response.json()
+
+
+class GatewayJSONProvider(DefaultJSONProvider):
+    """Provider JSON de l'app Flask : orjson si disponible, même sortie que le provider par défaut.
+
+    Clés triées et dates au format HTTP comme DefaultJSONProvider ; un objet
+    qu'orjson refuse (entier > 64 bits, ...) repasse par la bibliothèque standard.
+    Le temps d'encodage est compté dans la phase Server-Timing "serialize".
+    """
+
+    def _options(self):
+        # Les dates passent par default() pour garder le format http_date de Flask
+        option = _BASE_OPTIONS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if self.compact is False or (self.compact is None and self._app.debug):
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        if not USE_ORJSON or kwargs:
+            return super().dumps(obj, **kwargs)
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._options()).decode()
+        except TypeError:
+            return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if USE_ORJSON and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        with phase("serialize"):
+            if not USE_ORJSON:
+                return super().response(*args, **kwargs)
+            obj = self._prepare_response_obj(args, kwargs)
+            try:
+                body = orjson.dumps(obj, default=self.default, option=self._options())
+            except TypeError:
+                return super().response(*args, **kwargs)
+            return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+
+
+def init_json(app):
+    app.json = GatewayJSONProvider(app)
@@ -0,0 +1,422 @@
+import logging
+import os
+import queue
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from utils.fast_json import dumps, loads
+from utils.metrics import metrics
+
+# Threads qui exécutent les tâches (une tâche = un appel Taranis, ex. un preset de publication)
+JOBS_WORKERS = int(os.getenv("JOBS_WORKERS", "4"))
+# Nombre maximum de tâches en attente dans un worker gunicorn (la limite n'est pas globale :
+# N workers acceptent jusqu'à N fois cette valeur) ; au-delà, les nouveaux jobs sont refusés (503)
+JOBS_MAX_PENDING = int(os.getenv("JOBS_MAX_PENDING", "200"))
+JOBS_MAX_ATTEMPTS = int(os.getenv("JOBS_MAX_ATTEMPTS", "3"))
+# Attente avant un nouvel essai : base * 2^(essai-1), avec un peu d'aléa
+JOBS_BACKOFF_BASE = float(os.getenv("JOBS_BACKOFF_BASE", "2"))
+JOBS_BACKOFF_MAX = float(os.getenv("JOBS_BACKOFF_MAX", "60"))
+# Jobs terminés gardés pour le polling
+JOBS_RETENTION = int(os.getenv("JOBS_RETENTION", "1000"))
+# Fichier SQLite partagé par les workers gunicorn : l'état de chaque job y est recopié
+# à chaque changement, le polling peut donc arriver sur n'importe quel worker
+JOBS_DB = os.getenv("JOBS_DB", os.path.join(tempfile.gettempdir(), "taranis_gateway_jobs.sqlite3"))
+
+QUEUED, RUNNING, RETRYING, SUCCEEDED, FAILED, PARTIAL = "queued", "running", "retrying", "succeeded", "failed", "partial"
+FINISHED = (SUCCEEDED, FAILED, PARTIAL)
+# Clés de Job.to_dict qui ne viennent pas de `meta`
+JOB_FIELDS = ("job_id", "kind", "status", "progress", "created_at", "finished_at", "tasks")
+
+
+class QueueFull(Exception):
+    def __init__(self, pending, requested, max_pending):
+        super().__init__(f"File de jobs pleine ({pending} tâches en attente, {requested} demandées, max {max_pending})")
+
+
+class RetryableError(Exception):
+    """Échec temporaire (timeout, 5xx, 429) : la tâche sera retentée."""
+
+
+class Job:
+    """Un job = plusieurs tâches indépendantes exécutées en parallèle par le pool."""
+
+    def __init__(self, kind, targets, run, meta=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.meta = meta or {}
+        self.run = run
+        self.created_at = time.time()
+        self.finished_at = None
+        self.tasks = [
+            {"target": target, "status": QUEUED, "attempts": 0, "result": None, "error": None, "next_attempt_at": None}
+            for target in targets
+        ]
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_dict(cls, data, runner):
+        """Job reconstruit depuis son état enregistré ; `runner(meta)` fournit la fonction des tâches."""
+        meta = {key: value for key, value in data.items() if key not in JOB_FIELDS}
+        job = cls(data["kind"], (), runner(meta), meta)
+        job.id = data["job_id"]
+        job.created_at = data["created_at"]
+        job.tasks = [dict(task) for task in data["tasks"]]
+        return job
+
+    @property
+    def status(self):
+        statuses = {task["status"] for task in self.tasks}
+        if statuses <= {SUCCEEDED}:
+            return SUCCEEDED
+        if statuses <= {FAILED}:
+            return FAILED
+        if statuses <= {SUCCEEDED, FAILED}:
+            return PARTIAL
+        return QUEUED if statuses == {QUEUED} else RUNNING
+
+    def to_dict(self):
+        with self._lock:
+            tasks = [dict(task) for task in self.tasks]
+        done = sum(1 for task in tasks if task["status"] in (SUCCEEDED, FAILED))
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            **self.meta,
+            "status": self.status,
+            "progress": {"done": done, "total": len(tasks), "percent": round(100 * done / len(tasks)) if tasks else 100},
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "tasks": tasks,
+        }
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def _process_start_time(pid):
+    """Démarrage du process en ticks depuis le boot (/proc/<pid>/stat), None s'il n'existe pas.
+
+    Avec le PID, identifie un worker sans ambiguïté : un PID réutilisé par un
+    autre process n'a pas la même date de démarrage.
+    """
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as stat:
+            # Le nom du process (champ 2, entre parenthèses) peut contenir des espaces
+            fields = stat.read().rsplit(b")", 1)[1].split()
+    except OSError:
+        return None
+    return int(fields[19])  # champ 22 : starttime
+
+
+def _current_worker():
+    pid = os.getpid()
+    return pid, _process_start_time(pid) or 0
+
+
+def _worker_alive(pid, started):
+    # started = 0 : pas de /proc (ou ligne d'une version précédente), on ne peut vérifier que le PID
+    if started:
+        return _process_start_time(pid) == started
+    return _process_alive(pid)
+
+
+class JobStore:
+    """État des jobs (dict de Job.to_dict) dans un fichier SQLite commun aux workers."""
+
+    def __init__(self, path=JOBS_DB):
+        self.path = path
+        self._local = threading.local()
+        # État lu et écrit sous le même verrou : le dernier enregistré est toujours le plus récent
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        # Une connexion par thread et par process (jamais héritée d'un fork)
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, pid INTEGER NOT NULL, finished INTEGER NOT NULL, "
+                "updated_at REAL NOT NULL, data BLOB NOT NULL, started INTEGER NOT NULL DEFAULT 0)"
+            )
+            if "started" not in {column[1] for column in connection.execute("PRAGMA table_info(jobs)")}:
+                try:
+                    connection.execute("ALTER TABLE jobs ADD COLUMN started INTEGER NOT NULL DEFAULT 0")
+                except sqlite3.OperationalError:
+                    pass  # ajoutée entre-temps par un autre worker
+            connection.execute("CREATE INDEX IF NOT EXISTS jobs_updated_at ON jobs (updated_at)")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def save(self, job):
+        with self._lock:
+            data = job.to_dict()
+            pid, started = _current_worker()
+            self._connection().execute(
+                "INSERT OR REPLACE INTO jobs (id, pid, started, finished, updated_at, data) VALUES (?, ?, ?, ?, ?, ?)",
+                (job.id, pid, started, data["status"] in FINISHED, time.time(), dumps(data)),
+            )
+
+    def load(self, job_id):
+        """Dict du job, ou None ; un job dont le worker a disparu (et que personne n'a repris) est rendu en échec."""
+        row = self._connection().execute(
+            "SELECT pid, started, finished, data FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        pid, started, finished, data = row
+        data = loads(data)
+        if not finished and not _worker_alive(pid, started):
+            data["status"] = FAILED
+            data["error"] = "Le worker qui exécutait le job s'est arrêté avant la fin"
+        return data
+
+    def orphans(self, job_id=None):
+        """Jobs inachevés dont le worker s'est arrêté : liste de (dict du job, pid, started)."""
+        sql = "SELECT pid, started, data FROM jobs WHERE NOT finished"
+        rows = self._connection().execute(sql + " AND id = ?", (job_id,)) if job_id else self._connection().execute(sql)
+        return [(loads(data), pid, started) for pid, started, data in rows if not _worker_alive(pid, started)]
+
+    def claim(self, job_id, pid, started):
+        """Rattache au worker courant un job orphelin ; False si un autre worker l'a repris avant."""
+        with self._lock:
+            current_pid, current_started = _current_worker()
+            cursor = self._connection().execute(
+                "UPDATE jobs SET pid = ?, started = ?, updated_at = ? "
+                "WHERE id = ? AND pid = ? AND started = ? AND NOT finished",
+                (current_pid, current_started, time.time(), job_id, pid, started),
+            )
+            return cursor.rowcount == 1
+
+    def prune(self, retention=JOBS_RETENTION):
+        self._connection().execute(
+            "DELETE FROM jobs WHERE finished AND id NOT IN (SELECT id FROM jobs ORDER BY updated_at DESC LIMIT ?)",
+            (retention,),
+        )
+
+
+class JobQueue:
+    """File de tâches en mémoire avec pool de workers, nouveaux essais et limite de profondeur.
+
+    Les tâches s'exécutent dans le worker gunicorn qui a reçu le job ; leur état
+    est recopié dans `store`, lu par les autres workers pour le polling.
+
+    Un worker recyclé (max_requests) ou tué abandonne les tâches en cours. Au
+    démarrage d'un worker, et quand on interroge un tel job, les tâches encore
+    en attente sont reprises par le worker courant si le type du job a une
+    fonction enregistrée (`register`) ; une tâche qui était en cours n'est pas
+    rejouée (l'appel a pu atteindre Taranis) et passe en échec.
+    """
+
+    def __init__(self, workers=JOBS_WORKERS, max_pending=JOBS_MAX_PENDING, store=None):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.store = store if store is not None else JobStore()
+        self._queue = queue.Queue()
+        self._jobs = OrderedDict()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._threads = []
+        self._pid = None
+        self.runners = {}
+        self._counters = {"submitted": 0, "rejected": 0, "retries": 0, "succeeded": 0, "failed": 0, "recovered": 0}
+
+    def register(self, kind, runner):
+        """`runner(meta)` renvoie la fonction `run(target)` des jobs de ce type (pour reprendre un job orphelin)."""
+        self.runners[kind] = runner
+
+    def ensure_started(self):
+        if self._threads and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._threads and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._threads = [
+                threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+        self._recover()
+
+    def submit(self, kind, targets, run=None, meta=None):
+        """Crée un job d'une tâche par cible ; `run(target)` renvoie le résultat ou lève une exception.
+
+        Sans `run`, la fonction enregistrée pour `kind` est utilisée.
+        """
+        self.ensure_started()
+        job = Job(kind, targets, run or self.runners[kind](meta or {}), meta)
+        with self._lock:
+            if self._pending + len(job.tasks) > self.max_pending:
+                self._counters["rejected"] += 1
+                raise QueueFull(self._pending, len(job.tasks), self.max_pending)
+            self._pending += len(job.tasks)
+            self._counters["submitted"] += 1
+            self._jobs[job.id] = job
+            self._evict()
+        self._save(job)
+        self._prune()
+        for index in range(len(job.tasks)):
+            self._queue.put((job, index))
+        return job
+
+    def get(self, job_id):
+        """État du job (dict), qu'il ait été reçu par ce worker ou par un autre."""
+        job = self._jobs.get(job_id)
+        if job is None and self.runners:
+            self.ensure_started()
+            self._recover(job_id)
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        return self.store.load(job_id)
+
+    def recover(self, job_id=None):
+        """Reprend les jobs orphelins (tous, ou `job_id`) dont le type a une fonction enregistrée."""
+        recovered = []
+        for data, pid, started in self.store.orphans(job_id):
+            runner = self.runners.get(data["kind"])
+            if runner is None or not self.store.claim(data["job_id"], pid, started):
+                continue
+            job = Job.from_dict(data, runner)
+            pending, interrupted = [], 0
+            for index, task in enumerate(job.tasks):
+                if task["status"] == RUNNING:
+                    task.update(status=FAILED, next_attempt_at=None,
+                                error="Tâche interrompue par l'arrêt du worker, non rejouée")
+                    interrupted += 1
+                elif task["status"] in (QUEUED, RETRYING):
+                    task["next_attempt_at"] = None
+                    pending.append(index)
+            if job.status in FINISHED:
+                job.finished_at = time.time()
+            with self._lock:
+                self._pending += len(pending)
+                self._counters["failed"] += interrupted
+                self._counters["recovered"] += 1
+                self._jobs[job.id] = job
+                self._evict()
+            self._save(job)
+            for index in pending:
+                self._queue.put((job, index))
+            logging.warning(
+                f"[Gateway] Job {job.id} repris du worker {pid} arrêté : "
+                f"{len(pending)} tâche(s) relancée(s), {interrupted} interrompue(s)"
+            )
+            recovered.append(job)
+        return recovered
+
+    def _recover(self, job_id=None):
+        try:
+            self.recover(job_id)
+        except Exception as e:
+            logging.warning(f"[Gateway] Reprise des jobs de {self.store.path} impossible : {e}")
+
+    def _save(self, job):
+        try:
+            self.store.save(job)
+        except Exception as e:
+            logging.warning(f"[Gateway] Job {job.id} : état non enregistré dans {self.store.path} : {e}")
+
+    def _prune(self):
+        try:
+            self.store.prune()
+        except Exception as e:
+            logging.warning(f"[Gateway] Nettoyage des jobs de {self.store.path} impossible : {e}")
+
+    def _evict(self):
+        while len(self._jobs) > JOBS_RETENTION:
+            oldest = next((job_id for job_id, job in self._jobs.items() if job.status in FINISHED), None)
+            if oldest is None:
+                return
+            del self._jobs[oldest]
+
+    def _work(self):
+        while True:
+            job, index = self._queue.get()
+            try:
+                self._run_task(job, index)
+            except Exception as e:
+                logging.error(f"[Gateway] Job {job.id} : erreur inattendue : {e}")
+
+    def _run_task(self, job, index):
+        task = job.tasks[index]
+        with job._lock:
+            task["status"] = RUNNING
+            task["attempts"] += 1
+            task["next_attempt_at"] = None
+        self._save(job)
+        try:
+            result = job.run(task["target"])
+        except RetryableError as e:
+            if task["attempts"] < JOBS_MAX_ATTEMPTS:
+                self._retry_later(job, index, e)
+                return
+            self._finish(job, task, FAILED, error=str(e))
+        except Exception as e:
+            self._finish(job, task, FAILED, error=str(e))
+        else:
+            self._finish(job, task, SUCCEEDED, result=result)
+
+    def _retry_later(self, job, index, error):
+        task = job.tasks[index]
+        delay = min(JOBS_BACKOFF_BASE * 2 ** (task["attempts"] - 1), JOBS_BACKOFF_MAX)
+        delay *= random.uniform(0.8, 1.2)
+        with job._lock:
+            task["status"] = RETRYING
+            task["error"] = str(error)
+            task["next_attempt_at"] = time.time() + delay
+        self._save(job)
+        self._counters["retries"] += 1
+        logging.warning(f"[Gateway] Job {job.id} tâche {task['target']} : nouvel essai dans {delay:.1f}s ({error})")
+        timer = threading.Timer(delay, self._queue.put, args=((job, index),))
+        timer.daemon = True
+        timer.start()
+
+    def _finish(self, job, task, status, result=None, error=None):
+        with job._lock:
+            task["status"] = status
+            task["result"] = result
+            task["error"] = error
+        with self._lock:
+            self._pending -= 1
+            self._counters["succeeded" if status == SUCCEEDED else "failed"] += 1
+        if job.status in FINISHED and job.finished_at is None:
+            job.finished_at = time.time()
+        self._save(job)
+
+    def stats(self):
+        return {
+            **self._counters,
+            "pending_tasks": self._pending,
+            "max_pending": self.max_pending,
+            "workers": self.workers,
+            "jobs": len(self._jobs),
+        }
+
+    def collect_metrics(self):
+        yield ("gateway_jobs_pending_tasks", "gauge", "Tâches de jobs en attente ou en cours", [({}, self._pending)])
+        yield ("gateway_jobs_tasks_total", "counter", "Tâches de jobs terminées",
+               [({"status": status}, self._counters[status]) for status in ("succeeded", "failed")])
+        yield ("gateway_jobs_retries_total", "counter", "Nouveaux essais de tâches", [({}, self._counters["retries"])])
+        yield ("gateway_jobs_rejected_total", "counter", "Jobs refusés (file pleine)", [({}, self._counters["rejected"])])
+        yield ("gateway_jobs_recovered_total", "counter", "Jobs repris d'un worker arrêté", [({}, self._counters["recovered"])])
+
+
+job_queue = JobQueue()
+metrics.collector(job_queue.collect_metrics)
@@ -0,0 +1,272 @@
+import os
+import re
+from functools import lru_cache
+
+from flask import jsonify
+
+from utils.catalog import extract_items
+from utils.fast_json import decode_response
+from utils.passthrough import proxy_get, raw_response
+from utils.server_timing import phase
+from utils.taranis_auth import taranis_request
+
+# Taille de page maximale pour ?limit= sur les listes de configuration
+LIST_MAX_LIMIT = int(os.getenv("LIST_MAX_LIMIT", "1000"))
+
+# Paramètres du langage de requête ; les autres sont des filtres d'égalité sur les champs autorisés
+RESERVED_PARAMS = ("fields", "offset", "limit", "sort")
+# Acceptés sans effet : ?search= envoyé par le front (jamais géré) et l'anti-cache des navigateurs
+IGNORED_PARAMS = ("search", "_")
+# Filtres acceptés par défaut : champs communs à toutes les collections de configuration
+LIST_FILTERS = ("id", "name", "title", "tag")
+# Chemin de champ : clés séparées par des points (collector.type) ; "[]" marque une liste,
+# vide par défaut si la clé manque (roles[].name)
+FIELD_PATH = re.compile(r"^[\w-]+(\[\])?(\.[\w-]+(\[\])?)*$")
+
+
+class InvalidListQuery(ValueError):
+    pass
+
+
+def _path(spec, param):
+    if not FIELD_PATH.match(spec):
+        raise InvalidListQuery(f"{param} : champ invalide {spec!r}")
+    return tuple(spec.split("."))
+
+
+def _segment(segment):
+    """"roles[]" -> ("roles", []) : nom de la clé et valeur par défaut si elle manque."""
+    if segment.endswith("[]"):
+        return segment[:-2], []
+    return segment, None
+
+
+def _read(value, key, default):
+    child = value.get(key)
+    return child if child is not None or default is None else []
+
+
+@lru_cache(maxsize=512)
+def compile_path(keys):
+    """Lecture d'un chemin dans un item ; une liste rencontrée en route donne la liste des valeurs."""
+    (key, default), inner = _segment(keys[0]), compile_path(keys[1:]) if len(keys) > 1 else None
+
+    def get(value):
+        if isinstance(value, list):
+            return [get(v) for v in value]
+        if not isinstance(value, dict):
+            return None
+        child = _read(value, key, default)
+        return inner(child) if inner is not None else child
+
+    return get
+
+
+def _compile_tree(tree):
+    """Projection d'une valeur selon un arbre de champs (None = valeur gardée entière)."""
+    steps = [(*_segment(segment), _compile_tree(child) if child is not None else None) for segment, child in tree.items()]
+
+    def project(value):
+        if isinstance(value, list):
+            return [project(v) for v in value]
+        if not isinstance(value, dict):
+            return value
+        return {
+            key: _read(value, key, default) if step is None else step(_read(value, key, default))
+            for key, default, step in steps
+        }
+
+    return project
+
+
+@lru_cache(maxsize=256)
+def compile_projector(fields):
+    """Fonction item -> item réduit, compilée une fois par liste de champs.
+
+    fields : tuple de specs "a", "a.b" (sous-objet réduit, listes comprises) ou
+    "alias:a.b" (valeur lue au chemin, renvoyée à plat sous le nom alias).
+    """
+    entries = {}
+    for spec in fields:
+        alias, _, path = spec.rpartition(":")
+        keys = _path(path, "fields")
+        if alias:
+            _path(alias, "fields")
+            entries[alias] = compile_path(keys)
+            continue
+        node = entries.setdefault(keys[0], {})
+        if not isinstance(node, dict):
+            continue
+        if len(keys) == 1:
+            entries[keys[0]] = None
+            continue
+        for key in keys[1:-1]:
+            child = node.setdefault(key, {})
+            if child is None:
+                break
+            node = child
+        else:
+            node[keys[-1]] = None
+
+    steps = []
+    for segment, entry in entries.items():
+        if callable(entry):
+            steps.append((segment, entry))
+        elif entry is None:
+            steps.append((_segment(segment)[0], compile_path((segment,))))
+        else:
+            subtree = _compile_tree(entry)
+            steps.append((_segment(segment)[0], lambda item, get=compile_path((segment,)), subtree=subtree: subtree(get(item))))
+
+    def project(item):
+        if not isinstance(item, dict):
+            return item
+        return {name: step(item) for name, step in steps}
+
+    return project
+
+
+def _flatten(value):
+    if isinstance(value, list):
+        for v in value:
+            yield from _flatten(v)
+    else:
+        yield value
+
+
+def _as_text(value):
+    """Forme texte d'une valeur, pour la comparer à un paramètre d'URL."""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _sort_key(get):
+    # Nombres avant textes (insensibles à la casse), jamais de comparaison entre types
+    def key(item):
+        value = get(item)
+        if isinstance(value, list):
+            value = value[0] if value else None
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return (1, _as_text(value).casefold()) if value is not None else (2, "")
+        return (0, value)
+    return key
+
+
+class ListQuery:
+    """Filtres, tri, pagination et projection d'une liste de configuration Taranis.
+
+    ?fields=id,title,collector.type,roles:roles.name (ou * pour l'item complet)
+    ?sort=title,-id  ?offset=0&limit=50  ?tag=mdi-rss (égalité sur un champ autorisé, ?tag=a&tag=b = ou)
+    """
+
+    def __init__(self, fields=None, sort=(), offset=0, limit=None, filters=()):
+        self.fields = fields
+        self.sort = sort
+        self.offset = offset
+        self.limit = limit
+        self.filters = filters
+
+    @property
+    def is_empty(self):
+        return self.fields is None and not self.sort and not self.offset and self.limit is None and not self.filters
+
+    def apply(self, payload):
+        """Liste {"total_count", "items"} (+ offset/limit) ; le payload d'origine n'est pas modifié.
+
+        Sans aucun paramètre, le payload Taranis est renvoyé tel quel.
+        """
+        if self.is_empty:
+            return payload
+        with phase("reshape"):
+            items = extract_items(payload)
+            for keys, accepted in self.filters:
+                get = compile_path(keys)
+                items = [item for item in items if any(_as_text(v) in accepted for v in _flatten(get(item)))]
+            total_count = len(items) if self.filters or not isinstance(payload, dict) else payload.get("total_count", len(items))
+
+            # Tris stables successifs, de la clé la moins importante à la plus importante
+            for keys, descending in reversed(self.sort):
+                key = _sort_key(compile_path(keys))
+                items = sorted(items, key=key, reverse=descending)
+                if descending:
+                    # Valeurs absentes toujours en fin de liste
+                    items.sort(key=lambda item: key(item)[0] == 2)
+
+            if self.offset or self.limit is not None:
+                end = None if self.limit is None else self.offset + self.limit
+                items = items[self.offset:end]
+            if self.fields is not None:
+                project = compile_projector(self.fields)
+                items = [project(item) for item in items]
+
+        if not isinstance(payload, dict):
+            return items
+        result = {"total_count": total_count, "items": items}
+        if self.limit is not None:
+            result.update(offset=self.offset, limit=self.limit)
+        return result
+
+
+def parse_list_query(args, default_fields=None, filters=LIST_FILTERS):
+    """ListQuery à partir des paramètres de la requête.
+
+    default_fields : vue réduite par défaut de la route ; filters : champs
+    filtrables (tout autre paramètre inconnu est refusé).
+    """
+    fields = args.get("fields", default_fields)
+    if fields is None or fields.strip() == "*":
+        fields = None
+    else:
+        fields = tuple(dict.fromkeys(spec.strip() for spec in fields.split(",") if spec.strip()))
+        if not fields:
+            raise InvalidListQuery("fields ne doit pas être vide (* pour tous les champs)")
+        # Compilé ici pour valider les champs avant l'appel à Taranis
+        compile_projector(fields)
+
+    sort = []
+    for spec in (s.strip() for s in args.get("sort", "").split(",")):
+        if spec:
+            sort.append((_path(spec.lstrip("-"), "sort"), spec.startswith("-")))
+
+    try:
+        offset = int(args.get("offset") or 0)
+    except ValueError:
+        raise InvalidListQuery("offset doit être un entier")
+    if offset < 0:
+        raise InvalidListQuery("offset doit être >= 0")
+    limit = args.get("limit")
+    if limit in (None, ""):
+        limit = None
+    else:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise InvalidListQuery("limit doit être un entier")
+        if limit <= 0:
+            raise InvalidListQuery("limit doit être > 0")
+        limit = min(limit, LIST_MAX_LIMIT)
+
+    equalities = []
+    for name in args:
+        if name in RESERVED_PARAMS or name in IGNORED_PARAMS:
+            continue
+        if name not in filters:
+            raise InvalidListQuery(f"Paramètre inconnu {name!r} (filtres possibles : {', '.join(filters)})")
+        equalities.append((_path(name, "filtre"), frozenset(args.getlist(name))))
+
+    return ListQuery(fields, tuple(sort), offset, limit, tuple(equalities))
+
+
+def proxy_list(url, query):
+    """GET de liste Taranis : octets relayés tels quels sans paramètre, sinon liste filtrée/projetée."""
+    if query.is_empty:
+        return proxy_get(url)
+    res = taranis_request("GET", url)
+    if res.status_code != 200:
+        return raw_response(res)
+    with phase("decode"):
+        payload = decode_response(res)
+    return jsonify(query.apply(payload)), res.status_code
@@ -0,0 +1,318 @@
+import bisect
+import glob
+import json
+import logging
+import os
+import threading
+import time
+
+from flask import Response, g, request
+
+# Bornes (en secondes) des histogrammes de latence
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_PATH = os.getenv("METRICS_PATH", "/metrics")
+# Répertoire partagé par les workers gunicorn (vide = un seul process) : chaque worker y
+# écrit ses métriques, le scrape les additionne (compteurs, histogrammes) ou les
+# présente par worker (jauges, label "worker")
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR", "")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def family(self):
+        """(nom, type, aide, [(labels, valeur), ...]) : même forme que les collecteurs."""
+        with self._lock:
+            values = list(self._values.items())
+        samples = [(dict(zip(self.labelnames, labels)), value) for labels, value in values]
+        return (self.name, self.kind, self.documentation, samples)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        # Un seul compteur incrémenté par observation ; le cumul par "le" est fait au rendu
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def family(self):
+        # Valeur d'un échantillon : [comptes par bucket (non cumulés), somme, nombre, bornes]
+        with self._lock:
+            values = [(labels, [list(state[0]), state[1], state[2]]) for labels, state in self._values.items()]
+        samples = [(dict(zip(self.labelnames, labels)), value + [list(self.buckets)]) for labels, value in values]
+        return (self.name, self.kind, self.documentation, samples)
+
+
+def _render_histogram(name, labels, value):
+    counts, total, count, buckets = value
+    lines, cumulative = [], 0
+    for bound, bucket_count in zip(tuple(buckets) + (float("inf"),), counts):
+        cumulative += bucket_count
+        lines.append(f"{name}_bucket{_format_labels(labels.keys(), labels.values(), ('le', _format_value(bound)))} {cumulative}")
+    lines.append(f"{name}_sum{_format_labels(labels.keys(), labels.values())} {_format_value(total)}")
+    lines.append(f"{name}_count{_format_labels(labels.keys(), labels.values())} {count}")
+    return lines
+
+
+def render_families(families):
+    """Texte Prometheus à partir de familles (nom, type, aide, [(labels, valeur), ...])."""
+    lines = []
+    for name, kind, documentation, samples in families:
+        lines.append(f"# HELP {name} {documentation}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            if value is None:
+                continue
+            if kind == "histogram":
+                lines.extend(_render_histogram(name, labels, value))
+            else:
+                lines.append(f"{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def _merge_value(kind, current, value):
+    if current is None:
+        return value
+    if kind == "histogram":
+        return [[a + b for a, b in zip(current[0], value[0])], current[1] + value[1], current[2] + value[2], current[3]]
+    return current + value
+
+
+def merge_families(snapshots, live):
+    """Familles de tous les workers : compteurs et histogrammes additionnés (workers arrêtés
+    compris, pour qu'un total ne baisse jamais), jauges des seuls workers vivants avec un label "worker"."""
+    merged = {}
+    for snapshot in snapshots:
+        worker_live = snapshot["worker"] in live
+        for name, kind, documentation, samples in snapshot["families"]:
+            family = merged.setdefault(name, (kind, documentation, {}))
+            for labels, value in samples:
+                if value is None:
+                    continue
+                if kind == "gauge":
+                    if not worker_live:
+                        continue
+                    labels = {**labels, "worker": snapshot["worker"]}
+                key = tuple(sorted(labels.items()))
+                family[2][key] = (labels, _merge_value(kind, family[2].get(key, (None, None))[1], value))
+    return [(name, kind, documentation, list(samples.values())) for name, (kind, documentation, samples) in merged.items()]
+
+
+class MetricsRegistry:
+    """Métriques de la gateway au format texte Prometheus.
+
+    Les compteurs et histogrammes sont alimentés au fil des requêtes ; les
+    collecteurs relisent les statistiques déjà tenues par chaque composant
+    (token, pool, catalogue, ...) au moment du scrape, sans coût par requête.
+
+    Sans multiproc_dir, les valeurs sont celles du worker gunicorn qui répond au
+    scrape (à n'utiliser qu'avec un seul worker). Avec, chaque worker y recopie
+    ses métriques toutes les flush_interval secondes et le scrape les agrège.
+    """
+
+    def __init__(self, multiproc_dir=METRICS_MULTIPROC_DIR, flush_interval=METRICS_FLUSH_INTERVAL):
+        self.multiproc_dir = multiproc_dir
+        self.flush_interval = flush_interval
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+        self._flusher = None
+        self._flusher_pid = None
+
+    def _register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def collector(self, collect):
+        """Enregistre `collect()` qui produit des (nom, type, aide, [(labels, valeur), ...])."""
+        with self._lock:
+            self._collectors.append(collect)
+        return collect
+
+    def families(self):
+        """Métriques de ce process : (nom, type, aide, [(labels, valeur), ...])."""
+        families = [metric.family() for metric in list(self._metrics)]
+        for collect in list(self._collectors):
+            families.extend((name, kind, documentation, list(samples)) for name, kind, documentation, samples in collect())
+        return families
+
+    def render(self):
+        if not self.multiproc_dir:
+            return render_families(self.families())
+        self.flush()
+        return render_families(merge_families(*self._read_snapshots()))
+
+    # === Agrégation multi-process ===
+
+    def worker_id(self):
+        return str(os.getpid())
+
+    def _path(self, worker):
+        return os.path.join(self.multiproc_dir, f"worker-{worker}.json")
+
+    def flush(self):
+        """Écrit les métriques de ce worker dans multiproc_dir (remplacement atomique du fichier)."""
+        worker = self.worker_id()
+        snapshot = {"worker": worker, "written_at": time.time(), "families": self.families()}
+        os.makedirs(self.multiproc_dir, exist_ok=True)
+        tmp = f"{self._path(worker)}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(snapshot, f, default=str)
+        os.replace(tmp, self._path(worker))
+
+    def _read_snapshots(self):
+        snapshots, live = [], set()
+        # Un worker dont le fichier n'est plus mis à jour est considéré arrêté
+        stale_after = max(self.flush_interval * 3, 1)
+        for path in glob.glob(os.path.join(self.multiproc_dir, "worker-*.json")):
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            snapshots.append(snapshot)
+            if time.time() - snapshot["written_at"] < stale_after:
+                live.add(snapshot["worker"])
+        return snapshots, live
+
+    def ensure_flushing(self):
+        if not self.multiproc_dir or (self._flusher is not None and self._flusher_pid == os.getpid()):
+            return
+        with self._lock:
+            if self._flusher is not None and self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+            self._flusher = threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            try:
+                self.flush()
+            except Exception as e:
+                logging.warning(f"[Gateway] Écriture des métriques dans {self.multiproc_dir} impossible : {e}")
+            time.sleep(self.flush_interval)
+
+
+metrics = MetricsRegistry()
+
+process_start_time = metrics.gauge("process_start_time_seconds", "Démarrage du worker (epoch)")
+process_start_time.set(time.time())
+
+http_requests_in_flight = metrics.gauge("gateway_http_requests_in_flight", "Requêtes en cours de traitement par la gateway")
+http_request_duration = metrics.histogram(
+    "gateway_http_request_duration_seconds",
+    "Durée des requêtes gateway par route",
+    ("blueprint", "route", "method", "status"),
+)
+upstream_requests_in_flight = metrics.gauge("gateway_upstream_requests_in_flight", "Appels Taranis en cours", ("family",))
+upstream_request_duration = metrics.histogram(
+    "gateway_upstream_request_duration_seconds",
+    "Durée des appels Taranis par famille de routes (status=error : exception réseau/timeout)",
+    ("family", "method", "status"),
+)
+
+
+def _start_timer():
+    metrics.ensure_flushing()
+    g.metrics_started_at = time.perf_counter()
+    http_requests_in_flight.inc()
+
+
+def _observe_request(response):
+    started_at = g.pop("metrics_started_at", None)
+    if started_at is not None:
+        http_requests_in_flight.dec()
+        rule = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+        http_request_duration.observe(
+            time.perf_counter() - started_at,
+            request.blueprint or "",
+            rule,
+            request.method,
+            str(response.status_code),
+        )
+    return response
+
+
+def metrics_view():
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
+
+
+def init_metrics(app):
+    if not METRICS_ENABLED:
+        return
+    app.before_request(_start_timer)
+    app.after_request(_observe_request)
+    app.add_url_rule(METRICS_PATH, "metrics", metrics_view, methods=["GET"])
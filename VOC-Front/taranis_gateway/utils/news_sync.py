@@ -0,0 +1,249 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from utils.fast_json import dumps
+from utils.taranis_auth import taranis_request
+from utils.vuln_columns import decode_record, encode_record
+from utils.vulnerabilities import GROUP_ID_VULNERABILITIES, news_item_aggregates_url, vulnerability_snapshots
+
+# Copie locale désactivée par défaut : chaque worker gunicorn relit tout le groupe pour son
+# propre compte, avec sa propre numérotation des versions. À n'activer qu'avec GATEWAY_WORKERS=1
+NEWS_SYNC_ENABLED = os.getenv("NEWS_SYNC_ENABLED", "false").lower() == "true"
+# Groupes Taranis gardés à jour localement (ids séparés par des virgules)
+NEWS_SYNC_GROUPS = [g.strip() for g in os.getenv("NEWS_SYNC_GROUPS", GROUP_ID_VULNERABILITIES).split(",") if g.strip()]
+NEWS_SYNC_INTERVAL = float(os.getenv("NEWS_SYNC_INTERVAL", "30"))
+NEWS_SYNC_PAGE_SIZE = int(os.getenv("NEWS_SYNC_PAGE_SIZE", "200"))
+# Toutes les N passes, resynchronisation complète (modifs anciennes, suppressions)
+NEWS_SYNC_FULL_EVERY = int(os.getenv("NEWS_SYNC_FULL_EVERY", "20"))
+# Nombre de suppressions gardées pour le flux ?since=
+NEWS_SYNC_TOMBSTONES = int(os.getenv("NEWS_SYNC_TOMBSTONES", "10000"))
+
+
+def item_fingerprint(item):
+    raw = dumps(item, sort_keys=True, default=str)
+    return hashlib.blake2b(raw, digest_size=16).digest()
+
+
+class GroupMirror:
+    """Copie locale d'un groupe de news-item-aggregates, versionnée.
+
+    Chaque création/modification/suppression incrémente la version du groupe ;
+    `changes_since(v)` renvoie uniquement ce qui a changé après la version v.
+    Les versions ne valent que pour cette copie, identifiée par son `epoch` :
+    une version d'une autre copie (autre worker, redémarrage) donne un rechargement complet.
+    """
+
+    def __init__(self, group_id, page_size=NEWS_SYNC_PAGE_SIZE):
+        self.group_id = group_id
+        self.page_size = page_size
+        self.epoch = uuid.uuid4().hex[:12]
+        self.version = 0
+        self.synced_at = None
+        self.passes = 0
+        # id -> (version, empreinte, item compressé), ordonné par version croissante
+        self._entries = OrderedDict()
+        # id -> version de suppression, ordonné par version croissante
+        self._tombstones = OrderedDict()
+        # Plus ancienne version pour laquelle le flux de suppressions est complet
+        self._tombstones_floor = 0
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    @property
+    def ready(self):
+        return self.synced_at is not None
+
+    def on_change(self, listener):
+        self._listeners.append(listener)
+
+    def items(self):
+        """Items du groupe, décompressés un par un."""
+        with self._lock:
+            blobs = [entry[2] for entry in self._entries.values()]
+        for blob in blobs:
+            yield decode_record(blob)
+
+    def item(self, item_id):
+        with self._lock:
+            entry = self._entries.get(str(item_id))
+        return decode_record(entry[2]) if entry is not None else None
+
+    def _fetch_page(self, offset):
+        # Hors caches de réponses : les pages du groupe évinceraient les listes servies aux clients
+        res = taranis_request(
+            "GET",
+            news_item_aggregates_url(self.group_id),
+            params={"range": "ALL", "sort": "DATE_DESC", "offset": offset, "limit": self.page_size},
+            cache=False
+        )
+        res.raise_for_status()
+        return res.json().get("items", [])
+
+    def _apply(self, item):
+        """Enregistre un item reçu ; retourne True s'il est nouveau ou modifié."""
+        item_id = str(item.get("id"))
+        fingerprint = item_fingerprint(item)
+        current = self._entries.get(item_id)
+        if current is not None and current[1] == fingerprint:
+            return False
+        self.version += 1
+        self._entries[item_id] = (self.version, fingerprint, encode_record(item))
+        self._entries.move_to_end(item_id)
+        self._tombstones.pop(item_id, None)
+        return True
+
+    def _delete(self, item_id):
+        self.version += 1
+        del self._entries[item_id]
+        self._tombstones[item_id] = self.version
+        while len(self._tombstones) > NEWS_SYNC_TOMBSTONES:
+            _, floor = self._tombstones.popitem(last=False)
+            self._tombstones_floor = floor
+
+    def _read_pages(self, full):
+        """Relit le groupe page par page ; retourne (items changés, ids vus)."""
+        changed, seen, offset = 0, set(), 0
+        while True:
+            page = self._fetch_page(offset)
+            with self._lock:
+                page_changes = sum(self._apply(item) for item in page if item.get("id") is not None)
+            changed += page_changes
+            seen.update(str(item.get("id")) for item in page)
+            offset += len(page)
+            if len(page) < self.page_size or (not full and page_changes == 0):
+                return changed, seen
+
+    def sync(self, full=False):
+        """Une passe de synchronisation ; retourne le nombre d'items changés.
+
+        Passe incrémentale : les pages les plus récentes sont relues jusqu'à la
+        première page sans aucun changement. Passe complète : tout le groupe est
+        relu et les items disparus côté Taranis sont supprimés.
+        """
+        full = full or not self.ready
+        changed, seen = self._read_pages(full)
+
+        if full:
+            with self._lock:
+                missing = [i for i in self._entries if i not in seen]
+            if missing:
+                # Pagination par offset sur un tri DATE_DESC : un item arrivé pendant la passe
+                # décale les suivants d'une page à l'autre. Un id n'est supprimé que si une
+                # seconde lecture du groupe ne le trouve pas non plus.
+                confirm_changes, seen = self._read_pages(full=True)
+                changed += confirm_changes
+                with self._lock:
+                    for item_id in [i for i in missing if i in self._entries and i not in seen]:
+                        self._delete(item_id)
+                        changed += 1
+
+        self.passes += 1
+        self.synced_at = time.time()
+        for listener in self._listeners:
+            listener(self, changed)
+        return changed
+
+    def changes_since(self, since, epoch=None, decode=True):
+        """Items créés/modifiés et ids supprimés après la version `since`.
+
+        epoch : celui renvoyé avec `since` (None pour un appel interne à ce process).
+        decode=False : items laissés compressés (à passer à decode_record).
+        """
+        with self._lock:
+            if epoch is not None and epoch != self.epoch:
+                # Version numérotée par une autre copie : elle ne dit rien de celle-ci
+                since = 0
+            if since > self.version:
+                since = 0
+            if since < self._tombstones_floor:
+                # Des suppressions ont été oubliées : le client doit tout recharger
+                since = 0
+            full = since == 0
+            version = self.version
+            changed = []
+            for entry_version, _, blob in reversed(self._entries.values()):
+                if entry_version <= since:
+                    break
+                changed.append(blob)
+            changed.reverse()
+            deleted = [] if full else [i for i, v in self._tombstones.items() if v > since]
+        return {
+            "group_id": self.group_id,
+            "epoch": self.epoch,
+            "since": since,
+            "version": version,
+            "full": full,
+            "changed": [decode_record(blob) for blob in changed] if decode else changed,
+            "deleted": deleted,
+        }
+
+    def stats(self):
+        return {
+            "epoch": self.epoch,
+            "version": self.version,
+            "items": len(self._entries),
+            "tombstones": len(self._tombstones),
+            "passes": self.passes,
+            "synced_at": self.synced_at,
+        }
+
+
+class NewsItemSynchronizer:
+    """Thread de fond qui garde les groupes configurés à jour (un thread par worker)."""
+
+    def __init__(self, group_ids=NEWS_SYNC_GROUPS if NEWS_SYNC_ENABLED else (), interval=NEWS_SYNC_INTERVAL):
+        self.interval = interval
+        self.mirrors = {group_id: GroupMirror(group_id) for group_id in group_ids}
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def mirror(self, group_id):
+        return self.mirrors.get(group_id)
+
+    def ensure_started(self):
+        if not self.mirrors or self.interval <= 0:
+            return
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="news-item-sync", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            for mirror in self.mirrors.values():
+                full = mirror.passes % NEWS_SYNC_FULL_EVERY == 0
+                try:
+                    changed = mirror.sync(full=full)
+                    if changed:
+                        logging.info(f"[Gateway] Sync groupe {mirror.group_id} : {changed} changement(s), v{mirror.version}")
+                except Exception as e:
+                    logging.warning(f"[Gateway] Sync groupe {mirror.group_id} échouée : {e}")
+            time.sleep(self.interval)
+
+    def stats(self):
+        return {group_id: mirror.stats() for group_id, mirror in self.mirrors.items()}
+
+
+news_sync = NewsItemSynchronizer()
+
+
+def _follow_vulnerability_group(mirror, changed):
+    # Le snapshot du dashboard suit la copie synchronisée au lieu de tout re-télécharger
+    if changed:
+        vulnerability_snapshots.replace(mirror.items())
+    else:
+        vulnerability_snapshots.touch()
+
+
+if news_sync.mirror(GROUP_ID_VULNERABILITIES) is not None:
+    news_sync.mirror(GROUP_ID_VULNERABILITIES).on_change(_follow_vulnerability_group)
@@ -0,0 +1,32 @@
+import base64
+import json
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(**state):
+    """Curseur opaque transmis au client (base64 url-safe d'un petit JSON)."""
+    raw = json.dumps(state, separators=(",", ":"), sort_keys=True).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        state = json.loads(raw)
+    except Exception:
+        raise InvalidCursor(f"Curseur invalide : {cursor!r}")
+    if not isinstance(state, dict):
+        raise InvalidCursor(f"Curseur invalide : {cursor!r}")
+    return state
+
+
+def parse_limit(value, default, maximum):
+    """Taille de page demandée, bornée à [1, maximum]."""
+    try:
+        limit = int(value) if value not in (None, "") else default
+    except (TypeError, ValueError):
+        limit = default
+    return max(1, min(limit, maximum))
@@ -0,0 +1,56 @@
+import os
+
+from flask import Response, request
+
+from utils.taranis_auth import taranis_request
+
+# true : corps Taranis relayé en flux, octets compressés compris (ni décodage JSON ni copie complète)
+# false : corps lu en entier mais renvoyé tel quel (garde fusion des GET, cache 304 et réponses périmées)
+PASSTHROUGH_STREAM = os.getenv("PASSTHROUGH_STREAM", "true").lower() == "true"
+PASSTHROUGH_CHUNK = int(os.getenv("PASSTHROUGH_CHUNK", str(64 * 1024)))
+
+# En-têtes de la réponse Taranis recopiés vers le client
+FORWARDED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Cache-Control")
+# En-têtes du client transmis à Taranis en mode flux (revalidation et compression)
+CLIENT_HEADERS = ("If-None-Match", "If-Modified-Since")
+
+
+def _forwarded(res):
+    return {name: res.headers[name] for name in FORWARDED_HEADERS if name in res.headers}
+
+
+def raw_response(res):
+    """Réponse Flask avec le corps Taranis déjà lu, sans le redécoder ni le réencoder."""
+    # Corps non streamé : l'ETag et le 304 sont gérés par utils/conditional.py
+    return Response(res.content, status=res.status_code, headers=_forwarded(res))
+
+
+def _streamed_response(res):
+    headers = _forwarded(res)
+    encoding = res.headers.get("Content-Encoding")
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        headers["Vary"] = "Accept-Encoding"
+    if "Content-Length" in res.headers:
+        headers["Content-Length"] = res.headers["Content-Length"]
+
+    def body():
+        try:
+            # decode_content=False : les octets gzip de Taranis partent sans être décompressés
+            yield from res.raw.stream(PASSTHROUGH_CHUNK, decode_content=False)
+        finally:
+            res.close()
+
+    return Response(body(), status=res.status_code, headers=headers, direct_passthrough=True)
+
+
+def proxy_get(url, **kwargs):
+    """GET Taranis renvoyé tel quel au client (statut, corps et en-têtes utiles), sans passer par JSON."""
+    if not PASSTHROUGH_STREAM:
+        return raw_response(taranis_request("GET", url, **kwargs))
+
+    headers = {name: request.headers[name] for name in CLIENT_HEADERS if name in request.headers}
+    # Taranis ne compresse que dans un format que le client sait lire
+    headers["Accept-Encoding"] = request.headers.get("Accept-Encoding", "identity")
+    res = taranis_request("GET", url, headers=headers, stream=True, **kwargs)
+    return _streamed_response(res)
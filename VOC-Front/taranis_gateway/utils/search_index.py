@@ -0,0 +1,252 @@
+import bisect
+import math
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+from utils.news_sync import news_sync
+from utils.vuln_columns import decode_record
+
+# Poids des champs dans le score (un mot du titre compte plus qu'un mot du contenu)
+FIELD_WEIGHTS = {"title": 3.0, "description": 1.5, "content": 1.0}
+# Nombre maximum de termes développés pour un préfixe (saisie en cours)
+PREFIX_EXPANSIONS = 64
+# Paramètres BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Items décodés et indexés par prise du verrou lors d'un rattrapage (premier chargement compris)
+SEARCH_INDEX_BATCH = int(os.getenv("SEARCH_INDEX_BATCH", "500"))
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the this to was were will with
+au aux avec ce ces cet cette dans de des du elle en est et il ils la le les leur lui mais ne nos notre
+ou par pas pour qu que qui sa se ses son sont sur un une vos votre
+""".split())
+
+_TAGS = re.compile(r"<[^>]+>")
+# CVE-2024-1234, log4j, 10.0.1, cross-site : les séparateurs internes sont gardés dans le token
+_TOKENS = re.compile(r"[a-z0-9]+(?:[-_.][a-z0-9]+)*")
+# Élisions françaises : l'attaque, d'exécution, qu'un
+_ELISION = re.compile(r"\b(?:[cdjlmnst]|qu)['’]")
+
+
+def fold(text):
+    """Minuscules sans accents (é -> e, ç -> c)."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text, split_compounds=True):
+    """Tokens d'un texte FR/EN : accents retirés, élisions et mots vides supprimés.
+
+    Un identifiant composé (cve-2024-1234, log4j-core) donne le token entier
+    et ses parties, pour trouver aussi bien "CVE-2024-1234" que "1234". Côté
+    requête (split_compounds=False), seul le token entier est cherché.
+    """
+    if not text:
+        return []
+    text = _ELISION.sub(" ", fold(_TAGS.sub(" ", str(text))))
+    tokens = []
+    for token in _TOKENS.findall(text):
+        if token in STOPWORDS:
+            continue
+        tokens.append(token)
+        if split_compounds and not token.isalnum():
+            tokens.extend(part for part in re.split(r"[-_.]", token) if part and part not in STOPWORDS)
+    return tokens
+
+
+def news_item_fields(item):
+    """Texte indexé d'un agrégat : titre, description et contenu de ses news items."""
+    title, content = [item.get("title") or ""], []
+    for news_item in item.get("news_items") or ():
+        data = news_item.get("news_item_data") or {}
+        title.append(data.get("title") or "")
+        content.extend((data.get("review") or "", data.get("content") or ""))
+    return {
+        "title": " ".join(title),
+        "description": item.get("description") or "",
+        "content": " ".join(content),
+    }
+
+
+class InvertedIndex:
+    """Index inversé en mémoire : token -> {doc: poids}, mis à jour item par item.
+
+    Les tokens sont aussi gardés triés, pour développer un préfixe ("micro" ->
+    microsoft, microcode...) par recherche dichotomique. La liste triée est
+    reconstruite une fois, à la première recherche après des ajouts ou des
+    suppressions de tokens, et non à chaque token.
+    """
+
+    def __init__(self):
+        self._postings = {}
+        self._doc_terms = {}
+        self._doc_lengths = {}
+        self._vocabulary = []
+        self._vocabulary_stale = False
+        self._total_length = 0.0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._doc_terms)
+
+    def add(self, doc_id, fields):
+        """Indexe (ou ré-indexe) un document à partir de ses champs texte."""
+        self.add_many([(doc_id, fields)])
+
+    def add_many(self, documents):
+        """Indexe une série de (doc_id, champs) en une seule prise du verrou."""
+        analyzed = []
+        for doc_id, fields in documents:
+            terms = Counter()
+            for field, text in fields.items():
+                weight = FIELD_WEIGHTS.get(field, 1.0)
+                for token in tokenize(text):
+                    terms[token] += weight
+            analyzed.append((doc_id, terms))
+        with self._lock:
+            for doc_id, terms in analyzed:
+                self._remove(doc_id)
+                for token, weight in terms.items():
+                    posting = self._postings.get(token)
+                    if posting is None:
+                        posting = self._postings[token] = {}
+                        self._vocabulary_stale = True
+                    posting[doc_id] = weight
+                length = sum(terms.values())
+                self._doc_terms[doc_id] = tuple(terms)
+                self._doc_lengths[doc_id] = length
+                self._total_length += length
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        for token in terms:
+            posting = self._postings[token]
+            del posting[doc_id]
+            if not posting:
+                del self._postings[token]
+                self._vocabulary_stale = True
+
+    def clear(self):
+        with self._lock:
+            self.__init__()
+
+    def _expand(self, prefix):
+        if self._vocabulary_stale:
+            self._vocabulary = sorted(self._postings)
+            self._vocabulary_stale = False
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        expansions = []
+        for token in self._vocabulary[start:start + PREFIX_EXPANSIONS]:
+            if not token.startswith(prefix):
+                break
+            expansions.append(token)
+        return expansions
+
+    def _term_scores(self, token, boost, average_length):
+        posting = self._postings.get(token, {})
+        idf = math.log(1 + (len(self._doc_terms) - len(posting) + 0.5) / (len(posting) + 0.5))
+        for doc_id, tf in posting.items():
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_lengths[doc_id] / average_length)
+            yield doc_id, boost * idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+    def search(self, query, prefix=True):
+        """Documents contenant tous les termes de la requête, triés par score BM25.
+
+        Avec prefix=True, le dernier terme est traité comme un début de mot
+        (recherche pendant la frappe), sauf si la requête se termine par un blanc.
+        """
+        tokens = tokenize(query, split_compounds=False)
+        if not tokens:
+            return []
+        prefix = prefix and not query[-1:].isspace()
+        with self._lock:
+            if not self._doc_terms:
+                return []
+            average_length = self._total_length / len(self._doc_terms) or 1.0
+            terms = list(dict.fromkeys(tokens))
+            scores = None
+            for position, token in enumerate(terms):
+                term_scores = Counter()
+                if prefix and position == len(terms) - 1:
+                    # Mot exact favorisé par rapport à ses prolongements
+                    for expansion in self._expand(token):
+                        boost = 1.0 if expansion == token else 0.8
+                        for doc_id, score in self._term_scores(expansion, boost, average_length):
+                            term_scores[doc_id] = max(term_scores[doc_id], score)
+                else:
+                    term_scores.update(dict(self._term_scores(token, 1.0, average_length)))
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = Counter({doc_id: score + term_scores[doc_id] for doc_id, score in scores.items() if doc_id in term_scores})
+                if not scores:
+                    return []
+        return sorted(scores.items(), key=lambda entry: (-entry[1], entry[0]))
+
+    def stats(self):
+        return {"documents": len(self._doc_terms), "terms": len(self._postings)}
+
+
+class MirrorSearchIndex:
+    """Index de recherche d'un groupe synchronisé, tenu à jour par son flux de changements."""
+
+    def __init__(self, mirror):
+        self.mirror = mirror
+        self.index = InvertedIndex()
+        self.version = 0
+        self._lock = threading.Lock()
+        mirror.on_change(lambda _mirror, changed: changed and self.catch_up())
+
+    @property
+    def ready(self):
+        return self.mirror.ready and self.version == self.mirror.version
+
+    def catch_up(self):
+        """Applique les changements de la copie locale depuis la dernière version indexée.
+
+        Les items restent compressés jusqu'à leur lot : un premier chargement ne
+        décode jamais tout le groupe à la fois.
+        """
+        with self._lock:
+            changes = self.mirror.changes_since(self.version, decode=False)
+            if changes["full"]:
+                self.index.clear()
+            blobs = changes["changed"]
+            for start in range(0, len(blobs), SEARCH_INDEX_BATCH):
+                items = [decode_record(blob) for blob in blobs[start:start + SEARCH_INDEX_BATCH]]
+                self.index.add_many((str(item.get("id")), news_item_fields(item)) for item in items)
+            for item_id in changes["deleted"]:
+                self.index.remove(item_id)
+            self.version = changes["version"]
+
+    def search(self, query):
+        return self.index.search(query)
+
+    def page(self, query, offset, limit):
+        """(total, items de la page) classés par pertinence."""
+        ranked = self.search(query)
+        items = [self.mirror.item(doc_id) for doc_id, _ in ranked[offset:offset + limit]]
+        return len(ranked), [item for item in items if item is not None]
+
+    def stats(self):
+        return {**self.index.stats(), "version": self.version}
+
+
+# Un index par groupe synchronisé (NEWS_SYNC_GROUPS) ; l'index n'est alimenté que par la copie
+# locale : sans NEWS_SYNC_ENABLED=true, il n'y en a aucun et ?search= est toujours relayé à Taranis
+search_indexes = {group_id: MirrorSearchIndex(mirror) for group_id, mirror in news_sync.mirrors.items()}
+
+
+def search_stats():
+    return {group_id: index.stats() for group_id, index in search_indexes.items()}
@@ -0,0 +1,139 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import g, request
+
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true"
+# Origines autorisées à lire Server-Timing depuis le navigateur (front sur une autre origine)
+TIMING_ALLOW_ORIGIN = os.getenv("TIMING_ALLOW_ORIGIN", "*")
+# Requêtes plus lentes que ce seuil journalisées avec leurs phases (0 = désactivé)
+SLOW_REQUEST_THRESHOLD_MS = float(os.getenv("SLOW_REQUEST_THRESHOLD_MS", "0"))
+SLOW_REQUEST_LOG_FILE = os.getenv("SLOW_REQUEST_LOG_FILE", "")
+
+# Ordre d'affichage dans l'en-tête ; les autres phases suivent
+PHASES = ("auth", "upstream", "decode", "snapshot", "reshape", "serialize")
+
+slow_log = logging.getLogger("gateway.slow_requests")
+if SLOW_REQUEST_LOG_FILE:
+    _handler = logging.FileHandler(SLOW_REQUEST_LOG_FILE)
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    slow_log.addHandler(_handler)
+
+_current = ContextVar("server_timing", default=None)
+_stacks = threading.local()
+
+
+class RequestTimings:
+    """Durées cumulées par phase pour une requête (appels parallèles additionnés)."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.phases = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, duration):
+        with self._lock:
+            total, count = self.phases.get(name, (0.0, 0))
+            self.phases[name] = (total + duration, count + 1)
+
+    def elapsed(self):
+        return time.perf_counter() - self.started_at
+
+    def ordered(self):
+        with self._lock:
+            phases = dict(self.phases)
+        names = [name for name in PHASES if name in phases] + sorted(set(phases) - set(PHASES))
+        return [(name, *phases[name]) for name in names]
+
+    def header(self, total):
+        parts = []
+        for name, duration, count in self.ordered():
+            entry = f"{name};dur={duration * 1000:.1f}"
+            if count > 1:
+                entry += f';desc="{count} appels"'
+            parts.append(entry)
+        parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+
+@contextmanager
+def phase(name):
+    """Chronomètre une phase de la requête en cours (sans effet hors requête).
+
+    Les phases imbriquées ne sont pas comptées deux fois : le login fait
+    pendant "auth" est retiré de la phase englobante.
+    """
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    stack = getattr(_stacks, "frames", None)
+    if stack is None:
+        stack = _stacks.frames = []
+    frame = [0.0]
+    stack.append(frame)
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started_at
+        stack.pop()
+        if stack:
+            stack[-1][0] += elapsed
+        timings.add(name, elapsed - frame[0])
+
+
+def propagate(call):
+    """Rattache `call`, exécuté dans un autre thread (fan-out), aux timings de la requête en cours."""
+    timings = _current.get()
+    if timings is None:
+        return call
+
+    def bound():
+        token = _current.set(timings)
+        try:
+            return call()
+        finally:
+            _current.reset(token)
+
+    return bound
+
+
+def _start_request():
+    g.server_timing_token = _current.set(RequestTimings())
+
+
+def _add_server_timing(response):
+    timings = _current.get()
+    if timings is None or "server_timing_token" not in g:
+        return response
+    total = timings.elapsed()
+    response.headers["Server-Timing"] = timings.header(total)
+    if TIMING_ALLOW_ORIGIN:
+        response.headers["Timing-Allow-Origin"] = TIMING_ALLOW_ORIGIN
+
+    if SLOW_REQUEST_THRESHOLD_MS > 0 and total * 1000 >= SLOW_REQUEST_THRESHOLD_MS:
+        phases = " ".join(f"{name}={duration * 1000:.1f}ms" for name, duration, _ in timings.ordered())
+        slow_log.warning(
+            f"[Gateway] Requête lente {request.method} {request.full_path.rstrip('?')} "
+            f"{response.status_code} {total * 1000:.1f}ms : {phases}"
+        )
+    return response
+
+
+def _end_request(_error=None):
+    token = g.pop("server_timing_token", None)
+    if token is not None:
+        _current.reset(token)
+
+
+def init_server_timing(app):
+    if not SERVER_TIMING_ENABLED:
+        return
+    app.before_request(_start_request)
+    app.after_request(_add_server_timing)
+    app.teardown_request(_end_request)
@@ -0,0 +1,191 @@
+import codecs
+import json
+import os
+import zlib
+
+from flask import Response, request, stream_with_context
+
+from utils.fast_json import dumps
+
+# Taille des morceaux lus sur la réponse Taranis
+STREAM_READ_CHUNK = int(os.getenv("STREAM_READ_CHUNK", str(64 * 1024)))
+# Les items sérialisés sont regroupés en morceaux de cette taille avant envoi au client
+STREAM_WRITE_CHUNK = int(os.getenv("STREAM_WRITE_CHUNK", str(64 * 1024)))
+# Niveau de compression gzip à la volée (0 = désactivé)
+STREAM_GZIP_LEVEL = int(os.getenv("STREAM_GZIP_LEVEL", "6"))
+
+STREAM_FORMATS = ("ndjson", "json")
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+_decoder = json.JSONDecoder()
+
+
+class _ChunkReader:
+    """Lecture d'un document JSON morceau par morceau (seule la partie non lue est gardée)."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Ajoute un morceau au buffer ; False à la fin du flux."""
+        if self.eof:
+            return False
+        self.buf = self.buf[self.pos:]
+        self.pos = 0
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self.eof = True
+            self.buf += self._utf8.decode(b"", final=True)
+            return False
+        self.buf += self._utf8.decode(chunk)
+        return True
+
+    def peek(self):
+        """Prochain caractère significatif (les blancs sont sautés)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                raise ValueError("Réponse JSON tronquée")
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"JSON invalide : '{char}' attendu, '{found}' trouvé")
+        self.pos += 1
+
+    def value(self):
+        """Décode la prochaine valeur JSON complète."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # Un nombre en fin de buffer peut être coupé ("12" de "123") : on relit avec la suite
+            if end < len(self.buf) or self.eof:
+                self.pos = end
+                return value
+            self.fill()
+
+
+def iter_json_items(chunks, key="items", meta=None):
+    """Items du tableau `key` d'un objet JSON, décodés au fil de l'eau.
+
+    Seul l'item en cours est gardé en mémoire. Les autres champs de premier
+    niveau (total_count, ...) sont copiés dans `meta` s'il est fourni.
+    """
+    reader = _ChunkReader(chunks)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        name = reader.value()
+        reader.expect(":")
+        if name == key:
+            reader.expect("[")
+            if reader.peek() == "]":
+                reader.pos += 1
+            else:
+                while True:
+                    yield reader.value()
+                    separator = reader.peek()
+                    reader.pos += 1
+                    if separator == "]":
+                        break
+                    if separator != ",":
+                        raise ValueError(f"JSON invalide : ',' ou ']' attendu, '{separator}' trouvé")
+        else:
+            value = reader.value()
+            if meta is not None:
+                meta[name] = value
+        separator = reader.peek()
+        reader.pos += 1
+        if separator == "}":
+            return
+        if separator != ",":
+            raise ValueError(f"JSON invalide : ',' ou '}}' attendu, '{separator}' trouvé")
+
+
+def iter_upstream_items(response, key="items", meta=None):
+    """Items d'une réponse Taranis ouverte avec stream=True ; la connexion est rendue au pool à la fin."""
+    try:
+        yield from iter_json_items(response.iter_content(STREAM_READ_CHUNK), key=key, meta=meta)
+    finally:
+        response.close()
+
+
+def _buffered(parts, size=STREAM_WRITE_CHUNK):
+    """Regroupe de petits morceaux encodés en blocs d'environ `size` octets."""
+    pending, length = [], 0
+    for part in parts:
+        pending.append(part)
+        length += len(part)
+        if length >= size:
+            yield b"".join(pending)
+            pending, length = [], 0
+    if pending:
+        yield b"".join(pending)
+
+
+def ndjson_lines(items):
+    for item in items:
+        yield dumps(item) + b"\n"
+
+
+def json_document(items, meta=None, key="items"):
+    """Même forme que la réponse non streamée : {"items": [...], <meta>}.
+
+    `meta` est lu après le dernier item (il peut être rempli pendant le parcours).
+    """
+    yield b'{' + dumps(key) + b':['
+    for index, item in enumerate(items):
+        yield (b"," if index else b"") + dumps(item)
+    yield b"]"
+    for name, value in (meta or {}).items():
+        yield b"," + dumps(name) + b":" + dumps(value)
+    yield b"}"
+
+
+def gzip_chunks(chunks, level=STREAM_GZIP_LEVEL):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def requested_stream_format():
+    """Format de streaming demandé (?stream=ndjson|json ou Accept: application/x-ndjson), sinon None."""
+    stream_format = request.args.get("stream", "").lower()
+    if stream_format in STREAM_FORMATS:
+        return stream_format
+    if request.accept_mimetypes.best == NDJSON_MIMETYPE:
+        return "ndjson"
+    return None
+
+
+def stream_items(items, stream_format, meta=None):
+    """Réponse Flask chunkée : un item à la fois, compressée en gzip si le client l'accepte."""
+    if stream_format == "ndjson":
+        body, mimetype = ndjson_lines(items), NDJSON_MIMETYPE
+    else:
+        body, mimetype = json_document(items, meta), "application/json"
+    body = _buffered(body)
+
+    headers = {"Cache-Control": "no-store", "X-Accel-Buffering": "no"}
+    if STREAM_GZIP_LEVEL > 0 and "gzip" in request.accept_encodings:
+        body = gzip_chunks(body)
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    return Response(stream_with_context(body), mimetype=mimetype, headers=headers)
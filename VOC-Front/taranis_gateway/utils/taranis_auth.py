@@ -1,22 +1,211 @@
-import os
-import requests
+import base64
+import json
 import logging
+import os
+import threading
+import time
 
-def get_taranis_token():
-    """Récupère dynamiquement un token JWT depuis Taranis."""
-    TARANIS_BASE_URL = os.getenv("TARANIS_BASE_URL", "https://192.168.40.55:4443")
-    username = os.getenv("TARANIS_USERNAME", "admin")
-    password = os.getenv("TARANIS_PASSWORD", "admin")
+from utils.metrics import metrics
+from utils.server_timing import phase
+from utils.upstream import upstream
+
+TARANIS_BASE_URL = os.getenv("TARANIS_BASE_URL", "https://192.168.100.44:4443")
+TARANIS_USERNAME = os.getenv("TARANIS_USERNAME", "admin")
+TARANIS_PASSWORD = os.getenv("TARANIS_PASSWORD", "admin")
+
+# Marge (en secondes) avant expiration à laquelle le token est renouvelé en tâche de fond
+TOKEN_REFRESH_MARGIN = int(os.getenv("TARANIS_TOKEN_REFRESH_MARGIN", "60"))
+# Durée de vie supposée quand le JWT ne contient pas de claim "exp"
+TOKEN_DEFAULT_TTL = int(os.getenv("TARANIS_TOKEN_DEFAULT_TTL", "300"))
+# Délai minimal entre deux renouvellements en tâche de fond (token de très courte durée)
+TOKEN_MIN_REFRESH_DELAY = float(os.getenv("TARANIS_TOKEN_MIN_REFRESH_DELAY", "5"))
+# Renouvellement en échec : nouvel essai après 2 s, 4 s, 8 s... plafonné à TOKEN_RETRY_MAX
+TOKEN_RETRY_BASE = float(os.getenv("TARANIS_TOKEN_RETRY_BASE", "2"))
+TOKEN_RETRY_MAX = float(os.getenv("TARANIS_TOKEN_RETRY_MAX", "300"))
 
+
+def decode_jwt_expiry(token):
+    """Lit le claim "exp" d'un JWT sans vérifier sa signature (None si illisible)."""
     try:
-        response = requests.post(
-            f"{TARANIS_BASE_URL}/api/v1/auth/login",
-            json={"username": username, "password": password},
-            verify=False,
-            timeout=10
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        exp = claims.get("exp")
+        return float(exp) if exp is not None else None
+    except Exception:
+        return None
+
+
+class TaranisTokenManager:
+    """Token JWT Taranis partagé par toute la gateway.
+
+    Le token est mis en cache jusqu'à son expiration, renouvelé en tâche de fond
+    avant qu'il n'expire, et un seul appelant à la fois peut déclencher un login
+    (les autres attendent et réutilisent le token obtenu).
+    """
+
+    def __init__(self, base_url, username, password,
+                 refresh_margin=TOKEN_REFRESH_MARGIN, default_ttl=TOKEN_DEFAULT_TTL):
+        self.base_url = base_url
+        self.username = username
+        self.password = password
+        self.refresh_margin = refresh_margin
+        self.default_ttl = default_ttl
+
+        self._token = None
+        self._expires_at = 0.0
+        self._ttl = 0.0
+        self._lock = threading.Lock()
+        # Compteurs incrémentés aussi hors de self._lock (token servi depuis le cache)
+        self._counters_lock = threading.Lock()
+        self._timer = None
+        self._refresh_failures = 0
+        self._counters = {
+            "logins": 0,
+            "login_failures": 0,
+            "cache_hits": 0,
+            "background_refreshes": 0,
+            "invalidations": 0,
+        }
+
+    def _count(self, name):
+        with self._counters_lock:
+            self._counters[name] += 1
+
+    def _is_fresh(self, now=None):
+        # Utilisable jusqu'à l'expiration moins une marge de sécurité (10 % de la durée de vie,
+        # au plus refresh_margin) : un token de quelques secondes reste servi depuis le cache
+        now = now or time.time()
+        return self._token is not None and now < self._expires_at - min(self.refresh_margin, self._ttl * 0.1)
+
+    def _login(self):
+        response = upstream.post(
+            f"{self.base_url}/api/v1/auth/login",
+            json={"username": self.username, "password": self.password}
         )
         response.raise_for_status()
         return response.json().get("access_token")
-    except Exception as e:
-        logging.error(f"[Gateway] Échec récupération token Taranis : {e}")
-        return None
+
+    def _refresh_locked(self):
+        """Effectue le login ; doit être appelé avec self._lock acquis."""
+        try:
+            token = self._login()
+        except Exception as e:
+            self._count("login_failures")
+            logging.error(f"[Gateway] Échec récupération token Taranis : {e}")
+            return None
+        if not token:
+            self._count("login_failures")
+            return None
+
+        self._count("logins")
+        self._token = token
+        self._expires_at = decode_jwt_expiry(token) or (time.time() + self.default_ttl)
+        self._ttl = max(self._expires_at - time.time(), 0.0)
+        self._schedule_refresh()
+        return token
+
+    def refresh_delay(self, now=None):
+        """Délai avant le prochain renouvellement : à la marge avant expiration, au plus tôt à mi-vie.
+
+        Un token dont la durée de vie est inférieure à la marge n'entraîne donc
+        pas un login par seconde.
+        """
+        ttl = self._expires_at - (now or time.time())
+        return max(ttl - self.refresh_margin, ttl * 0.5, TOKEN_MIN_REFRESH_DELAY)
+
+    def _schedule_refresh(self, delay=None):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.refresh_delay() if delay is None else delay, self._background_refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _background_refresh(self):
+        with self._lock:
+            self._count("background_refreshes")
+            if self._refresh_locked() is not None:
+                self._refresh_failures = 0
+                return
+            # Taranis indisponible : nouvel essai avec un délai croissant
+            self._refresh_failures += 1
+            self._schedule_refresh(min(TOKEN_RETRY_BASE * 2 ** (self._refresh_failures - 1), TOKEN_RETRY_MAX))
+
+    def get_token(self):
+        """Retourne un token valide, en ne se connectant à Taranis que si nécessaire."""
+        if self._is_fresh():
+            self._count("cache_hits")
+            return self._token
+
+        with self._lock:
+            # Un autre appelant a pu rafraîchir le token pendant qu'on attendait le verrou
+            if self._is_fresh():
+                self._count("cache_hits")
+                return self._token
+            return self._refresh_locked()
+
+    def invalidate(self, token):
+        """Oublie le token s'il est toujours celui en cache (ex. rejeté par un 401)."""
+        with self._lock:
+            if token is not None and self._token == token:
+                self._count("invalidations")
+                self._token = None
+                self._expires_at = 0.0
+
+    def collect_metrics(self):
+        with self._counters_lock:
+            counters = dict(self._counters)
+        yield ("gateway_taranis_logins_total", "counter", "Logins Taranis (dont renouvellements en tâche de fond)",
+               [({}, counters["logins"])])
+        yield ("gateway_taranis_login_failures_total", "counter", "Logins Taranis échoués", [({}, counters["login_failures"])])
+        yield ("gateway_taranis_token_refreshes_total", "counter", "Renouvellements du token en tâche de fond",
+               [({}, counters["background_refreshes"])])
+        yield ("gateway_taranis_token_cache_hits_total", "counter", "Token servi depuis le cache", [({}, counters["cache_hits"])])
+        yield ("gateway_taranis_token_invalidations_total", "counter", "Tokens rejetés par Taranis (401)",
+               [({}, counters["invalidations"])])
+        yield ("gateway_taranis_token_expires_in_seconds", "gauge", "Durée de validité restante du token",
+               [({}, max(self._expires_at - time.time(), 0) if self._token else 0)])
+
+    def stats(self):
+        with self._counters_lock:
+            stats = dict(self._counters)
+        stats["logins_avoided"] = stats["cache_hits"]
+        stats["expires_in"] = max(round(self._expires_at - time.time(), 1), 0) if self._token else 0
+        return stats
+
+
+token_manager = TaranisTokenManager(TARANIS_BASE_URL, TARANIS_USERNAME, TARANIS_PASSWORD)
+metrics.collector(token_manager.collect_metrics)
+
+
+def get_taranis_token():
+    """Récupère un token JWT Taranis (mis en cache et partagé par toute la gateway)."""
+    return token_manager.get_token()
+
+
+def get_auth_headers(token=None):
+    token = token or get_taranis_token()
+    return {
+        "Authorization": f"Bearer {token}",
+        "Content-Type": "application/json"
+    }
+
+
+def taranis_request(method, url, **kwargs):
+    """Appel authentifié vers Taranis, avec un nouvel essai après un 401.
+
+    Un 401 signifie que Taranis a révoqué le token en cache : il est invalidé,
+    un nouveau login est fait et la requête est rejouée une seule fois.
+    """
+    extra_headers = kwargs.pop("headers", None) or {}
+
+    with phase("auth"):
+        token = get_taranis_token()
+    response = upstream.request(method, url, headers={**get_auth_headers(token), **extra_headers}, **kwargs)
+    if response.status_code == 401:
+        response.close()
+        token_manager.invalidate(token)
+        with phase("auth"):
+            token = get_taranis_token()
+        response = upstream.request(method, url, headers={**get_auth_headers(token), **extra_headers}, **kwargs)
+    return response
@@ -0,0 +1,444 @@
+import hashlib
+import os
+import ssl
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from urllib.parse import urlencode, urlsplit
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+from utils.circuit_breaker import CircuitBreakers, CircuitOpenError, mark_stale
+from utils.fast_json import decode_response
+from utils.metrics import metrics, upstream_request_duration, upstream_requests_in_flight
+from utils.server_timing import phase
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+# === Configuration du pool de connexions vers Taranis ===
+POOL_CONNECTIONS = int(os.getenv("UPSTREAM_POOL_CONNECTIONS", "4"))    # nb d'hôtes gardés en cache
+POOL_MAXSIZE = int(os.getenv("UPSTREAM_POOL_MAXSIZE", "32"))           # connexions keep-alive par hôte
+POOL_BLOCK = os.getenv("UPSTREAM_POOL_BLOCK", "false").lower() == "true"
+MAX_RETRIES = int(os.getenv("UPSTREAM_MAX_RETRIES", "0"))
+CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("UPSTREAM_READ_TIMEOUT", "30"))
+# Nombre de réponses GET gardées pour les requêtes conditionnelles (If-None-Match) vers Taranis
+CONDITIONAL_CACHE_SIZE = int(os.getenv("UPSTREAM_CONDITIONAL_CACHE_SIZE", "256"))
+# Les corps plus gros ne sont pas gardés (mémoire des workers)
+CONDITIONAL_MAX_BYTES = int(os.getenv("UPSTREAM_CONDITIONAL_MAX_BYTES", str(5 * 1024 * 1024)))
+# Dernière bonne réponse GET gardée par URL, resservie (périmée) quand Taranis est en panne
+STALE_CACHE_SIZE = int(os.getenv("UPSTREAM_STALE_CACHE_SIZE", "256"))
+STALE_MAX_AGE = float(os.getenv("UPSTREAM_STALE_MAX_AGE", "3600"))
+# GET identiques simultanés fusionnés en un seul appel Taranis
+COALESCE_GETS = os.getenv("UPSTREAM_COALESCE_GETS", "true").lower() == "true"
+
+
+def _parse_route_timeouts(raw):
+    """Parse "UPSTREAM_ROUTE_TIMEOUTS" : "/api/v1/assess/=60,/api/v1/publish/=45"."""
+    timeouts = {}
+    for entry in filter(None, (part.strip() for part in raw.split(","))):
+        prefix, _, value = entry.partition("=")
+        timeouts[prefix.strip()] = float(value)
+    return timeouts
+
+
+# Timeouts de lecture par défaut, par famille de routes Taranis (préfixe du chemin)
+ROUTE_READ_TIMEOUTS = {
+    "/api/v1/auth/": 10,
+    "/api/v1/config/": 20,
+    "/api/v1/analyze/": 30,
+    "/api/v1/assess/": 60,
+    "/api/v1/publish/": 60,
+}
+ROUTE_READ_TIMEOUTS.update(_parse_route_timeouts(os.getenv("UPSTREAM_ROUTE_TIMEOUTS", "")))
+
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter partageant un même SSLContext entre toutes ses connexions."""
+
+    def __init__(self, ssl_context=None, **kwargs):
+        self.ssl_context = ssl_context
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.ssl_context is not None:
+            kwargs["ssl_context"] = self.ssl_context
+        return super().init_poolmanager(*args, **kwargs)
+
+
+class _Flight:
+    """Appel GET en cours, partagé par toutes les requêtes identiques arrivées pendant qu'il tourne."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+def _clone(response):
+    """Copie superficielle d'une réponse (copy.copy ne garde que les attributs picklables)."""
+    clone = object.__new__(type(response))
+    clone.__dict__.update(response.__dict__)
+    return clone
+
+
+def _share_parsed_json(response):
+    """Copie de la réponse dont le JSON n'est décodé qu'une fois pour tous les participants.
+
+    Le résultat décodé est partagé : il ne doit pas être modifié par les appelants.
+    """
+    shared = _clone(response)
+    decode = response.json
+    parsed = []
+
+    def json(**kwargs):
+        if kwargs:
+            with phase("decode"):
+                return decode(**kwargs)
+        if not parsed:
+            with phase("decode"):
+                parsed.append(decode_response(response))
+        return parsed[0]
+
+    shared.json = json
+    return shared
+
+
+def _timed_json(response):
+    """Copie de la réponse dont le décodage JSON est compté dans la phase Server-Timing "decode"."""
+    timed = _clone(response)
+    decode = response.json
+
+    def json(**kwargs):
+        with phase("decode"):
+            return decode(**kwargs) if kwargs else decode_response(response)
+
+    timed.json = json
+    return timed
+
+
+def route_family(url):
+    """Famille de route Taranis pour les compteurs : /api/v1/config/osint-sources/3 -> config/osint-sources."""
+    parts = [part for part in urlsplit(url).path.split("/") if part]
+    if parts[:2] == ["api", "v1"]:
+        parts = parts[2:]
+    return "/".join(parts[:2]) or "/"
+
+
+def _build_ssl_context():
+    # Taranis est appelé avec verify=False : pas de vérification, mais un seul contexte
+    # TLS pour tout le pool (évite de recharger la config TLS à chaque connexion)
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+class UpstreamClient:
+    """Client HTTP unique vers Taranis, partagé par tous les blueprints.
+
+    Les connexions TCP/TLS sont gardées ouvertes (keep-alive) dans un pool et
+    réutilisées d'une requête à l'autre au lieu d'un handshake par appel.
+    """
+
+    def __init__(self, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE,
+                 pool_block=POOL_BLOCK, max_retries=MAX_RETRIES,
+                 connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT,
+                 route_timeouts=None, conditional_cache_size=CONDITIONAL_CACHE_SIZE,
+                 coalesce_gets=COALESCE_GETS):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.route_timeouts = sorted(
+            (route_timeouts if route_timeouts is not None else ROUTE_READ_TIMEOUTS).items(),
+            key=lambda item: len(item[0]),
+            reverse=True
+        )
+        self.adapter = PooledAdapter(
+            ssl_context=_build_ssl_context(),
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            max_retries=max_retries
+        )
+        # Dernière réponse validable (ETag / Last-Modified) par URL, en LRU
+        self.conditional_cache_size = conditional_cache_size
+        self._validated = OrderedDict()
+        self._validated_lock = threading.Lock()
+        self._counters = {"conditional_requests": 0, "not_modified": 0, "stale_served": 0}
+        # Disjoncteur par famille de routes + dernière bonne réponse par URL
+        self.breakers = CircuitBreakers()
+        self._last_good = OrderedDict()
+        # Appels GET en cours par clé (URL + params + portée d'authentification)
+        self.coalesce_gets = coalesce_gets
+        self._flights = {}
+        self._flights_lock = threading.Lock()
+        self._coalescing = defaultdict(lambda: {"requests": 0, "upstream_calls": 0, "coalesced": 0})
+        # Une Session par thread (l'objet Session n'est pas thread-safe),
+        # mais toutes partagent le même adapter, donc le même pool de connexions
+        self._local = threading.local()
+
+    @property
+    def session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.verify = False
+            session.headers["Connection"] = "keep-alive"
+            session.mount("https://", self.adapter)
+            session.mount("http://", self.adapter)
+            self._local.session = session
+        return session
+
+    def timeout_for(self, url):
+        path = urlsplit(url).path
+        for prefix, read_timeout in self.route_timeouts:
+            if path.startswith(prefix):
+                return (self.connect_timeout, read_timeout)
+        return (self.connect_timeout, self.read_timeout)
+
+    def request(self, method, url, cache=True, **kwargs):
+        """cache=False : GET envoyé tel quel, sans fusion, revalidation ni réponse périmée
+        (lectures de fond qui ne doivent pas évincer les réponses servies aux clients)."""
+        kwargs.setdefault("verify", False)
+        kwargs.setdefault("timeout", self.timeout_for(url))
+        if method.upper() == "GET" and not kwargs.get("stream") and cache:
+            if self.coalesce_gets:
+                response = self._coalesced_get(url, **kwargs)
+            else:
+                response = _timed_json(self._guarded_get(url, **kwargs))
+            if getattr(response, "stale_age", None) is not None:
+                mark_stale(response.stale_age)
+            return response
+        return _timed_json(self._guarded(url, lambda: self.session.request(method, url, **kwargs), method=method.upper()))
+
+    def _guarded(self, url, send, fallback=None, method="GET"):
+        """Appel protégé par le disjoncteur de sa famille de routes.
+
+        Circuit ouvert, erreur réseau/timeout ou 5xx : `fallback` peut fournir la
+        dernière bonne réponse (périmée) au lieu d'attendre ou d'échouer.
+        Une écriture refusée (5xx, timeout de lecture) dit peu de la santé de
+        Taranis : seules ses erreurs de connexion comptent pour ouvrir le circuit.
+        """
+        family = route_family(url)
+        idempotent = method in ("GET", "HEAD")
+        breaker = self.breakers.get(family)
+        if not breaker.allow():
+            stale = fallback() if fallback else None
+            if stale is not None:
+                return stale
+            raise CircuitOpenError(breaker.family, breaker.retry_after())
+        upstream_requests_in_flight.inc(family)
+        started_at = time.perf_counter()
+        try:
+            # Le login compte dans la phase "auth" de Server-Timing, le reste dans "upstream"
+            with phase("auth" if family == "auth/login" else "upstream"):
+                response = send()
+        except Exception as e:
+            upstream_request_duration.observe(time.perf_counter() - started_at, family, method, "error")
+            if idempotent or isinstance(e, requests.exceptions.ConnectionError):
+                breaker.record_failure()
+            else:
+                breaker.release()
+            stale = fallback() if fallback else None
+            if stale is not None:
+                return stale
+            raise
+        finally:
+            upstream_requests_in_flight.dec(family)
+        upstream_request_duration.observe(time.perf_counter() - started_at, family, method, str(response.status_code))
+        if response.status_code >= 500 and not idempotent:
+            breaker.release()
+        elif response.status_code >= 500:
+            breaker.record_failure()
+            stale = fallback() if fallback else None
+            if stale is not None:
+                return stale
+        else:
+            breaker.record_success()
+        return response
+
+    def _guarded_get(self, url, **kwargs):
+        key = url + "?" + urlencode(sorted((kwargs.get("params") or {}).items()), doseq=True)
+        response = self._guarded(url, lambda: self._send_get(url, **kwargs), lambda: self._stale(key))
+        if response.status_code == 200 and getattr(response, "stale_age", None) is None:
+            self._remember(key, response)
+        return response
+
+    def _remember(self, key, response):
+        if STALE_CACHE_SIZE <= 0 or len(response.content) > CONDITIONAL_MAX_BYTES:
+            return
+        with self._validated_lock:
+            self._last_good[key] = (time.time(), response)
+            self._last_good.move_to_end(key)
+            while len(self._last_good) > STALE_CACHE_SIZE:
+                self._last_good.popitem(last=False)
+
+    def _stale(self, key):
+        with self._validated_lock:
+            entry = self._last_good.get(key)
+        if entry is None or time.time() - entry[0] > STALE_MAX_AGE:
+            return None
+        self._counters["stale_served"] += 1
+        stale = _clone(entry[1])
+        stale.stale_age = time.time() - entry[0]
+        return stale
+
+    def _send_get(self, url, **kwargs):
+        if self.conditional_cache_size > 0:
+            return self._conditional_get(url, **kwargs)
+        return self.session.request("GET", url, **kwargs)
+
+    @staticmethod
+    def _flight_key(url, kwargs):
+        headers = kwargs.get("headers") or {}
+        # Portée d'auth : deux tokens différents ne partagent jamais une réponse
+        scope = hashlib.blake2b(str(headers.get("Authorization", "")).encode(), digest_size=8).hexdigest()
+        params = urlencode(sorted((kwargs.get("params") or {}).items()), doseq=True)
+        other_headers = sorted((k, str(v)) for k, v in headers.items() if k != "Authorization")
+        return (url, params, scope, repr(other_headers), repr(kwargs.get("json")))
+
+    def _coalesced_get(self, url, **kwargs):
+        """GET fusionné : le premier appelant interroge Taranis, les suivants attendent sa réponse."""
+        key = self._flight_key(url, kwargs)
+        counters = self._coalescing[route_family(url)]
+        with self._flights_lock:
+            counters["requests"] += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                counters["upstream_calls"] += 1
+            else:
+                counters["coalesced"] += 1
+
+        if leader:
+            try:
+                flight.response = _share_parsed_json(self._guarded_get(url, **kwargs))
+            except Exception as e:
+                flight.error = e
+            finally:
+                with self._flights_lock:
+                    del self._flights[key]
+                flight.done.set()
+        else:
+            flight.done.wait()
+
+        if flight.error is not None:
+            raise flight.error
+        return flight.response
+
+    def _conditional_get(self, url, **kwargs):
+        """GET avec If-None-Match / If-Modified-Since si une réponse précédente est connue.
+
+        Sur un 304, Taranis n'a rien renvoyé : on ressert la réponse gardée en cache.
+        """
+        key = url + "?" + urlencode(sorted((kwargs.get("params") or {}).items()), doseq=True)
+        with self._validated_lock:
+            cached = self._validated.get(key)
+            if cached is not None:
+                self._validated.move_to_end(key)
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if cached is not None:
+            self._counters["conditional_requests"] += 1
+            if cached.headers.get("ETag"):
+                headers["If-None-Match"] = cached.headers["ETag"]
+            if cached.headers.get("Last-Modified"):
+                headers["If-Modified-Since"] = cached.headers["Last-Modified"]
+
+        response = self.session.request("GET", url, headers=headers, **kwargs)
+        if response.status_code == 304 and cached is not None:
+            self._counters["not_modified"] += 1
+            return cached
+
+        validatable = "ETag" in response.headers or "Last-Modified" in response.headers
+        if response.status_code == 200 and validatable and len(response.content) <= CONDITIONAL_MAX_BYTES:
+            with self._validated_lock:
+                self._validated[key] = response
+                self._validated.move_to_end(key)
+                while len(self._validated) > self.conditional_cache_size:
+                    self._validated.popitem(last=False)
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+    def stats(self):
+        """Utilisation du pool : connexions ouvertes vs réutilisées, par hôte."""
+        hosts = {}
+        pools = self.adapter.poolmanager.pools
+        with pools.lock:
+            items = list(pools._container.items())
+        for key, pool in items:
+            opened = pool.num_connections
+            requests_sent = pool.num_requests
+            hosts[f"{key.key_scheme}://{key.key_host}:{key.key_port}"] = {
+                "requests": requests_sent,
+                "connections_opened": opened,
+                "connections_reused": max(requests_sent - opened, 0),
+                "idle_connections": pool.pool.qsize() if pool.pool is not None else 0,
+                "maxsize": pool.pool.maxsize if pool.pool is not None else 0,
+            }
+        total_requests = sum(h["requests"] for h in hosts.values())
+        total_reused = sum(h["connections_reused"] for h in hosts.values())
+        with self._flights_lock:
+            coalescing = {
+                route: {**values, "ratio": round(values["coalesced"] / values["requests"], 3) if values["requests"] else 0.0}
+                for route, values in self._coalescing.items()
+            }
+        return {
+            **self._counters,
+            "circuits": self.breakers.stats(),
+            "coalescing": coalescing,
+            "requests": total_requests,
+            "connections_opened": sum(h["connections_opened"] for h in hosts.values()),
+            "connections_reused": total_reused,
+            "reuse_ratio": round(total_reused / total_requests, 3) if total_requests else 0.0,
+            "hosts": hosts,
+        }
+
+    def collect_metrics(self):
+        """Échantillons Prometheus relus depuis stats() au moment du scrape."""
+        stats = self.stats()
+        hosts = stats["hosts"]
+        yield ("gateway_upstream_pool_connections_opened_total", "counter", "Connexions TCP/TLS ouvertes vers Taranis",
+               [({"host": host}, values["connections_opened"]) for host, values in hosts.items()])
+        yield ("gateway_upstream_pool_requests_total", "counter", "Requêtes envoyées sur le pool de connexions",
+               [({"host": host}, values["requests"]) for host, values in hosts.items()])
+        yield ("gateway_upstream_pool_idle_connections", "gauge", "Connexions keep-alive libres dans le pool",
+               [({"host": host}, values["idle_connections"]) for host, values in hosts.items()])
+        yield ("gateway_upstream_pool_maxsize", "gauge", "Taille maximale du pool par hôte",
+               [({"host": host}, values["maxsize"]) for host, values in hosts.items()])
+        yield ("gateway_upstream_conditional_requests_total", "counter", "GET envoyés avec If-None-Match / If-Modified-Since",
+               [({}, stats["conditional_requests"])])
+        yield ("gateway_upstream_not_modified_total", "counter", "Réponses 304 resservies depuis le cache conditionnel",
+               [({}, stats["not_modified"])])
+        yield ("gateway_upstream_stale_served_total", "counter", "Réponses périmées servies pendant une panne Taranis",
+               [({}, stats["stale_served"])])
+        coalescing = stats["coalescing"]
+        yield ("gateway_upstream_coalesce_requests_total", "counter", "GET reçus par le client upstream",
+               [({"family": family}, values["requests"]) for family, values in coalescing.items()])
+        yield ("gateway_upstream_coalesced_total", "counter", "GET servis par un appel identique déjà en cours",
+               [({"family": family}, values["coalesced"]) for family, values in coalescing.items()])
+        circuits = stats["circuits"]
+        yield ("gateway_circuit_open", "gauge", "1 si le circuit de la famille est ouvert ou semi-ouvert",
+               [({"family": family}, int(values["state"] != "closed")) for family, values in circuits.items()])
+        yield ("gateway_circuit_opened_total", "counter", "Ouvertures du circuit",
+               [({"family": family}, values["opened"]) for family, values in circuits.items()])
+        yield ("gateway_circuit_rejected_total", "counter", "Appels refusés circuit ouvert",
+               [({"family": family}, values["rejected"]) for family, values in circuits.items()])
+
+
+upstream = UpstreamClient()
+metrics.collector(upstream.collect_metrics)
@@ -0,0 +1,239 @@
+import re
+import zlib
+from array import array
+from datetime import datetime
+
+import numpy as np
+
+from utils.fast_json import dumps, loads
+
+# Identifiant CVE, cherché dans le titre quand l'agrégat n'a pas de champ cve_id
+CVE_PATTERN = re.compile(r"CVE-\d{4}-\d{4,}", re.IGNORECASE)
+# Valeur int64 minimale = NaT une fois vue en datetime64
+MISSING_DATE = np.iinfo(np.int64).min
+
+
+def item_field(item, key, default=None):
+    """Valeur d'un champ d'un agrégat Taranis.
+
+    Le champ peut être porté par l'agrégat, par la news_item_data d'un de ses
+    news items, ou par ses attributs (liste de {"key", "value"}).
+    """
+    if key in item and item[key] is not None:
+        return item[key]
+    for news_item in item.get("news_items") or ():
+        data = news_item.get("news_item_data") or {}
+        if data.get(key) is not None:
+            return data[key]
+        for attribute in data.get("attributes") or ():
+            if attribute.get("key") == key:
+                return attribute.get("value")
+    return default
+
+
+def encode_record(item):
+    """Agrégat complet compressé (JSON + zlib), pour le garder sans ses dicts Python."""
+    return zlib.compress(dumps(item), 1)
+
+
+def decode_record(blob):
+    return loads(zlib.decompress(blob))
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "oui")
+    return bool(value)
+
+
+def _timestamp(value):
+    if not value:
+        return MISSING_DATE
+    try:
+        return int(datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp())
+    except ValueError:
+        return MISSING_DATE
+
+
+def _severity(item, cvss):
+    """Sévérité Taranis si présente, sinon déduite du CVSS (échelle CVSS v3)."""
+    severity = item_field(item, "severity")
+    if severity:
+        return str(severity).upper()
+    if cvss >= 9:
+        return "CRITICAL"
+    if cvss >= 7:
+        return "HIGH"
+    if cvss >= 4:
+        return "MEDIUM"
+    return "LOW" if cvss > 0 else "NONE"
+
+
+def _cve_id(item):
+    cve = item_field(item, "cve_id") or item_field(item, "cve")
+    if cve:
+        return str(cve)
+    match = CVE_PATTERN.search(str(item.get("title") or ""))
+    return match.group(0).upper() if match else None
+
+
+class PackedStrings:
+    """Chaînes quasi uniques (CVE, titres) : un seul buffer UTF-8 + un tableau d'offsets."""
+
+    def __init__(self):
+        self._blob = bytearray()
+        self._offsets = array("q", [0])
+
+    def append(self, value):
+        if isinstance(value, bytes):
+            self._blob += value
+        elif value is not None:
+            self._blob += str(value).encode()
+        self._offsets.append(len(self._blob))
+
+    def freeze(self):
+        self._blob = bytes(self._blob)
+        self._offsets = np.frombuffer(self._offsets, dtype=np.int64).copy()
+        return self
+
+    def raw(self, index):
+        return self._blob[self._offsets[index]:self._offsets[index + 1]]
+
+    def __getitem__(self, index):
+        return self.raw(index).decode() or None
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    @property
+    def nbytes(self):
+        return len(self._blob) + self._offsets.nbytes
+
+
+class DictionaryStrings:
+    """Chaînes répétées (vendor, produit) : un code entier par ligne + la table des valeurs distinctes."""
+
+    def __init__(self):
+        self.values = [None]
+        self._index = {None: 0}
+        self._codes = array("I")
+
+    def append(self, value):
+        value = str(value) if value not in (None, "") else None
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.values)
+            self.values.append(value)
+        self._codes.append(code)
+
+    def freeze(self):
+        self.codes = np.frombuffer(self._codes, dtype=np.uint32).copy()
+        del self._codes
+        return self
+
+    def code_of(self, value):
+        return self._index.get(value)
+
+    def __getitem__(self, index):
+        return self.values[self.codes[index]]
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + sum(len(v) for v in self.values if v)
+
+
+class VulnerabilityTable:
+    """Vulnérabilités en colonnes typées au lieu d'une liste de dicts imbriqués.
+
+    Seuls les champs lus par les pages VOC sont extraits (scores, KEV/PoC, dates,
+    CVE, titre, vendor/produit, sévérité). L'agrégat Taranis complet est gardé
+    compressé et reconstruit uniquement à la demande (`record(i)`).
+    """
+
+    FLOAT_FIELDS = ("cvss_score", "epss_score", "epss_percentile")
+    BOOL_FIELDS = ("is_kev", "has_poc", "has_template")
+    DATE_FIELDS = ("created", "published")
+    DICTIONARY_FIELDS = ("vendor", "product")
+
+    def __init__(self, items):
+        floats = {name: array("f") for name in self.FLOAT_FIELDS}
+        bools = {name: array("b") for name in self.BOOL_FIELDS}
+        dates = {name: array("q") for name in self.DATE_FIELDS}
+        self.ids = PackedStrings()
+        self.cve_ids = PackedStrings()
+        self.titles = PackedStrings()
+        self.strings = {name: DictionaryStrings() for name in self.DICTIONARY_FIELDS + ("severity",)}
+        self._records = PackedStrings()
+
+        # Un item à la fois : `items` peut être un générateur (flux Taranis, copie synchronisée)
+        for item in items:
+            self.ids.append(str(item.get("id", "")))
+            self.cve_ids.append(_cve_id(item))
+            self.titles.append(item.get("title"))
+            for name, column in floats.items():
+                column.append(_float(item_field(item, name)))
+            for name, column in bools.items():
+                column.append(_bool(item_field(item, name)))
+            for name, column in dates.items():
+                column.append(_timestamp(item_field(item, name)))
+            for name in self.DICTIONARY_FIELDS:
+                self.strings[name].append(item_field(item, name))
+            self.strings["severity"].append(_severity(item, floats["cvss_score"][-1]))
+            self._records.append(encode_record(item))
+
+        self.columns = {name: np.frombuffer(column, dtype=np.float32).copy() for name, column in floats.items()}
+        self.columns.update({name: np.frombuffer(column, dtype=np.int8).astype(np.bool_) for name, column in bools.items()})
+        self.columns.update({name: np.frombuffer(column, dtype=np.int64).view("datetime64[s]").copy() for name, column in dates.items()})
+        for packed in (self.ids, self.cve_ids, self.titles, self._records):
+            packed.freeze()
+        for column in self.strings.values():
+            column.freeze()
+        self._positions = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def position(self, item_id):
+        """Ligne d'un agrégat à partir de son id (index construit au premier appel)."""
+        if self._positions is None:
+            self._positions = {self.ids[i]: i for i in range(len(self))}
+        return self._positions.get(str(item_id))
+
+    def record(self, index):
+        """Agrégat Taranis complet, reconstruit depuis sa forme compressée."""
+        return decode_record(self._records.raw(index))
+
+    def records(self, indices=None):
+        for index in range(len(self)) if indices is None else indices:
+            yield self.record(index)
+
+    def row(self, index):
+        """Vue compacte d'une ligne (champs VOC uniquement, sans décompresser l'agrégat)."""
+        row = {"id": self.ids[index], "cve_id": self.cve_ids[index], "title": self.titles[index]}
+        for name in self.FLOAT_FIELDS:
+            row[name] = round(float(self.columns[name][index]), 4)
+        for name in self.BOOL_FIELDS:
+            row[name] = bool(self.columns[name][index])
+        for name in self.DATE_FIELDS:
+            value = self.columns[name][index]
+            row[name] = None if np.isnat(value) else str(value)
+        for name, column in self.strings.items():
+            row[name] = column[index]
+        return row
+
+    @property
+    def nbytes(self):
+        packed = (self.ids, self.cve_ids, self.titles, self._records)
+        return (sum(column.nbytes for column in self.columns.values())
+                + sum(column.nbytes for column in packed)
+                + sum(column.nbytes for column in self.strings.values()))
@@ -0,0 +1,220 @@
+import hashlib
+import json
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Tris acceptés par ?sort= (préfixe "-" pour l'ordre décroissant)
+SORT_KEYS = ("cvss_score", "epss_score", "epss_percentile", "risk_score", "published", "created", "cve_id")
+DEFAULT_SORT = "-cve_id"
+DATE_FIELDS = ("published", "created")
+# Vues prédéfinies des pages VOC (Critical / HighRisk / WithExploit / Recent)
+VIEWS = ("critical", "high-risk", "with-exploit", "recent")
+RECENT_DAYS = 30
+
+
+class InvalidQuery(ValueError):
+    pass
+
+
+def _number(args, name):
+    value = args.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise InvalidQuery(f"{name} doit être un nombre")
+
+
+def _flag(args, name):
+    value = args.get(name, "").strip().lower()
+    if value in ("", "all"):
+        return None
+    if value in ("1", "true", "yes", "oui"):
+        return True
+    if value in ("0", "false", "no", "non"):
+        return False
+    raise InvalidQuery(f"{name} doit valoir true ou false")
+
+
+def _date(args, name, end_of_day=False):
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise InvalidQuery(f"{name} doit être une date ISO (YYYY-MM-DD)")
+    if end_of_day and len(value) == 10:
+        parsed += timedelta(days=1, seconds=-1)
+    return int(parsed.timestamp())
+
+
+def _values(args, name):
+    return sorted({v.strip() for v in args.get(name, "").split(",") if v.strip() and v.strip() != "all"})
+
+
+def parse_query(args):
+    """Filtres et tri normalisés à partir des paramètres de la requête."""
+    sort = args.get("sort", DEFAULT_SORT)
+    if sort.lstrip("-") not in SORT_KEYS:
+        raise InvalidQuery(f"sort doit être l'un de {', '.join(SORT_KEYS)} (préfixe - pour décroissant)")
+    date_field = args.get("date_field", "published")
+    if date_field not in DATE_FIELDS:
+        raise InvalidQuery(f"date_field doit valoir {' ou '.join(DATE_FIELDS)}")
+    view = args.get("view", "all")
+    if view not in VIEWS + ("all",):
+        raise InvalidQuery(f"view doit être l'un de {', '.join(VIEWS)}")
+
+    return {
+        "view": view,
+        "q": args.get("q", "").strip().lower(),
+        "cvss_score": (_number(args, "cvss_min"), _number(args, "cvss_max")),
+        "epss_score": (_number(args, "epss_min"), _number(args, "epss_max")),
+        "is_kev": _flag(args, "is_kev"),
+        "has_poc": _flag(args, "has_poc"),
+        "date_field": date_field,
+        "date_range": (_date(args, "date_from"), _date(args, "date_to", end_of_day=True)),
+        "vendor": _values(args, "vendor"),
+        "product": _values(args, "product"),
+        "severity": [s.upper() for s in _values(args, "severity")],
+        "sort": sort,
+    }
+
+
+def query_signature(query):
+    """Empreinte courte des filtres, stockée dans le curseur pour refuser un curseur d'une autre requête."""
+    raw = json.dumps(query, sort_keys=True).encode()
+    return hashlib.blake2b(raw, digest_size=6).hexdigest()
+
+
+class VulnerabilityIndex:
+    """Index de requête sur un snapshot (construit une fois par version).
+
+    Pour chaque clé de tri, l'ordre des lignes (argsort) et les valeurs triées
+    sont précalculés : un filtre d'intervalle devient deux recherches
+    dichotomiques, un filtre booléen un masque, et une page un découpage de
+    l'ordre filtré par le masque combiné.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self.size = len(table)
+        columns = table.columns
+        cvss, epss = columns["cvss_score"], columns["epss_score"]
+        # Même calcul que calculateRiskScore() côté front
+        risk = cvss * (1 + 0.5 * columns["is_kev"] + 0.5 * columns["has_poc"] + epss)
+
+        self.values = {
+            "cvss_score": cvss,
+            "epss_score": epss,
+            "epss_percentile": columns["epss_percentile"],
+            "risk_score": risk.astype(np.float32),
+            # Dates en secondes epoch (NaT = plus petit int64, trié en premier)
+            "published": columns["published"].view(np.int64),
+            "created": columns["created"].view(np.int64),
+            "cve_id": np.array([table.cve_ids[i] or "" for i in range(self.size)], dtype=str),
+        }
+        self.ids = np.array([table.ids[i] for i in range(self.size)], dtype=str)
+        # Ordre total (valeur, id) : une page suivante se repère par la clé de sa dernière ligne,
+        # valable quel que soit le snapshot ou le worker qui la sert
+        self.orders = {key: np.lexsort((self.ids, values)) for key, values in self.values.items()}
+        self.sorted_values = {key: self.values[key][order] for key, order in self.orders.items()}
+        self.flags = {name: columns[name] for name in ("is_kev", "has_poc", "has_template")}
+        self._search_text = None
+
+    def _range_mask(self, key, low, high):
+        """Lignes avec low <= valeur <= high, via l'index trié de la clé."""
+        sorted_values, order = self.sorted_values[key], self.orders[key]
+        # Bornes converties dans le type de la colonne (0.1 en float32 != 0.1 en float64)
+        low = None if low is None else sorted_values.dtype.type(low)
+        high = None if high is None else sorted_values.dtype.type(high)
+        start = 0 if low is None else int(np.searchsorted(sorted_values, low, side="left"))
+        stop = self.size if high is None else int(np.searchsorted(sorted_values, high, side="right"))
+        mask = np.zeros(self.size, dtype=np.bool_)
+        mask[order[start:stop]] = True
+        return mask
+
+    def _strings_mask(self, name, values):
+        column = self.table.strings[name]
+        codes = [code for code in (column.code_of(value) for value in values) if code is not None]
+        return np.isin(column.codes, codes)
+
+    def _text_mask(self, text):
+        if self._search_text is None:
+            self._search_text = np.char.lower(np.char.add(
+                np.char.add(self.values["cve_id"], " "),
+                np.array([self.table.titles[i] or "" for i in range(self.size)], dtype=str)
+            ))
+        return np.char.find(self._search_text, text) >= 0
+
+    def _view_mask(self, view):
+        cvss = self.values["cvss_score"]
+        if view == "critical":
+            return self._strings_mask("severity", ["CRITICAL"])
+        if view == "high-risk":
+            return (self.values["risk_score"] > 12) | (cvss >= 9)
+        if view == "with-exploit":
+            return self.flags["has_poc"]
+        if view == "recent":
+            since = int(time.time()) - RECENT_DAYS * 86400
+            return self._range_mask("published", since, None)
+        return None
+
+    def mask(self, query):
+        """Masque combiné (ET) de tous les filtres de la requête."""
+        mask = np.ones(self.size, dtype=np.bool_)
+        for key in ("cvss_score", "epss_score"):
+            low, high = query[key]
+            if low is not None or high is not None:
+                mask &= self._range_mask(key, low, high)
+        low, high = query["date_range"]
+        if low is not None or high is not None:
+            # Un item sans date ne tombe dans aucune fenêtre
+            mask &= self._range_mask(query["date_field"], low if low is not None else np.iinfo(np.int64).min + 1, high)
+        for name in ("is_kev", "has_poc"):
+            if query[name] is not None:
+                mask &= self.flags[name] if query[name] else ~self.flags[name]
+        for name in ("vendor", "product", "severity"):
+            if query[name]:
+                mask &= self._strings_mask(name, query[name])
+        view_mask = self._view_mask(query["view"])
+        if view_mask is not None:
+            mask &= view_mask
+        if query["q"]:
+            mask &= self._text_mask(query["q"])
+        return mask
+
+    def cursor_key(self, sort, row):
+        """Clé [valeur, id] d'une ligne pour le tri donné (à mettre dans le curseur)."""
+        return [self.values[sort.lstrip("-")][row].item(), str(self.ids[row])]
+
+    def search(self, query, limit, after=None):
+        """(total, lignes de la page, reste-t-il des lignes) pour une requête normalisée.
+
+        after : clé [valeur, id] de la dernière ligne de la page précédente ;
+        la page commence à la première ligne qui la suit dans l'ordre du tri.
+        """
+        mask = self.mask(query)
+        key = query["sort"].lstrip("-")
+        descending = query["sort"].startswith("-")
+        order = self.orders[key][::-1] if descending else self.orders[key]
+        selected = order[mask[order]]
+        total = int(selected.size)
+        if after is not None:
+            values, ids = self.values[key][selected], self.ids[selected]
+            value, item_id = values.dtype.type(after[0]), str(after[1])
+            if descending:
+                following = (values < value) | ((values == value) & (ids < item_id))
+            else:
+                following = (values > value) | ((values == value) & (ids > item_id))
+            # Lignes triées : `following` passe de False à True une seule fois
+            start = int(np.argmax(following)) if following.any() else total
+            selected = selected[start:]
+        return total, selected[:limit], selected.size > limit
+
+
+def snapshot_index(snapshot):
+    return snapshot.memo("query_index", lambda s: VulnerabilityIndex(s.table))
@@ -0,0 +1,56 @@
+import numpy as np
+
+# Mêmes bornes que le graphique CVSS du dashboard : [0-4], ]4-7], ]7-9], ]9-10]
+CVSS_BUCKETS = [("0-4", 0.0, 4.0), ("4-7", 4.0, 7.0), ("7-9", 7.0, 9.0), ("9-10", 9.0, 10.0)]
+
+
+def _percent(count, total):
+    return round(100 * count / total) if total else 0
+
+
+def _epss_summary(epss):
+    if epss.size == 0:
+        return {"mean": 0.0, "median": 0.0, "p90": 0.0, "max": 0.0, "above_0_1": 0, "above_0_5": 0}
+    p50, p90 = np.percentile(epss, [50, 90])
+    return {
+        "mean": round(float(epss.mean()), 4),
+        "median": round(float(p50), 4),
+        "p90": round(float(p90), 4),
+        "max": round(float(epss.max()), 4),
+        "above_0_1": int(np.count_nonzero(epss >= 0.1)),
+        "above_0_5": int(np.count_nonzero(epss >= 0.5)),
+    }
+
+
+def compute_dashboard(columns):
+    """Agrégats du dashboard VI, calculés de façon vectorisée sur les colonnes."""
+    cvss, epss = columns["cvss_score"], columns["epss_score"]
+    is_kev, has_poc = columns["is_kev"], columns["has_poc"]
+    total = int(cvss.size)
+
+    buckets = {}
+    for label, low, high in CVSS_BUCKETS:
+        in_bucket = (cvss >= low) & (cvss <= high) if low == 0.0 else (cvss > low) & (cvss <= high)
+        buckets[label] = int(np.count_nonzero(in_bucket))
+
+    # Règle "critique" du dashboard : cvss >= 9 || (kev && cvss >= 7) || (poc && cvss >= 7)
+    critical = (cvss >= 9) | ((is_kev | has_poc) & (cvss >= 7))
+    exploitable = has_poc | columns["has_template"]
+
+    return {
+        "total": total,
+        "cvss_distribution": buckets,
+        "cvss_mean": round(float(cvss.mean()), 2) if total else 0.0,
+        "high_risk_count": int(np.count_nonzero(critical)),
+        "kev_count": int(np.count_nonzero(is_kev)),
+        "has_poc_count": int(np.count_nonzero(has_poc)),
+        "exploitable_count": int(np.count_nonzero(exploitable)),
+        "exploit_percent": _percent(int(np.count_nonzero(exploitable)), total),
+        "epss": _epss_summary(epss),
+        "epss_percentile_mean": round(float(columns["epss_percentile"].mean()), 4) if total else 0.0,
+    }
+
+
+def snapshot_dashboard(snapshot):
+    """Agrégats d'un snapshot, mémorisés tant que le snapshot ne change pas."""
+    return snapshot.memo("dashboard", lambda s: compute_dashboard(s.table.columns))
@@ -0,0 +1,106 @@
+import logging
+import os
+import threading
+import time
+
+from utils.server_timing import phase
+from utils.streaming import iter_upstream_items
+from utils.taranis_auth import TARANIS_BASE_URL, taranis_request
+from utils.vuln_columns import VulnerabilityTable
+
+GROUP_ID_VULNERABILITIES = os.getenv("GROUP_ID_VULNERABILITIES", "8f63a699-23e1-4568-ad4b-4f495ba24d85")
+# Durée de vie d'un snapshot complet du groupe vulnérabilités
+SNAPSHOT_TTL = float(os.getenv("VULN_SNAPSHOT_TTL", "300"))
+# Taille des pages demandées à Taranis pour reconstruire le snapshot
+SNAPSHOT_PAGE_SIZE = int(os.getenv("VULN_SNAPSHOT_PAGE_SIZE", "1000"))
+
+
+def news_item_aggregates_url(group_id):
+    return f"{TARANIS_BASE_URL}/api/v1/assess/news-item-aggregates-by-group/{group_id}"
+
+
+def iter_group_items(group_id, page_size=SNAPSHOT_PAGE_SIZE):
+    """Toutes les news-item-aggregates d'un groupe, page par page, un item à la fois."""
+    offset = 0
+    while True:
+        res = taranis_request(
+            "GET",
+            news_item_aggregates_url(group_id),
+            params={"range": "ALL", "sort": "DATE_ASC", "offset": offset, "limit": page_size},
+            stream=True
+        )
+        if res.status_code != 200:
+            res.close()
+        res.raise_for_status()
+        count = 0
+        for item in iter_upstream_items(res):
+            count += 1
+            yield item
+        if count < page_size:
+            return
+        offset += count
+
+
+
+class VulnerabilitySnapshot:
+    """État figé du groupe vulnérabilités à un instant donné.
+
+    Les items sont gardés en colonnes (VulnerabilityTable) et non en dicts ;
+    les résultats dérivés (agrégats du dashboard, ...) sont mémorisés par
+    snapshot : ils ne sont calculés qu'une fois par version.
+    """
+
+    def __init__(self, items, version):
+        self.table = VulnerabilityTable(items)
+        self.version = version
+        self.loaded_at = time.time()
+        self._memo = {}
+        self._memo_lock = threading.Lock()
+
+    def memo(self, name, compute):
+        if name in self._memo:
+            return self._memo[name]
+        with self._memo_lock:
+            if name not in self._memo:
+                with phase("snapshot"):
+                    self._memo[name] = compute(self)
+            return self._memo[name]
+
+
+class VulnerabilitySnapshotStore:
+    """Snapshot courant du groupe vulnérabilités, rechargé à l'expiration du TTL."""
+
+    def __init__(self, group_id=GROUP_ID_VULNERABILITIES, ttl=SNAPSHOT_TTL):
+        self.group_id = group_id
+        self.ttl = ttl
+        self._snapshot = None
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def _is_fresh(self):
+        return self._snapshot is not None and time.time() - self._snapshot.loaded_at < self.ttl
+
+    def current(self):
+        if self._is_fresh():
+            return self._snapshot
+        with self._lock:
+            if not self._is_fresh():
+                # Téléchargement compté dans "upstream", construction de la table dans "snapshot"
+                with phase("snapshot"):
+                    self.replace(iter_group_items(self.group_id))
+            return self._snapshot
+
+    def touch(self):
+        """Prolonge le snapshot courant (source à jour mais inchangée)."""
+        if self._snapshot is not None:
+            self._snapshot.loaded_at = time.time()
+
+    def replace(self, items):
+        self._version += 1
+        self._snapshot = VulnerabilitySnapshot(items, self._version)
+        table = self._snapshot.table
+        logging.info(f"[Gateway] Snapshot vulnérabilités v{self._version} : {len(table)} items, {table.nbytes // 1024} Kio")
+        return self._snapshot
+
+
+vulnerability_snapshots = VulnerabilitySnapshotStore()
@@ -18,29 +18,51 @@ interface NewsItem {
 
 const AssessPage: React.FC = () => {
   const [items, setItems] = useState<NewsItem[]>([]);
+  const [total, setTotal] = useState<number | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     fetchItems();
   }, []);
 
+  // Première page ; les suivantes sont chargées à la demande (next_cursor de la gateway)
   const fetchItems = async () => {
     setLoading(true);
     try {
-      const data = await fetchAssessVulnerabilities();
-      setItems(Array.isArray(data) ? data : []);
+      const page = await fetchAssessVulnerabilities();
+      setItems(page.items);
+      setTotal(page.total);
+      setNextCursor(page.nextCursor);
     } catch (e) {
       setItems([]);
+      setTotal(null);
+      setNextCursor(null);
     }
     setLoading(false);
   };
 
+  const fetchMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const page = await fetchAssessVulnerabilities(nextCursor);
+      setItems(prev => [...prev, ...page.items]);
+      setTotal(page.total ?? total);
+      setNextCursor(page.nextCursor);
+    } catch (e) {
+      console.error('Error loading more news items:', e);
+    }
+    setLoadingMore(false);
+  };
+
   return (
     <div>
       <div className="flex justify-between items-center mb-2">
         <h1 className="text-2xl font-bold text-blue-700">NEWS ITEMS</h1>
       </div>
-      <div className="mb-2 text-sm">News items count: {items.length}</div>
+      <div className="mb-2 text-sm">News items count: {total ?? items.length} ({items.length} shown)</div>
       <div>
         {loading ? (
           <div>Loading...</div>
@@ -72,6 +94,15 @@ const AssessPage: React.FC = () => {
             </div>
           ))
         )}
+        {!loading && nextCursor && (
+          <button
+            onClick={fetchMore}
+            disabled={loadingMore}
+            className="w-full py-2 text-sm text-blue-600 border rounded bg-white hover:bg-blue-50 disabled:opacity-50"
+          >
+            {loadingMore ? 'Loading...' : 'Load more'}
+          </button>
+        )}
       </div>
     </div>
   );
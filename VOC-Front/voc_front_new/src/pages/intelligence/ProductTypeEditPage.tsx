@@ -1,7 +1,7 @@
 import React, { useEffect, useState } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import { getAllProductTypes, updateProductType, deleteProductType, ProductType } from '../../utils/presenters';
-import { intelligenceApi } from '../../utils/api';
+import { intelligenceApi, publishProductWithPresets } from '../../utils/api';
 import { Save, Trash2, Eye, Loader2, CheckCircle2, AlertTriangle, Upload } from 'lucide-react';
 
 interface ReportItem {
@@ -234,15 +234,8 @@ const ProductTypeEditPage = () => {
         report_items: selectedReportItemObjects
       };
       await intelligenceApi.put(`/publish/products/${id}`, productUpdatePayload);
-      // Deuxième API : POST /publish/products/{id}/publish/{preset_id} - Publier avec chaque preset
-      let publishErrors = [];
-      for (const presetId of selectedPresets) {
-        try {
-          await intelligenceApi.post(`/publish/products/${id}/publish/${presetId}`);
-        } catch (e) {
-          publishErrors.push(presetId);
-        }
-      }
+      // Deuxième API : POST /publish/products/{id}/publish/{preset_id} - Publier avec chaque preset (job gateway si VITE_PUBLISH_JOBS)
+      const { failedPresets: publishErrors } = await publishProductWithPresets(id, selectedPresets);
       if (publishErrors.length === 0) {
         setSuccess('Product published successfully!');
         alert('Produit publié avec succès !');
@@ -1,7 +1,7 @@
 import React, { useEffect, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { getAllProductTypes, createProductType, ProductType } from '../../utils/presenters';
-import { intelligenceApi } from '../../utils/api';
+import { intelligenceApi, publishProductWithPresets } from '../../utils/api';
 import { Save } from 'lucide-react';
 
 interface ReportItem {
@@ -163,15 +163,8 @@ const ProductTypeNewPage = () => {
         report_items: selectedReportItems.map(id => ({ id })),
       };
       await intelligenceApi.put(`/publish/products/${productId}`, savePayload);
-      // POST pour chaque preset sélectionné
-      let publishErrors = [];
-      for (const presetId of selectedPresets) {
-        try {
-          await intelligenceApi.post(`/publish/products/${productId}/publish/${presetId}`);
-        } catch (e) {
-          publishErrors.push(presetId);
-        }
-      }
+      // POST pour chaque preset sélectionné (un job gateway en parallèle si VITE_PUBLISH_JOBS)
+      const { failedPresets: publishErrors } = await publishProductWithPresets(productId, selectedPresets);
       if (publishErrors.length === 0) {
         alert('Produit publié avec succès !');
       navigate('/intelligence/publish');
@@ -984,17 +984,104 @@ export const fetchBotNodesFull = async () => {
   }
 };
 
-// Fonction pour récupérer les vulnérabilités de l'API Assess
-export const fetchAssessVulnerabilities = async () => {
+// Une page de vulnérabilités Assess, relayée page par page depuis Taranis (next_cursor pour la suivante)
+export const fetchAssessVulnerabilities = async (cursor?: string, limit = 100) => {
   try {
-    const response = await intelligenceApi.get('/assess/vulnerabilities');
-    return response.data && response.data.items ? response.data.items : response.data;
+    const params: Record<string, string | number> = { limit };
+    if (cursor) params.cursor = cursor;
+    const response = await intelligenceApi.get('/assess/vulnerabilities', { params });
+    const data = response.data;
+    return { items: data.items || [], total: data.total ?? null, nextCursor: (data.next_cursor as string | null) ?? null };
   } catch (error) {
     console.error('Error fetching Assess vulnerabilities:', error);
     throw error;
   }
 };
 
+// Agrégats du dashboard VI calculés par la gateway (distribution CVSS, critiques, exploits, EPSS)
+export const fetchVulnerabilityDashboard = async () => {
+  try {
+    const response = await intelligenceApi.get('/assess/vulnerabilities/dashboard');
+    return response.data;
+  } catch (error) {
+    console.error('Error fetching vulnerability dashboard aggregates:', error);
+    throw error;
+  }
+};
+
+// Page de vulnérabilités filtrée/triée par la gateway (cvss_min, is_kev, view, sort, ...)
+export const queryVulnerabilities = async (filters: Record<string, any> = {}, cursor?: string, limit = 100) => {
+  try {
+    const params = { ...filters, limit, ...(cursor ? { cursor } : {}) };
+    const response = await intelligenceApi.get('/assess/vulnerabilities/query', { params });
+    return response.data;
+  } catch (error) {
+    console.error('Error querying vulnerabilities:', error);
+    throw error;
+  }
+};
+
+// Plusieurs endpoints de la gateway en un seul aller-retour (ex. API_ENDPOINTS au chargement de l'Intelligence Center)
+export const fetchBatch = async (paths: Record<string, string>) => {
+  const requests = Object.entries(paths).map(([id, path]) => ({ id, method: 'GET', path }));
+  const response = await intelligenceApi.post('/batch', { requests });
+  const results: Record<string, { status: number; body: any }> = {};
+  for (const item of response.data.responses) {
+    results[item.id] = { status: item.status, body: item.body };
+  }
+  return results;
+};
+
+// Publication en job gateway (VITE_PUBLISH_JOBS=true) ; par défaut, un appel synchrone par preset
+const PUBLISH_JOBS = import.meta.env.VITE_PUBLISH_JOBS === 'true';
+// Suivi d'un job : abandon après PUBLISH_JOB_TIMEOUT ou trop d'erreurs de polling d'affilée
+const PUBLISH_JOB_TIMEOUT = 5 * 60 * 1000;
+const PUBLISH_JOB_MAX_POLL_ERRORS = 5;
+
+const publishPresetsOneByOne = async (productId: string | number, presetIds: string[]) => {
+  const failedPresets: string[] = [];
+  for (const presetId of presetIds) {
+    try {
+      const response = await intelligenceApi.post(`/publish/products/${productId}/publish/${presetId}`);
+      if (response.status >= 400) failedPresets.push(presetId);
+    } catch (e) {
+      failedPresets.push(presetId);
+    }
+  }
+  return { job: null, failedPresets };
+};
+
+// Publication d'un produit avec plusieurs presets
+export const publishProductWithPresets = async (productId: string | number, presetIds: string[], pollInterval = 1000) => {
+  if (!PUBLISH_JOBS) {
+    return publishPresetsOneByOne(productId, presetIds);
+  }
+  const { data, status } = await intelligenceApi.post(`/publish/products/${productId}/publish-jobs`, { preset_ids: presetIds });
+  if (status !== 202) {
+    throw new Error(data?.error || `Création du job de publication refusée (${status})`);
+  }
+  const deadline = Date.now() + PUBLISH_JOB_TIMEOUT;
+  let job = data;
+  let pollErrors = 0;
+  while (!['succeeded', 'failed', 'partial'].includes(job.status)) {
+    if (Date.now() > deadline) {
+      throw new Error(`Publication toujours en cours après ${PUBLISH_JOB_TIMEOUT / 1000} s (job ${data.job_id})`);
+    }
+    await new Promise(resolve => setTimeout(resolve, pollInterval));
+    try {
+      const response = await intelligenceApi.get(`/publish/jobs/${data.job_id}`);
+      if (response.status !== 200) throw new Error(`Statut du job : ${response.status}`);
+      job = response.data;
+      pollErrors = 0;
+    } catch (e) {
+      // 404 ou erreur réseau passagère : on réessaie, dans la limite de PUBLISH_JOB_MAX_POLL_ERRORS
+      if (++pollErrors >= PUBLISH_JOB_MAX_POLL_ERRORS) throw e;
+    }
+  }
+  const failedPresets: string[] = job.tasks.filter((task: any) => task.status === 'failed').map((task: any) => task.target);
+  return { job, failedPresets };
+};
+
 
 
 